@@ -4,16 +4,35 @@
 Flask Webアプリケーション
 """
 
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, g, render_template, request, jsonify, send_file, session, url_for
+from flask.json.provider import DefaultJSONProvider
+from flask.sessions import SecureCookieSessionInterface
 import json
 import random
 import os
+import secrets
+import atexit
+import pickle
+import codec
+from character import Character
 from player import Player
 from party import Party
-from monster import get_random_monster
-from battle import Battle
+from monster import (Monster, create_monster, get_random_monsters, get_template_info,
+                     find_template_by_name, get_character_emoji)
+from battle import AutoPolicy, Battle
 from f_ticket import FTicketSystem, EconomyCondition
-from item import WEAPONS, ARMORS, CONSUMABLES
+from state_store import GameState, CookieStateStore, MemoryStateStore, SessionLocks, SQLiteStateStore
+from battle_registry import BattleRegistry
+from battle_log import BattleLogStore
+from replay import new_seed
+from delta import DeltaTracker
+from catalog import CatalogCache, CatalogRequestError, ForecastCache
+from assets import AssetPipeline, EncodedBody
+from item_index import INDEXES, recommend
+from economy import MAX_HORIZON, WorldEconomy
+from events import EventBus
+from metrics import METRICS, SIZE_BUCKETS, MetricsMiddleware
+from profiler import PROFILE_KINDS, ProfilerMiddleware, RequestProfiler
 
 # テンプレートと静的ファイルのパスを絶対パスで設定
 base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -25,15 +44,70 @@ app = Flask(__name__,
             static_folder=static_dir)
 app.secret_key = 'financial_rpg_secret_key_change_in_production'
 
+# リクエストのメトリクス（/metrics。FINANCIAL_RPG_METRICS=0 で無効）
+METRICS.enabled = os.environ.get('FINANCIAL_RPG_METRICS', '1') == '1'
+METRICS.histogram('financial_rpg_state_payload_bytes', 'ストアに保存するゲーム状態のサイズ（ストアの形式ごと）',
+                  SIZE_BUCKETS)
+METRICS.histogram('financial_rpg_session_cookie_bytes', 'セッションCookieのサイズ', SIZE_BUCKETS)
+Character.on_created = METRICS.created
+
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """セッションCookieの読み込み（署名の検証・json.loads）と保存の時間を計測する"""
+
+    def open_session(self, app, request):
+        with METRICS.phase('session_load'):
+            return super().open_session(app, request)
+
+    def save_session(self, app, session, response):
+        with METRICS.phase('session_save'):
+            super().save_session(app, session, response)
+        if METRICS.enabled and session.modified:
+            for cookie in response.headers.getlist('Set-Cookie'):
+                if cookie.startswith(self.get_cookie_name(app) + '='):
+                    METRICS.observe('financial_rpg_session_cookie_bytes', (), len(cookie))
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """レスポンスのJSONエンコードの時間を計測する"""
+
+    def dumps(self, obj, **kwargs):
+        with METRICS.phase('encode_response'):
+            return super().dumps(obj, **kwargs)
+
+app.session_interface = TimedSessionInterface()
+app.json = TimedJSONProvider(app)
+app.wsgi_app = MetricsMiddleware(app.wsgi_app, METRICS)
+
+# 遅いリクエストのプロファイル（FINANCIAL_RPG_PROFILE_RATE の割合を計測。0 なら無効）
+profiler = RequestProfiler(
+    os.environ.get('FINANCIAL_RPG_PROFILE_DIR', os.path.join(base_dir, 'profiles')),
+    sample_rate=float(os.environ.get('FINANCIAL_RPG_PROFILE_RATE', 0)),
+    threshold=float(os.environ.get('FINANCIAL_RPG_PROFILE_THRESHOLD', 0.5)),
+    keep=int(os.environ.get('FINANCIAL_RPG_PROFILE_KEEP', 100))
+)
+profiler.watch()  # 管理エンドポイントで変えた設定を他のワーカーにも反映する
+app.wsgi_app = ProfilerMiddleware(app.wsgi_app, profiler)
+
+# 管理用エンドポイントのトークン（X-Admin-Token ヘッダー。未設定なら管理用エンドポイントは無効）
+ADMIN_TOKEN = os.environ.get('FINANCIAL_RPG_ADMIN_TOKEN')
+
+@app.before_request
+def record_route():
+    """メトリクスのラベルにするルート（URLのパターン。存在しないパスは unmatched）"""
+    if METRICS.enabled and request.url_rule is not None:
+        METRICS.set_route(request.url_rule.rule)
+
+@METRICS.timed('serialize')
 def serialize_game_state(player, f_ticket_system, current_area, story_progress):
     """ゲーム状態をシリアライズ"""
     return {
         'player': {
             'gold': player.gold,
             'f_tickets': player.f_tickets,
-            'inventory_weapons': [{'name': w.name, 'attack_bonus': w.attack_bonus} for w in player.inventory_weapons],
-            'inventory_armors': [{'name': a.name, 'defense_bonus': a.defense_bonus} for a in player.inventory_armors],
-            'inventory_consumables': player.inventory_consumables,
+            'inventory_weapons': [{'name': w.name, 'attack_bonus': w.attack_bonus, 'count': count, 'equipped': equipped}
+                                  for w, count, equipped in player.inventory_weapons.items()],
+            'inventory_armors': [{'name': a.name, 'defense_bonus': a.defense_bonus, 'count': count, 'equipped': equipped}
+                                 for a, count, equipped in player.inventory_armors.items()],
+            'inventory_consumables': dict(player.inventory_consumables),
             'party': [serialize_character(m) for m in player.party.members]
         },
         'f_ticket_system': {
@@ -46,16 +120,6 @@ def serialize_game_state(player, f_ticket_system, current_area, story_progress):
 
 def serialize_character(char):
     """キャラクターをシリアライズ"""
-    from monster import MONSTER_TEMPLATES, Monster
-    
-    emoji = '👤'  # デフォルト（人間キャラクター）
-    if isinstance(char, Monster):
-        # モンスターの絵文字を取得
-        for template_name, template in MONSTER_TEMPLATES.items():
-            if template['name'] == char.name:
-                emoji = template.get('emoji', '👤')
-                break
-    
     return {
         'name': char.name,
         'character_type': char.character_type.value,
@@ -70,42 +134,24 @@ def serialize_character(char):
         'exp_needed': char.level * 100,
         'equipped_weapon': char.equipped_weapon.name if char.equipped_weapon else None,
         'equipped_armor': char.equipped_armor.name if char.equipped_armor else None,
-        'emoji': emoji
+        'emoji': get_character_emoji(char),
+        'template_id': char.template_id if isinstance(char, Monster) else None
     }
 
 def deserialize_game_state(state_data):
     """ゲーム状態をデシリアライズ"""
     from character import Character, CharacterType
-    from monster import create_monster, MONSTER_TEMPLATES
     
     player = Player()
     player.gold = state_data['player']['gold']
     player.f_tickets = state_data['player']['f_tickets']
     
-    # 武器・防具を復元
+    # 武器・防具を復元（古い形式は1個ずつ並んでいるので count が無い）
     for w_data in state_data['player']['inventory_weapons']:
-        if w_data['name'] in WEAPONS:
-            from item import Weapon
-            weapon = Weapon(
-                WEAPONS[w_data['name']].name,
-                WEAPONS[w_data['name']].attack_bonus,
-                WEAPONS[w_data['name']].price_gold,
-                WEAPONS[w_data['name']].price_f_tickets,
-                WEAPONS[w_data['name']].description
-            )
-            player.inventory_weapons.append(weapon)
+        player.inventory_weapons.add(w_data['name'], w_data.get('count', 1))
     
     for a_data in state_data['player']['inventory_armors']:
-        if a_data['name'] in ARMORS:
-            from item import Armor
-            armor = Armor(
-                ARMORS[a_data['name']].name,
-                ARMORS[a_data['name']].defense_bonus,
-                ARMORS[a_data['name']].price_gold,
-                ARMORS[a_data['name']].price_f_tickets,
-                ARMORS[a_data['name']].description
-            )
-            player.inventory_armors.append(armor)
+        player.inventory_armors.add(a_data['name'], a_data.get('count', 1))
     
     # 消費アイテムを復元
     player.inventory_consumables = state_data['player'].get('inventory_consumables', {})
@@ -123,11 +169,16 @@ def deserialize_game_state(state_data):
             )
         else:
             # モンスターの場合はテンプレートから復元を試みる
-            monster_name = char_data['name']
-            if monster_name in MONSTER_TEMPLATES:
-                char = create_monster(monster_name, char_data['level'])
+            template_id = char_data.get('template_id')
+            if template_id is not None:
+                template = get_template_info(template_id)
+                if template is None:
+                    raise ValueError(f"Unknown monster template id: {template_id}")
             else:
-                continue
+                template = find_template_by_name(char_data['name'])
+                if template is None:
+                    continue
+            char = create_monster(template.key, char_data['level'])
         
         char.hp = char_data['hp']
         char.mp = char_data['mp']
@@ -136,16 +187,14 @@ def deserialize_game_state(state_data):
         
         # 装備を復元
         if char_data['equipped_weapon']:
-            for w in player.inventory_weapons:
-                if w.name == char_data['equipped_weapon']:
-                    char.equip_weapon(w)
-                    break
+            weapon = player.inventory_weapons.restore_equipped(char_data['equipped_weapon'])
+            if weapon is not None:
+                char.equip_weapon(weapon)
         
         if char_data['equipped_armor']:
-            for a in player.inventory_armors:
-                if a.name == char_data['equipped_armor']:
-                    char.equip_armor(a)
-                    break
+            armor = player.inventory_armors.restore_equipped(char_data['equipped_armor'])
+            if armor is not None:
+                char.equip_armor(armor)
         
         player.party.add_member(char)
     
@@ -158,10 +207,222 @@ def deserialize_game_state(state_data):
     
     return player, f_ticket_system, current_area, story_progress
 
+def _encode_state_json(state):
+    """GameStateをJSON文字列に変換（Cookieストア用）"""
+    data = codec.encode_state(state, 'json')
+    METRICS.observe('financial_rpg_state_payload_bytes', (('format', 'json'),), len(data))
+    return data
+
+def _encode_state_binary(state):
+    """GameStateをバイナリに変換（SQLiteストア用）"""
+    data = codec.encode_state(state, 'binary')
+    METRICS.observe('financial_rpg_state_payload_bytes', (('format', 'binary'),), len(data))
+    return data
+
+def _decode_state(data):
+    """Cookie・SQLiteストアのデータからGameStateを復元"""
+    try:
+        return codec.decode_state(data)
+    except codec.UnsupportedVersionError as e:
+        if e.version != 0:
+            raise
+        # コーデック導入前に保存されたJSON
+        return GameState(*deserialize_game_state(json.loads(data)))
+
+def create_state_store(kind: str):
+    """状態ストアを生成（'memory', 'sqlite', 'cookie'）"""
+    if kind == 'memory':
+        return MemoryStateStore(
+            max_entries=int(os.environ.get('FINANCIAL_RPG_STATE_MAX_ENTRIES', 10000)),
+            ttl=float(os.environ.get('FINANCIAL_RPG_STATE_TTL', 3600))
+        )
+    if kind == 'sqlite':
+        path = os.environ.get('FINANCIAL_RPG_STATE_DB', os.path.join(base_dir, 'game_state.db'))
+        return SQLiteStateStore(path, _encode_state_binary, _decode_state)
+    if kind == 'cookie':
+        return CookieStateStore(_encode_state_json, _decode_state)
+    raise ValueError(f"Unknown state store: {kind}")
+
+state_store = create_state_store(os.environ.get('FINANCIAL_RPG_STATE_STORE', 'memory'))
+
+# 同じセッションのリクエストを直列にするロック（プロセス内。lock_session を参照）
+session_locks = SessionLocks()
+
+def create_battle_store(kind: str, idle_timeout: float, max_battles: int):
+    """戦闘の保存先を生成（'memory' はプロセス内、'sqlite' は複数ワーカーで共有）"""
+    if kind == 'memory':
+        return None
+    if kind == 'sqlite':
+        path = os.environ.get('FINANCIAL_RPG_BATTLE_DB', os.path.join(base_dir, 'battles.db'))
+        return SQLiteStateStore(path, pickle.dumps, pickle.loads, ttl=idle_timeout, max_entries=max_battles)
+    raise ValueError(f"Unknown battle store: {kind}")
+
+# 進行中の戦闘（FINANCIAL_RPG_BATTLE_SNAPSHOT を指定するとクラッシュ復旧用に保存。memory のみ）
+BATTLE_IDLE_TIMEOUT = float(os.environ.get('FINANCIAL_RPG_BATTLE_IDLE_TIMEOUT', 900))
+MAX_BATTLES = int(os.environ.get('FINANCIAL_RPG_MAX_BATTLES', 1000))
+battle_registry = BattleRegistry(
+    max_battles=MAX_BATTLES,
+    idle_timeout=BATTLE_IDLE_TIMEOUT,
+    snapshot_path=os.environ.get('FINANCIAL_RPG_BATTLE_SNAPSHOT'),
+    store=create_battle_store(os.environ.get('FINANCIAL_RPG_BATTLE_STORE', 'memory'), BATTLE_IDLE_TIMEOUT,
+                              MAX_BATTLES),
+    locks=session_locks
+)
+battle_registry.restore()
+atexit.register(battle_registry.snapshot)
+
+# 戦闘ログの保存先（FINANCIAL_RPG_BATTLE_LOG_DIR を空にすると保存しない）
+# 既定ではゲーム状態と同じ期限（ストアのTTL。cookie ストアは7日）で古いセッションのログを削除する
+BATTLE_LOG_PAGE_LIMIT = 500
+battle_log_dir = os.environ.get('FINANCIAL_RPG_BATTLE_LOG_DIR', os.path.join(base_dir, 'battle_logs'))
+battle_log_store = BattleLogStore(
+    battle_log_dir,
+    segment_events=int(os.environ.get('FINANCIAL_RPG_BATTLE_LOG_SEGMENT', 1000)),
+    keep_battles=int(os.environ.get('FINANCIAL_RPG_BATTLE_LOG_KEEP', 20)),
+    max_age=float(os.environ.get('FINANCIAL_RPG_BATTLE_LOG_MAX_AGE', getattr(state_store, 'ttl', 7 * 24 * 3600)))
+) if battle_log_dir else None
+
+# サーバープッシュ（/api/events）の購読者
+event_bus = EventBus(
+    max_pending=int(os.environ.get('FINANCIAL_RPG_EVENT_QUEUE', 100)),
+    max_subscribers=int(os.environ.get('FINANCIAL_RPG_MAX_EVENT_CONNECTIONS', 10000))
+)
+EVENT_HEARTBEAT = float(os.environ.get('FINANCIAL_RPG_EVENT_HEARTBEAT', 15))
+# 購読はプロセスごとなので、server.py の複数ワーカーでは無効にする（0で無効）
+EVENTS_ENABLED = os.environ.get('FINANCIAL_RPG_EVENTS', '1') == '1'
+
+# 全プレイヤー共通の経済（一定間隔で変動。複数ワーカーでも起点時刻とシードが同じなら同じ経済になる）
+world_economy = WorldEconomy(
+    interval=float(os.environ.get('FINANCIAL_RPG_ECONOMY_TICK', 60)),
+    seed=int(os.environ.get('FINANCIAL_RPG_ECONOMY_SEED', 0)),
+    epoch=float(os.environ['FINANCIAL_RPG_ECONOMY_EPOCH']) if os.environ.get('FINANCIAL_RPG_ECONOMY_EPOCH') else None
+)
+
+def _broadcast_economy(snapshot):
+    """経済状況が変わったら全購読者に通知"""
+    event_bus.broadcast('economy', {
+        'condition': snapshot.current_condition.value,
+        'description': snapshot.get_condition_description(),
+        'f_ticket_value': snapshot.get_current_value()
+    })
+
+world_economy.start(_broadcast_economy)
+atexit.register(event_bus.close_all)
+
+# 静的ファイル（ハッシュ入りの名前・圧縮済み）と描画済みのメインページ
+asset_pipeline = AssetPipeline(static_dir)
+index_page = None
+
+# ショップカタログ（種類・項目の組み合わせごとにエンコード済みのレスポンスを保持）
+catalog_cache = CatalogCache()
+
+# F券の価値の予測（遷移行列のバージョンごとにエンコード済みのレスポンスを保持）
+forecast_cache = ForecastCache()
+
+# 差分レスポンス用に、セッションごとに最後に送った状態を保持
+state_tracker = DeltaTracker(max_sessions=int(os.environ.get('FINANCIAL_RPG_STATE_MAX_ENTRIES', 10000)))
+
+def lock_session():
+    """現在のセッションのロックをリクエストの終わりまで保持する
+
+    メモリストアの状態や戦闘は生きたオブジェクトを共有するため、同じセッションの
+    リクエストが並行して書き換えないよう、読み込みから保存まで直列にする。
+    """
+    sid = session.get('sid')
+    if sid is None or 'session_lock' in g:
+        return
+    with METRICS.phase('session_lock'):
+        lock = session_locks.get(sid)
+        lock.acquire()
+    g.session_lock = lock
+
+@app.teardown_request
+def release_session_lock(exc=None):
+    """lock_session で取ったロックを解放"""
+    lock = g.pop('session_lock', None)
+    if lock is not None:
+        lock.release()
+
+def load_game_state():
+    """現在のセッションのゲーム状態を取得（未開始ならNone）
+
+    f_ticket_system は世界の経済の現在のスナップショット（読み取り専用）になる。
+    セッションのロックを取り、リクエストの終わりまで保持する。
+    """
+    lock_session()
+    with METRICS.phase('state_load'):
+        state = state_store.get(session.get('sid'))
+    if state is not None:
+        state.f_ticket_system = world_economy.current()
+    return state
+
+def save_game_state(player, f_ticket_system, current_area, story_progress):
+    """ゲーム状態をストアに保存し、レスポンス用のシリアライズ結果を返す
+
+    経済はセッションに保存せず、見たティック（f_ticket_system.tick）だけを記録する。
+    """
+    with METRICS.phase('state_save'):
+        state_store.set(session['sid'], GameState(player, f_ticket_system, current_area, story_progress,
+                                                  economy_tick=f_ticket_system.tick))
+    return serialize_game_state(player, f_ticket_system, current_area, story_progress)
+
+def state_fields(**views):
+    """レスポンスに含める状態（battle_state, game_state）
+
+    クライアントが X-State-Version ヘッダーを送った場合は前回のレスポンスとの
+    差分を返す（版が一致しなければ全体を返して再同期）。値がNoneの状態は
+    差分レスポンスには含めない。
+    """
+    base_version = request.headers.get('X-State-Version')
+    if base_version is None or 'sid' not in session:
+        return views
+    try:
+        base_version = int(base_version)
+    except ValueError:
+        base_version = None
+    views = {name: value for name, value in views.items() if value is not None}
+    return state_tracker.respond(session['sid'], base_version, views)
+
+def encoded_response(encoded, cache_control: str):
+    """EncodedBody を Accept-Encoding に応じた版で返す（If-None-Match が一致すれば304）"""
+    encoding, data, etag = encoded.select(request.accept_encodings)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(data, content_type=encoded.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+@app.template_global()
+def asset_url(path: str) -> str:
+    """静的ファイルのURL（ハッシュ入りの名前があればそちら）"""
+    hashed = asset_pipeline.url(path)
+    if hashed is None:
+        return url_for('static', filename=path)
+    return url_for('asset', path=hashed)
+
 @app.route('/')
 def index():
-    """メインページ"""
-    return render_template('index.html')
+    """メインページ（描画結果をキャッシュ。デバッグ時は毎回描画し、静的ファイルの変更も反映）"""
+    global index_page
+    if app.debug:
+        asset_pipeline.reload_if_changed()
+    if index_page is None or app.debug:
+        index_page = EncodedBody(render_template('index.html').encode('utf-8'), 'text/html; charset=utf-8')
+    # 参照する静的ファイルの名前が変わりうるので、毎回再検証させる
+    return encoded_response(index_page, 'no-cache')
+
+@app.route('/assets/<path:path>')
+def asset(path):
+    """ハッシュ入りの名前の静的ファイル（内容が変わると名前が変わるので無期限にキャッシュさせる）"""
+    encoded = asset_pipeline.get(path)
+    if encoded is None:
+        return jsonify({'success': False, 'message': 'Not Found'}), 404
+    return encoded_response(encoded, 'public, max-age=31536000, immutable')
 
 @app.route('/api/start', methods=['POST'])
 def start_game():
@@ -171,12 +432,12 @@ def start_game():
     
     player = Player()
     player.create_main_character(name)
-    f_ticket_system = FTicketSystem()
+    f_ticket_system = world_economy.current()
     current_area = 1
     story_progress = 0
     
-    game_state = serialize_game_state(player, f_ticket_system, current_area, story_progress)
-    session['game_state'] = json.dumps(game_state)
+    session['sid'] = secrets.token_urlsafe(16)
+    game_state = save_game_state(player, f_ticket_system, current_area, story_progress)
     
     return jsonify({
         'success': True,
@@ -187,263 +448,310 @@ def start_game():
 @app.route('/api/status', methods=['GET'])
 def get_status():
     """ゲーム状態を取得"""
-    if 'game_state' not in session:
+    state = load_game_state()
+    if state is None:
         return jsonify({'success': False, 'message': 'ゲームが開始されていません'})
     
-    game_state = json.loads(session['game_state'])
-    return jsonify({'success': True, 'game_state': game_state})
+    game_state = serialize_game_state(*state.as_tuple())
+    return jsonify({'success': True, **state_fields(game_state=game_state)})
 
 @app.route('/api/adventure', methods=['POST'])
 def start_adventure():
     """冒険を開始（インタラクティブ戦闘用）"""
-    if 'game_state' not in session:
+    state = load_game_state()
+    if state is None:
         return jsonify({'success': False, 'message': 'ゲームが開始されていません'})
     
-    game_state_data = json.loads(session['game_state'])
-    old_condition = game_state_data.get('f_ticket_system', {}).get('current_condition', '安定')
-    
-    player, f_ticket_system, current_area, story_progress = deserialize_game_state(game_state_data)
+    player, f_ticket_system, current_area, story_progress = state.as_tuple()
     
-    # 経済状況が変動する可能性
-    if random.random() < 0.3:
-        f_ticket_system.change_condition()
+    # 前回の保存以降に世界の経済状況が変わったか（変化の通知は world_economy が配信する）
+    economy_changed = state.economy_tick is not None and f_ticket_system.changed_tick > state.economy_tick
     
-    economy_changed = f_ticket_system.current_condition.value != old_condition
-    
-    # パーティの状態を回復
+    # パーティの状態を回復（途中で放棄した戦闘の防御による補正も戻す）
     player.party.heal_all(999)
     player.party.restore_all_mp(999)
+    for member in player.party.members:
+        member.reset_stats()
     
     # 敵の生成（プレイヤーの平均レベルを使用）
     player_avg_level = sum([m.level for m in player.party.members]) // len(player.party.members) if player.party.members else 1
     player_avg_level = max(1, player_avg_level)
     
-    enemy_party = Party()
-    num_enemies = random.randint(1, 3)
-    enemies = []
-    for _ in range(num_enemies):
-        monster = get_random_monster(player_avg_level)
-        enemy_party.add_member(monster)
-        enemies.append(serialize_character(monster))
-    
-    # インタラクティブ戦闘を開始
-    battle = Battle(player.party, enemy_party)
-    session['battle'] = {
-        'player_party': [serialize_character(m) for m in player.party.members],
-        'enemy_party': [serialize_character(m) for m in enemy_party.members],
-        'enemies': enemies
-    }
+    with METRICS.phase('game_logic'):
+        enemy_party = Party()
+        # 出現も戦闘も戦闘ごとの乱数で決める（スレッド間でグローバルの乱数を共有しない）
+        rng = random.Random(new_seed())
+        num_enemies = rng.randint(1, 3)
+        for monster in get_random_monsters(player_avg_level, num_enemies, rng):
+            enemy_party.add_member(monster)
+        
+        # インタラクティブ戦闘を開始（戦闘はレジストリで保持し、リクエスト間で使い回す）
+        battle = Battle(player.party, enemy_party, seed=new_seed(rng), record=True)
+    battle_registry.start(session['sid'], battle)
     
     # 状態を保存（戦闘中）
-    game_state = serialize_game_state(player, f_ticket_system, current_area, story_progress)
-    session['game_state'] = json.dumps(game_state)
-    session['battle_instance'] = json.dumps({
-        'player_party_data': [serialize_character(m) for m in player.party.members],
-        'enemy_party_data': [serialize_character(m) for m in enemy_party.members]
-    })
+    game_state = save_game_state(player, f_ticket_system, current_area, story_progress)
     
     return jsonify({
         'success': True,
-        'battle_state': battle.get_battle_state(),
-        'game_state': game_state,
+        **state_fields(battle_state=battle.get_battle_state(), game_state=game_state),
         'economy_changed': economy_changed
     })
 
-@app.route('/api/battle/action', methods=['POST'])
-def battle_action():
-    """戦闘アクションを実行"""
-    if 'game_state' not in session or 'battle_instance' not in session:
-        return jsonify({'success': False, 'message': '戦闘が開始されていません'})
-    
-    data = request.json
-    action_type = data.get('action_type')  # 'attack', 'spell', 'item', 'defend'
-    target_index = data.get('target_index')
-    spell_name = data.get('spell_name')
-    item_name = data.get('item_name')
+def settle_party(player, battle):
+    """終了した戦闘のパーティの状態をプレイヤーのパーティに反映する
+    
+    Cookie・SQLiteストアでは戦闘中のパーティが保存済みの状態と別オブジェクト（メモリストアでは同じ）。
+    レベルアップで上がった最大HP・攻撃力なども反映し、防御による一時的な補正は戻す。
+    """
+    for member, battle_member in zip(player.party.members, battle.player_party.members):
+        for attr in ('hp', 'mp', 'max_hp', 'max_mp', 'base_attack', 'base_defense', 'level', 'experience'):
+            setattr(member, attr, getattr(battle_member, attr))
+        member.reset_stats()
+        if member is not battle_member:
+            battle_member.reset_stats()
+
+def apply_battle_rewards(player, battle):
+    """勝利した戦闘の報酬・経験値・仲間化をプレイヤーに反映し、battle_result を返す"""
+    player_party = battle.player_party
+    enemy_party = battle.enemy_party
+    
+    total_gold = 0
+    total_f_tickets = 0
+    recruited_monsters = []
+    
+    for enemy in enemy_party.members:
+        if isinstance(enemy, Monster):
+            rewards = enemy.get_rewards()
+            total_gold += rewards['gold']
+            total_f_tickets += rewards['f_tickets']
+            if enemy.try_recruitment(battle.rng):
+                recruited_monsters.append(enemy)
+    
+    battle_result = {
+        'victory': True,
+        'rewards': {'gold': total_gold, 'f_tickets': total_f_tickets},
+        'recruited_monsters': [serialize_character(m) for m in recruited_monsters]
+    }
     
-    game_state_data = json.loads(session['game_state'])
-    player, f_ticket_system, current_area, story_progress = deserialize_game_state(game_state_data)
+    # 報酬を付与
+    player.add_gold(total_gold)
+    player.add_f_tickets(total_f_tickets)
     
-    battle_data = json.loads(session['battle_instance'])
+    # 経験値
+    exp_gain = sum([e.level * 20 for e in enemy_party.members])
+    for member in player_party.members:
+        if member.is_alive():
+            member.add_experience(exp_gain)
     
-    # パーティと敵パーティを復元
-    from monster import create_monster, MONSTER_TEMPLATES
-    from character import Character, CharacterType
+    settle_party(player, battle)
     
-    player_party = Party()
-    for char_data in battle_data['player_party_data']:
-        if char_data['character_type'] == '人間':
-            char = Character(
-                char_data['name'],
-                CharacterType.HUMAN,
-                char_data['max_hp'],
-                char_data['max_mp'],
-                char_data['attack'],
-                char_data['defense']
-            )
-        else:
-            monster_name = char_data['name']
-            if monster_name in MONSTER_TEMPLATES:
-                char = create_monster(monster_name, char_data['level'])
-            else:
-                continue
-        char.hp = char_data['hp']
-        char.mp = char_data['mp']
-        char.level = char_data['level']
-        player_party.add_member(char)
-    
-    enemy_party = Party()
-    for char_data in battle_data['enemy_party_data']:
-        monster_name = char_data['name']
-        if monster_name in MONSTER_TEMPLATES:
-            char = create_monster(monster_name, char_data['level'])
-            char.hp = char_data['hp']
-            char.mp = char_data['mp']
-            enemy_party.add_member(char)
-    
-    battle = Battle(player_party, enemy_party)
-    result = battle.player_action(action_type, target_index, item_name, spell_name)
+    # モンスターを仲間に追加
+    for monster in recruited_monsters:
+        monster.hp = monster.max_hp
+        monster.mp = monster.max_mp
+        if len(player.party.members) < 4:
+            player.party.add_member(monster)
     
-    # 戦闘状態を更新
-    battle_data['player_party_data'] = [serialize_character(m) for m in player_party.members]
-    battle_data['enemy_party_data'] = [serialize_character(m) for m in enemy_party.members]
-    session['battle_instance'] = json.dumps(battle_data)
+    return battle_result
+
+def battle_response(state, battle, result):
+    """戦闘の行動後の共通処理（ログの保存・イベント配信・終了判定・報酬・保存）を行い、レスポンスを返す"""
+    sid = session['sid']
+    player, f_ticket_system, current_area, story_progress = state.as_tuple()
+    
+    # 今回の行動の戦闘ログを保存し、接続中のクライアントに戦闘ログと敵の行動を配信
+    events = battle.log.drain()
+    if events:
+        if battle_log_store is not None:
+            battle_log_store.append(sid, battle.log.battle_id, events)
+        event_bus.publish(sid, 'battle_log', {
+            'turn': battle.turn,
+            'battle_id': battle.log.battle_id,
+            'lines': [event.message for event in events],
+            'events': [event.to_dict() for event in events]
+        })
+    if result.get('enemy_actions'):
+        event_bus.publish(sid, 'enemy_turn', {'turn': battle.turn, 'actions': result['enemy_actions']})
     
     # 戦闘が終了したかチェック
     battle_state = battle.get_battle_state()
     battle_result = None
+    game_state = None
     
     if battle_state['is_battle_over']:
-        if player_party.is_all_dead():
+        battle_registry.finish(sid)
+        # 報酬で戦闘中のメンバーが変わる前に結果を記録し、リプレイを保存（replay.py で検証できる）
+        battle.replay.finish(battle)
+        if battle_log_store is not None:
+            battle_log_store.save_replay(sid, battle.log.battle_id, battle.replay.encode())
+        if battle.player_party.is_all_dead():
             battle_result = {'victory': False, 'rewards': {'gold': 0, 'f_tickets': 0}, 'recruited_monsters': []}
+            # 敗北でもHP・MPと防御による補正を戻した状態を保存する（次の冒険の開始時に回復する）
+            settle_party(player, battle)
+            game_state = save_game_state(player, f_ticket_system, current_area, story_progress)
         else:
-            # 勝利
-            total_gold = 0
-            total_f_tickets = 0
-            recruited_monsters = []
-            
-            for enemy in enemy_party.members:
-                if isinstance(enemy, Monster):
-                    rewards = enemy.get_rewards()
-                    total_gold += rewards['gold']
-                    total_f_tickets += rewards['f_tickets']
-                    if enemy.try_recruitment():
-                        recruited_monsters.append(enemy)
-            
-            battle_result = {
-                'victory': True,
-                'rewards': {'gold': total_gold, 'f_tickets': total_f_tickets},
-                'recruited_monsters': [serialize_character(m) for m in recruited_monsters]
-            }
-            
-            # 報酬を付与
-            player.add_gold(total_gold)
-            player.add_f_tickets(total_f_tickets)
-            
-            # 経験値
-            exp_gain = sum([e.level * 20 for e in enemy_party.members])
-            for member in player_party.members:
-                if member.is_alive():
-                    member.add_experience(exp_gain)
-            
-            # モンスターを仲間に追加
-            for monster in recruited_monsters:
-                monster.hp = monster.max_hp
-                monster.mp = monster.max_mp
-                if len(player.party.members) < 4:
-                    player.party.add_member(monster)
-            
+            with METRICS.phase('game_logic'):
+                battle_result = apply_battle_rewards(player, battle)
             story_progress += 1
-            
-            # パーティの状態を更新
-            for i, member in enumerate(player.party.members):
-                if i < len(player_party.members):
-                    battle_member = player_party.members[i]
-                    member.hp = battle_member.hp
-                    member.mp = battle_member.mp
-                    member.level = battle_member.level
-                    member.experience = battle_member.experience
-            
-            game_state = serialize_game_state(player, f_ticket_system, current_area, story_progress)
-            session['game_state'] = json.dumps(game_state)
-            session.pop('battle_instance', None)
-            session.pop('battle', None)
+            game_state = save_game_state(player, f_ticket_system, current_area, story_progress)
+        
+        event_bus.publish(sid, 'battle_end', {
+            'victory': battle_result['victory'],
+            'rewards': battle_result['rewards']
+        })
+    else:
+        battle_registry.update(sid, battle)
+        battle_registry.maybe_snapshot()
     
     return jsonify({
         'success': result.get('success', True),
         'result': result,
-        'battle_state': battle_state,
         'battle_result': battle_result,
-        'game_state': serialize_game_state(player, f_ticket_system, current_area, story_progress) if battle_result else None
+        **state_fields(battle_state=battle_state, game_state=game_state)
+    })
+
+@app.route('/api/battle/action', methods=['POST'])
+def battle_action():
+    """戦闘アクションを実行"""
+    state = load_game_state()
+    battle = battle_registry.get(session['sid']) if state is not None else None
+    if battle is None:
+        return jsonify({'success': False, 'message': '戦闘が開始されていません'})
+    
+    data = request.json
+    action_type = data.get('action_type')  # 'attack', 'spell', 'item', 'defend'
+    target_index = data.get('target_index')
+    spell_name = data.get('spell_name')
+    item_name = data.get('item_name')
+    
+    with METRICS.phase('game_logic'):
+        result = battle.player_action(action_type, target_index, item_name, spell_name)
+    return battle_response(state, battle, result)
+
+@app.route('/api/battle/turn', methods=['POST'])
+def battle_turn():
+    """パーティ全員の1ターン分の行動をまとめて実行（敵のターンまで進める）
+    
+    リクエスト: {"actions": [{"action_type": "attack", "target_index": 0}, ...]}
+    行動はまだ行動していない生存メンバーの順に指定する。1つでも不正なら何も実行しない。
+    """
+    state = load_game_state()
+    battle = battle_registry.get(session['sid']) if state is not None else None
+    if battle is None:
+        return jsonify({'success': False, 'message': '戦闘が開始されていません'})
+    
+    actions = (request.json or {}).get('actions')
+    with METRICS.phase('game_logic'):
+        result = battle.player_turn(actions)
+    battle_over = battle.player_party.is_all_dead() or battle.enemy_party.is_all_dead()
+    if not result['success'] and not battle_over:
+        return jsonify({'success': False, 'result': result, 'message': result['message']})
+    return battle_response(state, battle, result)
+
+@app.route('/api/battle/auto', methods=['POST'])
+def battle_auto():
+    """現在の戦闘を方針に従って最後まで自動で進める（報酬・経験値・仲間化は通常の戦闘と同じ）
+    
+    リクエスト: {"policy": "smart", "heal_threshold": 0.3}
+    policy は 'smart'（HPが減ったら回復、それ以外は最も強い攻撃魔法）か 'attack'（通常攻撃のみ）。
+    """
+    state = load_game_state()
+    battle = battle_registry.get(session['sid']) if state is not None else None
+    if battle is None:
+        return jsonify({'success': False, 'message': '戦闘が開始されていません'})
+    
+    data = request.json or {}
+    try:
+        policy = AutoPolicy.from_name(data.get('policy', 'smart'), float(data.get('heal_threshold', 0.3)))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': '自動戦闘の方針が不正です'})
+    
+    with METRICS.phase('game_logic'):
+        result = battle.auto_resolve(policy)
+    return battle_response(state, battle, result)
+
+def _page_args(default_limit: int):
+    """?offset= と ?limit= を読む（不正ならNone）"""
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', default_limit))
+    except ValueError:
+        return None
+    if offset < 0 or not 1 <= limit <= BATTLE_LOG_PAGE_LIMIT:
+        return None
+    return offset, limit
+
+@app.route('/api/battle/log', methods=['GET'])
+def get_battle_log():
+    """保存済みの戦闘ログ
+    
+    ?battle= を省略するとこのセッションの戦闘の一覧（新しい順）、指定するとその戦闘の
+    offset 番目から limit 件のイベントを返す。
+    """
+    sid = session.get('sid')
+    if sid is None:
+        return jsonify({'success': False, 'message': 'ゲームが開始されていません'})
+    if battle_log_store is None:
+        return jsonify({'success': False, 'message': '戦闘ログは保存されていません'}), 404
+    
+    page = _page_args(100)
+    if page is None:
+        return jsonify({'success': False,
+                        'message': f'offset は0以上、limit は1〜{BATTLE_LOG_PAGE_LIMIT}で指定してください'}), 400
+    offset, limit = page
+    
+    battle_id = request.args.get('battle')
+    if battle_id is None:
+        battles = battle_log_store.battles(sid)
+        return jsonify({'success': True, 'battles': battles[offset:offset + limit], 'total': len(battles)})
+    
+    total = battle_log_store.count(sid, battle_id)
+    if total is None:
+        return jsonify({'success': False, 'message': '戦闘ログが見つかりません'}), 404
+    events = battle_log_store.read(sid, battle_id, offset, limit)
+    next_offset = offset + len(events)
+    return jsonify({
+        'success': True,
+        'battle_id': battle_id,
+        'events': [dict(event.to_dict(), message=event.message) for event in events],
+        'total': total,
+        'next_offset': next_offset if next_offset < total else None
     })
 
 @app.route('/api/battle/state', methods=['GET'])
 def get_battle_state():
     """戦闘状態を取得"""
-    if 'battle_instance' not in session:
+    lock_session()
+    battle = battle_registry.get(session.get('sid'))
+    if battle is None:
         return jsonify({'success': False, 'message': '戦闘が開始されていません'})
     
-    battle_data = json.loads(session['battle_instance'])
-    
-    from monster import create_monster, MONSTER_TEMPLATES
-    from character import Character, CharacterType
-    
-    player_party = Party()
-    for char_data in battle_data['player_party_data']:
-        if char_data['character_type'] == '人間':
-            char = Character(
-                char_data['name'],
-                CharacterType.HUMAN,
-                char_data['max_hp'],
-                char_data['max_mp'],
-                char_data['attack'],
-                char_data['defense']
-            )
-        else:
-            monster_name = char_data['name']
-            if monster_name in MONSTER_TEMPLATES:
-                char = create_monster(monster_name, char_data['level'])
-            else:
-                continue
-        char.hp = char_data['hp']
-        char.mp = char_data['mp']
-        char.level = char_data['level']
-        player_party.add_member(char)
-    
-    enemy_party = Party()
-    for char_data in battle_data['enemy_party_data']:
-        monster_name = char_data['name']
-        if monster_name in MONSTER_TEMPLATES:
-            char = create_monster(monster_name, char_data['level'])
-            char.hp = char_data['hp']
-            char.mp = char_data['mp']
-            enemy_party.add_member(char)
-    
-    battle = Battle(player_party, enemy_party)
     return jsonify({
         'success': True,
-        'battle_state': battle.get_battle_state()
+        **state_fields(battle_state=battle.get_battle_state())
     })
 
 @app.route('/api/recruit_monster', methods=['POST'])
 def recruit_monster():
     """モンスターを仲間に追加（手放し処理込み）"""
-    if 'game_state' not in session:
+    state = load_game_state()
+    if state is None:
         return jsonify({'success': False, 'message': 'ゲームが開始されていません'})
     
     data = request.json
     monster_name = data.get('monster_name')
     release_name = data.get('release_name')  # 手放すモンスターの名前（オプション）
     
-    game_state = json.loads(session['game_state'])
-    player, f_ticket_system, current_area, story_progress = deserialize_game_state(game_state)
+    player, f_ticket_system, current_area, story_progress = state.as_tuple()
     
-    from monster import create_monster, MONSTER_TEMPLATES
+    from monster import MONSTER_TEMPLATES
     
-    # 手放すモンスターを削除
+    # 手放すモンスターを削除（メインキャラクターは削除できない。装備は所持品に戻す）
     if release_name:
         for member in player.party.members[:]:
-            if member.name == release_name:
+            if member.name == release_name and member.character_type.value == 'モンスター':
+                player.unequip_all(member)
                 player.party.remove_member(member)
                 break
     
@@ -456,8 +764,7 @@ def recruit_monster():
         monster.mp = monster.max_mp
         
         if player.party.add_member(monster):
-            game_state = serialize_game_state(player, f_ticket_system, current_area, story_progress)
-            session['game_state'] = json.dumps(game_state)
+            game_state = save_game_state(player, f_ticket_system, current_area, story_progress)
             return jsonify({
                 'success': True,
                 'message': f'{monster.name}が仲間になりました！',
@@ -477,21 +784,21 @@ def recruit_monster():
 @app.route('/api/release_monster', methods=['POST'])
 def release_monster():
     """モンスターを手放す"""
-    if 'game_state' not in session:
+    state = load_game_state()
+    if state is None:
         return jsonify({'success': False, 'message': 'ゲームが開始されていません'})
     
     data = request.json
     monster_name = data.get('name')
     
-    game_state = json.loads(session['game_state'])
-    player, f_ticket_system, current_area, story_progress = deserialize_game_state(game_state)
+    player, f_ticket_system, current_area, story_progress = state.as_tuple()
     
     # モンスターを削除（メインキャラクターは削除できない）
     for member in player.party.members[:]:
         if member.name == monster_name and member.character_type.value == 'モンスター':
+            player.unequip_all(member)
             player.party.remove_member(member)
-            game_state = serialize_game_state(player, f_ticket_system, current_area, story_progress)
-            session['game_state'] = json.dumps(game_state)
+            game_state = save_game_state(player, f_ticket_system, current_area, story_progress)
             return jsonify({
                 'success': True,
                 'message': f'{monster_name}を手放しました',
@@ -505,46 +812,60 @@ def release_monster():
 
 @app.route('/api/shop/items', methods=['GET'])
 def get_shop_items():
-    """ショップアイテム一覧を取得"""
-    weapons = [{
-        'name': w.name,
-        'attack_bonus': w.attack_bonus,
-        'price_gold': w.price_gold,
-        'price_f_tickets': w.price_f_tickets,
-        'description': w.description,
-        'emoji': '⚔️'
-    } for w in WEAPONS.values()]
-    
-    armors = [{
-        'name': a.name,
-        'defense_bonus': a.defense_bonus,
-        'price_gold': a.price_gold,
-        'price_f_tickets': a.price_f_tickets,
-        'description': a.description,
-        'emoji': '🛡️'
-    } for a in ARMORS.values()]
-    
-    consumables = [{
-        'name': c.name,
-        'hp_restore': c.hp_restore,
-        'mp_restore': c.mp_restore,
-        'price_gold': c.price_gold,
-        'price_f_tickets': c.price_f_tickets,
-        'description': c.description,
-        'emoji': c.emoji
-    } for c in CONSUMABLES.values()]
+    """ショップアイテム一覧を取得
     
-    return jsonify({
-        'success': True,
-        'weapons': weapons,
-        'armors': armors,
-        'consumables': consumables
-    })
+    ?type=weapons,armors で種類、?fields=name,price_gold で項目を絞り込める。
+    エンコード済みのレスポンスをキャッシュし、If-None-Match が一致すれば304を返す。
+    """
+    try:
+        types, fields = catalog_cache.parse(request.args.get('type'), request.args.get('fields'))
+    except CatalogRequestError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    # ブラウザはキャッシュを保持し、毎回ETagで再検証する
+    return encoded_response(catalog_cache.get(types, fields), 'no-cache')
+
+@app.route('/api/shop/recommend', methods=['GET'])
+def recommend_items():
+    """所持金・F券で買える最も強い武器・防具（?type=weapon または armor で絞り込み）"""
+    state = load_game_state()
+    if state is None:
+        return jsonify({'success': False, 'message': 'ゲームが開始されていません'})
+    
+    item_type = request.args.get('type')
+    if item_type is not None and item_type not in INDEXES:
+        return jsonify({'success': False, 'message': f'不明な種類です: {item_type}'}), 400
+    
+    player, f_ticket_system, _, _ = state.as_tuple()
+    f_ticket_value = f_ticket_system.get_current_value()
+    result = {'success': True, 'f_ticket_value': f_ticket_value}
+    for name, index in INDEXES.items():
+        if item_type is None or item_type == name:
+            result[name] = recommend(index, player.gold, player.f_tickets, f_ticket_value)
+    return jsonify(result)
+
+@app.route('/api/economy/forecast', methods=['GET'])
+def economy_forecast():
+    """現在の経済状況から ?horizon= 回（既定10回）変動した後のF券1枚の期待価値と状況の分布"""
+    state = load_game_state()
+    if state is None:
+        return jsonify({'success': False, 'message': 'ゲームが開始されていません'})
+    
+    try:
+        horizon = int(request.args.get('horizon', 10))
+    except ValueError:
+        horizon = -1
+    if not 0 <= horizon <= MAX_HORIZON:
+        return jsonify({'success': False, 'message': f'horizon は0〜{MAX_HORIZON}で指定してください'}), 400
+    
+    f_ticket_system = state.f_ticket_system
+    forecast = forecast_cache.get(f_ticket_system.current_condition, f_ticket_system.base_value, horizon)
+    return encoded_response(forecast, 'no-cache')
 
 @app.route('/api/shop/buy', methods=['POST'])
 def buy_item():
     """アイテムを購入"""
-    if 'game_state' not in session:
+    state = load_game_state()
+    if state is None:
         return jsonify({'success': False, 'message': 'ゲームが開始されていません'})
     
     data = request.json
@@ -552,18 +873,17 @@ def buy_item():
     item_name = data.get('name')
     use_f_tickets = data.get('use_f_tickets', False)
     
-    game_state = json.loads(session['game_state'])
-    player, f_ticket_system, current_area, story_progress = deserialize_game_state(game_state)
+    player, f_ticket_system, current_area, story_progress = state.as_tuple()
     
     success = False
-    if item_type == 'weapon':
-        success = player.buy_weapon(item_name, use_f_tickets)
-    elif item_type == 'armor':
-        success = player.buy_armor(item_name, use_f_tickets)
+    with METRICS.phase('game_logic'):
+        if item_type == 'weapon':
+            success = player.buy_weapon(item_name, use_f_tickets)
+        elif item_type == 'armor':
+            success = player.buy_armor(item_name, use_f_tickets)
     
     if success:
-        game_state = serialize_game_state(player, f_ticket_system, current_area, story_progress)
-        session['game_state'] = json.dumps(game_state)
+        game_state = save_game_state(player, f_ticket_system, current_area, story_progress)
         return jsonify({
             'success': True,
             'message': f'{item_name}を購入しました！',
@@ -578,7 +898,8 @@ def buy_item():
 @app.route('/api/equip', methods=['POST'])
 def equip_item():
     """アイテムを装備"""
-    if 'game_state' not in session:
+    state = load_game_state()
+    if state is None:
         return jsonify({'success': False, 'message': 'ゲームが開始されていません'})
     
     data = request.json
@@ -586,8 +907,7 @@ def equip_item():
     item_type = data.get('type')  # 'weapon' or 'armor'
     item_name = data.get('name')
     
-    game_state = json.loads(session['game_state'])
-    player, f_ticket_system, current_area, story_progress = deserialize_game_state(game_state)
+    player, f_ticket_system, current_area, story_progress = state.as_tuple()
     
     # キャラクターを探す
     character = None
@@ -600,14 +920,14 @@ def equip_item():
         return jsonify({'success': False, 'message': 'キャラクターが見つかりません'})
     
     success = False
-    if item_type == 'weapon':
-        success = player.equip_weapon_to_character(character, item_name)
-    elif item_type == 'armor':
-        success = player.equip_armor_to_character(character, item_name)
+    with METRICS.phase('game_logic'):
+        if item_type == 'weapon':
+            success = player.equip_weapon_to_character(character, item_name)
+        elif item_type == 'armor':
+            success = player.equip_armor_to_character(character, item_name)
     
     if success:
-        game_state = serialize_game_state(player, f_ticket_system, current_area, story_progress)
-        session['game_state'] = json.dumps(game_state)
+        game_state = save_game_state(player, f_ticket_system, current_area, story_progress)
         return jsonify({
             'success': True,
             'message': f'{character_name}に{item_name}を装備しました！',
@@ -616,13 +936,14 @@ def equip_item():
     else:
         return jsonify({
             'success': False,
-            'message': '装備に失敗しました（アイテムが所持品にない）'
+            'message': '装備に失敗しました（アイテムが所持品にないか、すべて装備中）'
         })
 
 @app.route('/api/shop/buy_consumable', methods=['POST'])
 def buy_consumable():
     """消費アイテムを購入"""
-    if 'game_state' not in session:
+    state = load_game_state()
+    if state is None:
         return jsonify({'success': False, 'message': 'ゲームが開始されていません'})
     
     data = request.json
@@ -630,14 +951,13 @@ def buy_consumable():
     use_f_tickets = data.get('use_f_tickets', False)
     quantity = data.get('quantity', 1)
     
-    game_state = json.loads(session['game_state'])
-    player, f_ticket_system, current_area, story_progress = deserialize_game_state(game_state)
+    player, f_ticket_system, current_area, story_progress = state.as_tuple()
     
-    success = player.buy_consumable(item_name, use_f_tickets, quantity)
+    with METRICS.phase('game_logic'):
+        success = player.buy_consumable(item_name, use_f_tickets, quantity)
     
     if success:
-        game_state = serialize_game_state(player, f_ticket_system, current_area, story_progress)
-        session['game_state'] = json.dumps(game_state)
+        game_state = save_game_state(player, f_ticket_system, current_area, story_progress)
         return jsonify({
             'success': True,
             'message': f'{item_name}を{quantity}個購入しました！',
@@ -652,15 +972,15 @@ def buy_consumable():
 @app.route('/api/use_consumable', methods=['POST'])
 def use_consumable():
     """消費アイテムを使用"""
-    if 'game_state' not in session:
+    state = load_game_state()
+    if state is None:
         return jsonify({'success': False, 'message': 'ゲームが開始されていません'})
     
     data = request.json
     character_name = data.get('character_name')
     item_name = data.get('name')
     
-    game_state = json.loads(session['game_state'])
-    player, f_ticket_system, current_area, story_progress = deserialize_game_state(game_state)
+    player, f_ticket_system, current_area, story_progress = state.as_tuple()
     
     # キャラクターを探す
     character = None
@@ -672,11 +992,11 @@ def use_consumable():
     if not character:
         return jsonify({'success': False, 'message': 'キャラクターが見つかりません'})
     
-    success = player.use_consumable(character, item_name)
+    with METRICS.phase('game_logic'):
+        success = player.use_consumable(character, item_name)
     
     if success:
-        game_state = serialize_game_state(player, f_ticket_system, current_area, story_progress)
-        session['game_state'] = json.dumps(game_state)
+        game_state = save_game_state(player, f_ticket_system, current_area, story_progress)
         return jsonify({
             'success': True,
             'message': f'{character_name}は{item_name}を使用しました！',
@@ -688,14 +1008,87 @@ def use_consumable():
             'message': 'アイテムの使用に失敗しました（所持していない、またはHP/MPが満タン）'
         })
 
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """サーバープッシュ（Server-Sent Events）
+
+    battle_log / enemy_turn / battle_end / economy / resync イベントを配信する。
+    """
+    if not EVENTS_ENABLED:
+        return jsonify({'success': False, 'message': 'サーバープッシュは無効です'}), 404
+    sid = session.get('sid')
+    if sid is None:
+        return jsonify({'success': False, 'message': 'ゲームが開始されていません'}), 401
+    
+    subscription = event_bus.subscribe(sid)
+    if subscription is None:
+        return jsonify({'success': False, 'message': '接続数が上限に達しています'}), 503, {'Retry-After': '10'}
+    
+    return Response(
+        event_bus.stream(subscription, EVENT_HEARTBEAT),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/metrics', methods=['GET'])
+def export_metrics():
+    """リクエストのメトリクス（Prometheus のテキスト形式。このプロセスの分）"""
+    if not METRICS.enabled:
+        return jsonify({'success': False, 'message': 'メトリクスは無効です'}), 404
+    return Response(METRICS.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def _admin_authorized() -> bool:
+    token = request.headers.get('X-Admin-Token', '')
+    return ADMIN_TOKEN is not None and secrets.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+@app.route('/api/admin/profiler', methods=['GET', 'POST'])
+def admin_profiler():
+    """プロファイラーの設定と保存済みのプロファイルの一覧
+    
+    POST で {"sample_rate": 0.1, "threshold": 0.2} のように設定を変える（全ワーカーに反映）。
+    {"reset": true} で環境変数の設定に戻す。
+    """
+    if not _admin_authorized():
+        return jsonify({'success': False, 'message': 'Not Found'}), 404
+    
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        if data.get('reset'):
+            profiler.reset()
+        else:
+            try:
+                sample_rate = None if data.get('sample_rate') is None else float(data['sample_rate'])
+                threshold = None if data.get('threshold') is None else float(data['threshold'])
+            except (TypeError, ValueError):
+                sample_rate = threshold = -1.0
+            if (sample_rate is not None and not 0 <= sample_rate <= 1) or (threshold is not None and threshold < 0):
+                return jsonify({'success': False,
+                                'message': 'sample_rate は0〜1、threshold は0以上（秒）で指定してください'}), 400
+            profiler.configure(sample_rate, threshold)
+    
+    profiler.reload()
+    return jsonify({'success': True, 'settings': profiler.settings(), 'profiles': profiler.profiles()})
+
+@app.route('/api/admin/profiler/<profile_id>.<kind>', methods=['GET'])
+def download_profile(profile_id, kind):
+    """保存済みのプロファイル（kind は pstats または collapsed）"""
+    if not _admin_authorized():
+        return jsonify({'success': False, 'message': 'Not Found'}), 404
+    path = profiler.path(profile_id, kind)
+    if path is None:
+        return jsonify({'success': False,
+                        'message': f"プロファイルが見つかりません（種類は {', '.join(PROFILE_KINDS)}）"}), 404
+    return send_file(path, as_attachment=True, download_name=os.path.basename(path),
+                     mimetype='application/octet-stream' if kind == 'pstats' else 'text/plain')
+
 @app.route('/api/financial_knowledge', methods=['GET'])
 def get_financial_knowledge():
     """金融知識を取得"""
-    if 'game_state' not in session:
+    state = load_game_state()
+    if state is None:
         return jsonify({'success': False, 'message': 'ゲームが開始されていません'})
     
-    game_state = json.loads(session['game_state'])
-    _, f_ticket_system, _, _ = deserialize_game_state(game_state)
+    f_ticket_system = state.f_ticket_system
     
     return jsonify({
         'success': True,
@@ -737,7 +1130,9 @@ if __name__ == '__main__':
     print(f"{'='*60}\n")
     
     try:
-        app.run(debug=True, host='0.0.0.0', port=port, use_reloader=False)
+        # 開発用サーバー（本番は server.py の複数プロセスサーバーを使う）
+        app.run(debug=os.environ.get('FINANCIAL_RPG_DEBUG', '1') == '1', host='0.0.0.0', port=port,
+                use_reloader=False)
     except Exception as e:
         print(f"\nエラーが発生しました: {e}")
         print("別のポートを試してください。")
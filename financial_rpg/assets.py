@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+静的ファイル（game.js, style.css）の配信パイプライン
+
+起動時に static/ 以下のファイルを読み込み、内容のハッシュ入りのファイル名
+（css/style.3f2a9c1b7d4e.css）とgzip圧縮版（brotli パッケージがあればbrotli版も）を作る。
+ハッシュ入りの名前は内容が変わると変わるので、長期間キャッシュさせてよい（immutable）。
+index.html の参照は asset_url() で書き換える。
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:  # 任意の依存（無ければgzipのみ）
+    brotli = None
+
+# 圧縮する拡張子（画像などは圧縮しない）
+COMPRESSIBLE = ('.js', '.css', '.html', '.json', '.svg', '.txt')
+
+# Accept-Encoding で選ぶ順（先にあるものを優先）
+ENCODINGS = ('br', 'gzip')
+
+
+class EncodedBody:
+    """1つの内容と、その圧縮済みの版"""
+
+    __slots__ = ('mimetype', 'etag', 'variants')
+
+    def __init__(self, data: bytes, mimetype: str, compress: bool = True):
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(data).hexdigest()[:32]
+        self.variants = {None: data}  # Content-Encoding: 本文
+        if compress:
+            self.variants['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(data)
+            # 圧縮しても小さくならない版は使わない
+            for encoding in [e for e in self.variants if e is not None]:
+                if len(self.variants[encoding]) >= len(data):
+                    del self.variants[encoding]
+
+    def select(self, accept_encodings):
+        """Accept-Encoding（werkzeug の Accept）から (encoding, 本文, ETag) を選ぶ"""
+        for encoding in ENCODINGS:
+            if encoding in self.variants and encoding in accept_encodings:
+                # 強いETagは表現ごとに異なる必要がある
+                return encoding, self.variants[encoding], f"{self.etag}-{encoding}"
+        return None, self.variants[None], self.etag
+
+
+class AssetPipeline:
+    """static/ 以下のファイルのハッシュ入りの名前と圧縮済みの版を保持する"""
+
+    def __init__(self, static_dir: str, extensions=('.js', '.css')):
+        self.static_dir = static_dir
+        self.extensions = extensions
+        self._lock = threading.Lock()
+        self._mtimes = {}
+        self.urls = {}     # 元のパス: ハッシュ入りのパス
+        self.assets = {}   # ハッシュ入りのパス: EncodedBody
+        self.build()
+
+    def _scan(self) -> dict:
+        """対象ファイルの {static_dir からの相対パス: 更新時刻}"""
+        mtimes = {}
+        for root, _, files in os.walk(self.static_dir):
+            for name in files:
+                if name.endswith(self.extensions):
+                    path = os.path.join(root, name)
+                    mtimes[os.path.relpath(path, self.static_dir).replace(os.sep, '/')] = os.path.getmtime(path)
+        return mtimes
+
+    def build(self):
+        """全ファイルを読み込み直してハッシュ・圧縮を作る"""
+        mtimes = self._scan()
+        urls, assets = {}, {}
+        for path in sorted(mtimes):
+            with open(os.path.join(self.static_dir, path), 'rb') as f:
+                data = f.read()
+            stem, ext = os.path.splitext(path)
+            mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            if mimetype.startswith('text/') or mimetype.endswith('javascript'):
+                mimetype += '; charset=utf-8'
+            body = EncodedBody(data, mimetype, compress=ext in COMPRESSIBLE)
+            hashed = f"{stem}.{body.etag[:12]}{ext}"
+            urls[path] = hashed
+            assets[hashed] = body
+        with self._lock:
+            self._mtimes, self.urls, self.assets = mtimes, urls, assets
+
+    def reload_if_changed(self) -> bool:
+        """ファイルが変わっていれば作り直す（開発用。変わったらTrue）"""
+        if self._scan() == self._mtimes:
+            return False
+        self.build()
+        return True
+
+    def url(self, path: str):
+        """元のパスに対応するハッシュ入りのパス（対象外ならNone）"""
+        return self.urls.get(path)
+
+    def get(self, hashed_path: str):
+        return self.assets.get(hashed_path)
@@ -5,21 +5,95 @@
 """
 
 from party import Party
+from battle_log import BattleEvent, BattleLog
 from character import Character
-from monster import Monster
+from monster import Monster, get_character_emoji
+from replay import BattleReplay, new_seed
 import random
 import json
 
+class AutoPolicy:
+    """自動戦闘での行動方針
+    
+    HPが heal_threshold（最大HPに対する割合）未満なら使える中で最も回復量の多い魔法、
+    そうでなければ最も威力の高い攻撃魔法、MPが足りなければ通常攻撃を選ぶ。
+    対象はHPが最も低い敵。use_spells=False なら常に通常攻撃。
+    """
+    
+    NAMES = ('smart', 'attack')
+    
+    def __init__(self, heal_threshold: float = 0.3, use_spells: bool = True):
+        self.heal_threshold = heal_threshold
+        self.use_spells = use_spells
+    
+    @classmethod
+    def from_name(cls, name: str = 'smart', heal_threshold: float = 0.3) -> 'AutoPolicy':
+        """名前から方針を生成（'smart' / 'attack'）"""
+        if name not in cls.NAMES:
+            raise ValueError(f"Unknown auto-battle policy: {name}")
+        return cls(heal_threshold, use_spells=(name == 'smart'))
+    
+    def choose(self, actor: Character, alive_enemies: list) -> dict:
+        """1人分の行動（Battle.player_turn の形式）"""
+        target_index = min(range(len(alive_enemies)), key=lambda i: alive_enemies[i].hp)
+        if self.use_spells:
+            affordable = [(name, spell) for name, spell in actor.SPELLS.items() if spell['mp_cost'] <= actor.mp]
+            if actor.hp < actor.max_hp * self.heal_threshold:
+                heals = [(spell['heal_amount'], name) for name, spell in affordable if 'heal_amount' in spell]
+                if heals:
+                    return {'action_type': 'spell', 'spell_name': max(heals)[1]}
+            attacks = [(spell['damage_multiplier'], name) for name, spell in affordable if 'damage_multiplier' in spell]
+            if attacks:
+                return {'action_type': 'spell', 'spell_name': max(attacks)[1], 'target_index': target_index}
+        return {'action_type': 'attack', 'target_index': target_index}
+
+
+def _restore_battle(data: bytes) -> 'Battle':
+    """リプレイとして pickle された戦闘を復元する（以前の形式のスナップショット・SQLiteの行の読み込み用）"""
+    return BattleReplay.decode(data).replay()
+
+
 class Battle:
-    """戦闘クラス"""
+    """戦闘クラス
+    
+    乱数は戦闘ごとの self.rng（シードは self.seed）だけを使うので、開始時の状態・シード・行動が
+    同じなら同じ戦闘になる。record=True なら行動を self.replay に記録する（app.py の戦闘。
+    シミュレーターなどの記録しない戦闘はパーティのエンコードを省く）。
+    """
     
-    def __init__(self, player_party: Party, enemy_party: Party):
+    def __init__(self, player_party: Party, enemy_party: Party, seed: int = None,
+                 battle_id: str = None, record: bool = False):
         self.player_party = player_party
         self.enemy_party = enemy_party
         self.turn = 0
         self.current_character_index = 0
-        self.battle_log = []
+        self.log = BattleLog(battle_id)
         self.is_player_turn = True
+        self.seed = new_seed() if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.replay = BattleReplay.record(self) if record else None
+    
+    def __setstate__(self, state):
+        # 進行中の戦闘は状態をそのまま pickle する（読み込みのたびにリプレイを再生しない）
+        if 'rng' in state:
+            self.__dict__.update(state)
+            return
+        # リプレイを導入する前に保存された戦闘を読む
+        lines = state.pop('battle_log', None)
+        self.__dict__.update(state)
+        if lines is not None:
+            # 構造化前の戦闘ログ（文字列のリスト）
+            self.log = BattleLog()
+            for line in lines:
+                self.log.append(BattleEvent('text', self.turn, text=line))
+            self.log.drain()
+        self.seed = new_seed()
+        self.rng = random.Random(self.seed)
+        self.replay = BattleReplay.record(self)
+    
+    def _record(self, kind: str, **fields) -> BattleEvent:
+        """戦闘ログにイベントを追加"""
+        return self.log.append(BattleEvent(kind, self.turn, **fields))
     
     def execute_battle(self, silent=False) -> dict:
         """戦闘を実行して結果を返す（自動戦闘用）"""
@@ -28,12 +102,10 @@ class Battle:
             print("戦闘開始！")
             print("=" * 60)
         
-        turn = 0
-        
         while not self.player_party.is_all_dead() and not self.enemy_party.is_all_dead():
-            turn += 1
+            self.turn += 1
             if not silent:
-                print(f"\n--- ターン {turn} ---\n")
+                print(f"\n--- ターン {self.turn} ---\n")
             
             # プレイヤー側の行動
             self._player_turn(silent)
@@ -61,20 +133,13 @@ class Battle:
             'current_character_index': self.current_character_index,
             'player_party': [self._serialize_character(c) for c in self.player_party.members],
             'enemy_party': [self._serialize_character(c) for c in self.enemy_party.members],
-            'battle_log': self.battle_log[-10:],  # 最後の10件
+            'battle_id': self.log.battle_id,
+            'battle_log': self.log.messages(),  # 最後の10件
             'is_battle_over': self.player_party.is_all_dead() or self.enemy_party.is_all_dead()
         }
     
     def _serialize_character(self, char):
         """キャラクターをシリアライズ"""
-        from monster import MONSTER_TEMPLATES
-        emoji = '👤'
-        if isinstance(char, Monster):
-            for template_name, template in MONSTER_TEMPLATES.items():
-                if template['name'] == char.name:
-                    emoji = template.get('emoji', '👤')
-                    break
-        
         return {
             'name': char.name,
             'character_type': char.character_type.value,
@@ -83,7 +148,8 @@ class Battle:
             'mp': char.mp,
             'max_mp': char.max_mp,
             'level': char.level,
-            'emoji': emoji,
+            'emoji': get_character_emoji(char),
+            'template_id': char.template_id if isinstance(char, Monster) else None,
             'is_alive': char.is_alive()
         }
     
@@ -98,14 +164,141 @@ class Battle:
         if not alive_enemies and action_type != 'item':
             return {'success': False, 'message': '敵が全滅しています'}
         
+        if action_type == 'item':
+            # アイテム使用は別のAPIで処理
+            return {'success': False, 'message': 'アイテムは別のAPIを使用してください'}
+        
+        if action_type == 'spell' and spell_name is None:
+            return {'success': False, 'message': '魔法名が指定されていません'}
+        
         # 現在のキャラクターを取得
         current_char = alive_players[self.current_character_index % len(alive_players)]
         
+        # 不明な行動・魔法・対象は実行も記録もしない（player_turn と同じ検証）
+        error = self._validate_action(current_char, {'action_type': action_type, 'target_index': target_index,
+                                                     'spell_name': spell_name}, len(alive_enemies))
+        if error:
+            return {'success': False, 'message': error}
+        
+        result = self._execute_action(current_char, action_type, target_index, spell_name)
+        if not result['success']:
+            return result
+        if self.replay is not None:
+            self.replay.record_action(action_type, target_index, spell_name)
+        
+        # 次のキャラクターに移る
+        self.current_character_index += 1
+        
+        # 全員行動したら敵のターン
+        if self.current_character_index >= len(alive_players):
+            result['enemy_actions'] = self._run_enemy_turn()
+        
+        return result
+    
+    def player_turn(self, actions: list) -> dict:
+        """まだ行動していない生存メンバー全員の行動をまとめて実行し、敵のターンまで進める
+        
+        actions は行動順に {'action_type', 'target_index', 'spell_name'} を並べたもの。
+        すべての行動を先に検証し、1つでも不正なら何も実行しない。
+        """
+        alive_players = self.player_party.get_alive_members()
+        alive_enemies = self.enemy_party.get_alive_members()
+        
+        if not alive_players:
+            return {'success': False, 'message': '全滅しています'}
+        if not alive_enemies:
+            return {'success': False, 'message': '敵が全滅しています'}
+        
+        actors = alive_players[self.current_character_index % len(alive_players):]
+        if not isinstance(actions, list) or len(actions) != len(actors):
+            return {'success': False, 'message': f'{len(actors)}人分の行動を指定してください'}
+        
+        for i, (actor, action) in enumerate(zip(actors, actions)):
+            error = self._validate_action(actor, action, len(alive_enemies))
+            if error:
+                return {'success': False, 'message': f'{i + 1}番目の行動（{actor.name}）: {error}', 'index': i}
+        if self.replay is not None:
+            self.replay.record_turn(actions)
+        
+        log_start = self.log.count
+        results = []
+        for actor, action in zip(actors, actions):
+            if self.enemy_party.is_all_dead():
+                break
+            results.append(self._execute_action(actor, action['action_type'],
+                                                action.get('target_index'), action.get('spell_name')))
+        
+        enemy_actions = []
+        if self.enemy_party.is_all_dead():
+            self.current_character_index = 0
+        else:
+            enemy_actions = self._run_enemy_turn()
+        
+        return {
+            'success': True,
+            'actions': results,
+            'enemy_actions': enemy_actions,
+            'log': self.log.messages(log_start),
+            'message': ' '.join(result['message'] for result in results)
+        }
+    
+    def auto_resolve(self, policy: AutoPolicy, max_turns: int = 1000) -> dict:
+        """方針に従って戦闘が終わるまで player_turn を繰り返す（Web版の自動戦闘用）"""
+        log_start = self.log.count
+        # リプレイには方針だけを記録する（途中の player_turn は記録しない）
+        replay, self.replay = self.replay, None
+        if replay is not None:
+            replay.record_auto(policy, max_turns)
+        turns = 0
+        try:
+            while turns < max_turns:
+                alive_players = self.player_party.get_alive_members()
+                alive_enemies = self.enemy_party.get_alive_members()
+                if not alive_players or not alive_enemies:
+                    break
+                actors = alive_players[self.current_character_index % len(alive_players):]
+                result = self.player_turn([policy.choose(actor, alive_enemies) for actor in actors])
+                if not result['success']:
+                    return result
+                turns += 1
+        finally:
+            self.replay = replay
+        
+        return {
+            'success': True,
+            'turns': turns,
+            'log': self.log.messages(log_start),
+            'message': f'{turns}ターンの自動戦闘を行った'
+        }
+    
+    def _validate_action(self, actor: Character, action, num_enemies: int):
+        """player_action / player_turn の1行動を検証し、不正ならエラーメッセージを返す"""
+        if not isinstance(action, dict):
+            return '行動の形式が不正です'
+        action_type = action.get('action_type')
+        if action_type not in ('attack', 'spell', 'defend'):
+            return f'不明な行動です: {action_type}'
+        target_index = action.get('target_index')
+        if target_index is not None and (not isinstance(target_index, int) or isinstance(target_index, bool)
+                                         or not 0 <= target_index < num_enemies):
+            return '対象の指定が不正です'
+        if action_type == 'spell':
+            spell = actor.SPELLS.get(action.get('spell_name'))
+            if spell is None:
+                return '未知の魔法です'
+            if actor.mp < spell['mp_cost']:
+                return 'MPが足りません'
+        return None
+    
+    def _execute_action(self, current_char: Character, action_type: str,
+                        target_index: int = None, spell_name: str = None) -> dict:
+        """1人分の行動（attack / spell / defend）を実行"""
+        alive_enemies = self.enemy_party.get_alive_members()
         result = {'success': True, 'action_type': action_type, 'character': current_char.name}
         
         if action_type == 'attack':
             if target_index is None or target_index >= len(alive_enemies):
-                target = random.choice(alive_enemies)
+                target = self.rng.choice(alive_enemies)
             else:
                 target = alive_enemies[target_index]
             
@@ -113,17 +306,13 @@ class Battle:
             actual_damage = target.take_damage(damage)
             result['target'] = target.name
             result['damage'] = actual_damage
-            result['message'] = f'{current_char.name}は{target.name}に{actual_damage}のダメージを与えた！'
-            self.battle_log.append(result['message'])
+            result['message'] = self._record('attack', actor=current_char.name, target=target.name,
+                                             damage=actual_damage).message
             
             if not target.is_alive():
-                result['message'] += f' {target.name}を倒した！'
-                self.battle_log.append(f'{target.name}を倒した！')
+                result['message'] += ' ' + self._record('defeat', actor=current_char.name, target=target.name).message
         
         elif action_type == 'spell':
-            if spell_name is None:
-                return {'success': False, 'message': '魔法名が指定されていません'}
-            
             spell_result = current_char.use_spell(spell_name)
             if not spell_result['success']:
                 return spell_result
@@ -131,7 +320,7 @@ class Battle:
             if 'damage' in spell_result:
                 # 攻撃魔法
                 if target_index is None or target_index >= len(alive_enemies):
-                    target = random.choice(alive_enemies)
+                    target = self.rng.choice(alive_enemies)
                 else:
                     target = alive_enemies[target_index]
                 
@@ -139,40 +328,39 @@ class Battle:
                 actual_damage = target.take_damage(damage)
                 result['target'] = target.name
                 result['damage'] = actual_damage
-                result['message'] = f'{current_char.name}は{spell_name}を唱えた！{target.name}に{actual_damage}のダメージ！'
-                self.battle_log.append(result['message'])
+                result['message'] = self._record('spell', actor=current_char.name, target=target.name,
+                                                 damage=actual_damage, spell=spell_name).message
                 
                 if not target.is_alive():
-                    result['message'] += f' {target.name}を倒した！'
-                    self.battle_log.append(f'{target.name}を倒した！')
+                    result['message'] += ' ' + self._record('defeat', actor=current_char.name,
+                                                            target=target.name).message
             elif 'heal_amount' in spell_result:
                 # 回復魔法
                 result['heal_amount'] = spell_result['heal_amount']
-                result['message'] = f'{current_char.name}は{spell_name}を唱えた！HPが{spell_result["heal_amount"]}回復した！'
-                self.battle_log.append(result['message'])
-        
-        elif action_type == 'item':
-            # アイテム使用は別のAPIで処理
-            return {'success': False, 'message': 'アイテムは別のAPIを使用してください'}
+                result['message'] = self._record('heal', actor=current_char.name, spell=spell_name,
+                                                 amount=spell_result['heal_amount']).message
         
         elif action_type == 'defend':
             current_char.defend()
-            result['message'] = f'{current_char.name}は身構えた！'
-            self.battle_log.append(result['message'])
-        
-        # 次のキャラクターに移る
-        self.current_character_index += 1
-        
-        # 全員行動したら敵のターン
-        if self.current_character_index >= len(alive_players):
-            self.current_character_index = 0
-            self.is_player_turn = False
-            # 敵の行動を自動実行
-            self._enemy_turn(silent=True)
-            self.is_player_turn = True
+            result['message'] = self._record('defend', actor=current_char.name).message
         
         return result
     
+    def _run_enemy_turn(self) -> list:
+        """ターンを進めて敵の行動を自動実行し、行動結果を返す"""
+        self.current_character_index = 0
+        self.turn += 1
+        self.is_player_turn = False
+        enemy_actions = []
+        self._enemy_turn(silent=True, results=enemy_actions)
+        for action in enemy_actions:
+            # プレイヤーの行動と同じターンとして記録する
+            self.log.append(BattleEvent('enemy_attack', self.turn - 1, actor=action['enemy'],
+                                        target=action['target'], damage=action['damage'],
+                                        defeated=action['defeated']))
+        self.is_player_turn = True
+        return enemy_actions
+    
     def _player_turn(self, silent=False):
         """プレイヤー側のターン"""
         alive_players = self.player_party.get_alive_members()
@@ -189,7 +377,7 @@ class Battle:
                 print(f"\n{player.name}のターン")
             
             # 行動選択（簡易版：自動で攻撃）
-            target = random.choice(alive_enemies)
+            target = self.rng.choice(alive_enemies)
             damage = player.calculate_damage()
             actual_damage = target.take_damage(damage)
             
@@ -203,8 +391,8 @@ class Battle:
                 if not alive_enemies:
                     break
     
-    def _enemy_turn(self, silent=False):
-        """敵側のターン"""
+    def _enemy_turn(self, silent=False, results=None):
+        """敵側のターン（results にリストを渡すと行動結果を追加する）"""
         alive_players = self.player_party.get_alive_members()
         alive_enemies = self.enemy_party.get_alive_members()
         
@@ -215,7 +403,7 @@ class Battle:
             if not enemy.is_alive():
                 continue
             
-            target = random.choice(alive_players)
+            target = self.rng.choice(alive_players)
             damage = enemy.calculate_damage()
             actual_damage = target.take_damage(damage)
             
@@ -225,6 +413,19 @@ class Battle:
             if not target.is_alive():
                 if not silent:
                     print(f"{target.name}は倒れた...")
+            
+            if results is not None:
+                message = f"{enemy.name}は{target.name}に{actual_damage}のダメージを与えた！"
+                if not target.is_alive():
+                    message += f" {target.name}は倒れた..."
+                results.append({
+                    'enemy': enemy.name,
+                    'target': target.name,
+                    'damage': actual_damage,
+                    'target_hp': target.hp,
+                    'defeated': not target.is_alive(),
+                    'message': message
+                })
     
     def _show_status(self):
         """状態を表示"""
@@ -246,7 +447,8 @@ class Battle:
             return {
                 'victory': False,
                 'recruited_monsters': [],
-                'rewards': {'gold': 0, 'f_tickets': 0}
+                'rewards': {'gold': 0, 'f_tickets': 0},
+                'turns': self.turn
             }
         
         # 勝利
@@ -267,7 +469,7 @@ class Battle:
                 total_f_tickets += rewards['f_tickets']
                 
                 # 仲間化判定
-                if enemy.try_recruitment():
+                if enemy.try_recruitment(self.rng):
                     recruited_monsters.append(enemy)
                     if not silent:
                         print(f"{enemy.name}が仲間になった！")
@@ -281,6 +483,7 @@ class Battle:
             'rewards': {
                 'gold': total_gold,
                 'f_tickets': total_f_tickets
-            }
+            },
+            'turns': self.turn
         }
 
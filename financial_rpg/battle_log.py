@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+戦闘ログ
+
+戦闘中の出来事を構造化したイベント（BattleEvent）として記録する。
+Battle が持つのは直近のイベントのリングバッファ（画面表示用）と、まだ保存していない
+イベントだけなので、長い戦闘でもメモリは増えない。
+
+保存済みのイベントは BattleLogStore がセッション・戦闘ごとのディレクトリに
+追記専用のセグメントファイル（JSON Lines）で保持する。セグメントは一定件数で
+切り替えるので、何件目からでも該当するセグメントだけを読めばよい。
+終了した戦闘は同じディレクトリにリプレイ（replay.py）も保存する。
+"""
+
+import hashlib
+import json
+import os
+import re
+import secrets
+import shutil
+import time
+from collections import deque
+
+# 画面に表示する直近のイベント数
+RECENT_EVENTS = 10
+
+# 終了した戦闘のリプレイのファイル名（戦闘のディレクトリ内）
+REPLAY_FILE = 'replay.bin'
+
+
+class BattleEvent:
+    """戦闘中の1つの出来事
+
+    kind:
+        attack       通常攻撃（actor → target に damage）
+        spell        攻撃魔法（actor が spell で target に damage）
+        heal         回復魔法（actor が spell で amount 回復）
+        defend       防御
+        defeat       target を倒した（プレイヤー側の攻撃による）
+        enemy_attack 敵の攻撃（defeated なら target は倒れた）
+        text         構造化される前の形式のログ（text に文言）
+    """
+
+    __slots__ = ('seq', 'turn', 'kind', 'actor', 'target', 'damage', 'spell', 'amount', 'defeated', 'text')
+
+    FIELDS = __slots__
+
+    def __init__(self, kind: str, turn: int = 0, actor: str = None, target: str = None, damage: int = None,
+                 spell: str = None, amount: int = None, defeated: bool = False, text: str = None, seq: int = None):
+        self.seq = seq
+        self.turn = turn
+        self.kind = kind
+        self.actor = actor
+        self.target = target
+        self.damage = damage
+        self.spell = spell
+        self.amount = amount
+        self.defeated = defeated
+        self.text = text
+
+    @property
+    def message(self) -> str:
+        """画面表示用の文言"""
+        if self.kind == 'attack':
+            return f'{self.actor}は{self.target}に{self.damage}のダメージを与えた！'
+        if self.kind == 'spell':
+            return f'{self.actor}は{self.spell}を唱えた！{self.target}に{self.damage}のダメージ！'
+        if self.kind == 'heal':
+            return f'{self.actor}は{self.spell}を唱えた！HPが{self.amount}回復した！'
+        if self.kind == 'defend':
+            return f'{self.actor}は身構えた！'
+        if self.kind == 'defeat':
+            return f'{self.target}を倒した！'
+        if self.kind == 'enemy_attack':
+            message = f'{self.actor}は{self.target}に{self.damage}のダメージを与えた！'
+            return message + f' {self.target}は倒れた...' if self.defeated else message
+        return self.text or ''
+
+    def to_dict(self) -> dict:
+        """値のある項目だけの辞書（保存・APIのレスポンス用）"""
+        return {name: value for name in self.FIELDS
+                if (value := getattr(self, name)) is not None and value is not False}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'BattleEvent':
+        return cls(**{name: data[name] for name in cls.FIELDS if name in data})
+
+
+class BattleLog:
+    """1つの戦闘のログ（直近のイベントと、保存待ちのイベント）
+
+    pending は呼び出し側（app.py）がリクエストごとに drain して BattleLogStore に保存する。
+    """
+
+    __slots__ = ('battle_id', 'count', 'recent', 'pending')
+
+    def __init__(self, battle_id: str = None, recent_events: int = RECENT_EVENTS):
+        self.battle_id = battle_id or secrets.token_hex(8)
+        self.count = 0  # これまでのイベント数（次のイベントの seq）
+        self.recent = deque(maxlen=recent_events)
+        self.pending = []
+
+    def append(self, event: BattleEvent) -> BattleEvent:
+        event.seq = self.count
+        self.count += 1
+        self.recent.append(event)
+        self.pending.append(event)
+        return event
+
+    def since(self, seq: int) -> list:
+        """seq 番目以降の保存待ちのイベント"""
+        first = self.count - len(self.pending)
+        return self.pending[max(0, seq - first):]
+
+    def messages(self, seq: int = None) -> list:
+        """seq 番目以降の保存待ちのイベントの文言（None なら直近のイベントの文言）"""
+        events = self.recent if seq is None else self.since(seq)
+        return [event.message for event in events]
+
+    def drain(self) -> list:
+        """保存待ちのイベントを取り出す"""
+        events, self.pending = self.pending, []
+        return events
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+_BATTLE_ID = re.compile(r'^[0-9a-f]{16}$')
+_SESSION_DIR = re.compile(r'^[0-9a-f]{32}$')
+
+
+class BattleLogStore:
+    """戦闘ログを <directory>/<セッションのハッシュ>/<戦闘ID>/<セグメント番号>.jsonl に保存する
+
+    セグメント k には seq が k * segment_events 〜 (k + 1) * segment_events - 1 のイベントが入る。
+    セッションごとに新しい順に keep_battles 個の戦闘を残し、古いものは削除する。
+    max_age を指定すると、最後の追記から max_age 秒たったセッションのディレクトリを
+    まとめて削除する（新しい戦闘の開始時に、purge_interval 秒に1回まで）。
+    """
+
+    def __init__(self, directory: str, segment_events: int = 1000, keep_battles: int = 20,
+                 max_age: float = None, purge_interval: float = 600.0):
+        self.directory = directory
+        self.segment_events = segment_events
+        self.keep_battles = keep_battles
+        self.max_age = max_age
+        self.purge_interval = purge_interval
+        self._last_purge = None
+
+    def _session_dir(self, sid: str) -> str:
+        # セッションIDは秘密なのでそのままファイル名にしない
+        return os.path.join(self.directory, hashlib.sha256(sid.encode('utf-8')).hexdigest()[:32])
+
+    def _battle_dir(self, sid: str, battle_id: str):
+        if not _BATTLE_ID.match(battle_id or ''):
+            return None
+        return os.path.join(self._session_dir(sid), battle_id)
+
+    def _segment_path(self, battle_dir: str, segment: int) -> str:
+        return os.path.join(battle_dir, f'{segment:06d}.jsonl')
+
+    def append(self, sid: str, battle_id: str, events: list):
+        """イベントを追記する（新しい戦闘なら古い戦闘を整理する）"""
+        if not events:
+            return
+        battle_dir = self._battle_dir(sid, battle_id)
+        if not os.path.isdir(battle_dir):
+            os.makedirs(battle_dir, exist_ok=True)
+            self._prune(sid)
+            self._maybe_purge()
+        segment, lines = None, []
+        for event in events:
+            event_segment = event.seq // self.segment_events
+            if event_segment != segment and lines:
+                self._write(battle_dir, segment, lines)
+                lines = []
+            segment = event_segment
+            lines.append(json.dumps(event.to_dict(), ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._write(battle_dir, segment, lines)
+        os.utime(self._session_dir(sid))  # セッションの最終追記時刻（purge_expired が使う）
+
+    def save_replay(self, sid: str, battle_id: str, data: bytes):
+        """終了した戦闘のリプレイ（replay.BattleReplay.encode の結果）を保存する"""
+        battle_dir = self._battle_dir(sid, battle_id)
+        os.makedirs(battle_dir, exist_ok=True)
+        temp_path = os.path.join(battle_dir, REPLAY_FILE + '.tmp')
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, os.path.join(battle_dir, REPLAY_FILE))
+
+    def _write(self, battle_dir: str, segment: int, lines: list):
+        with open(self._segment_path(battle_dir, segment), 'a', encoding='utf-8') as f:
+            f.write(''.join(lines))
+
+    def _prune(self, sid: str):
+        battles = self._battles(sid)
+        for battle_id, _ in battles[self.keep_battles:]:
+            shutil.rmtree(os.path.join(self._session_dir(sid), battle_id), ignore_errors=True)
+
+    def purge_expired(self) -> int:
+        """最後の追記から max_age 秒たったセッションのログを削除し、削除したセッション数を返す"""
+        if self.max_age is None:
+            return 0
+        cutoff = time.time() - self.max_age
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        removed = 0
+        for name in names:
+            if not _SESSION_DIR.match(name):
+                continue
+            session_dir = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(session_dir) > cutoff:
+                    continue
+            except OSError:
+                continue  # 別のプロセスが削除した
+            shutil.rmtree(session_dir, ignore_errors=True)
+            removed += 1
+        return removed
+
+    def _maybe_purge(self):
+        now = time.monotonic()
+        if self._last_purge is not None and now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        self.purge_expired()
+
+    def _battles(self, sid: str) -> list:
+        """[(戦闘ID, 更新時刻), ...]（新しい順）"""
+        session_dir = self._session_dir(sid)
+        try:
+            names = os.listdir(session_dir)
+        except FileNotFoundError:
+            return []
+        battles = []
+        for name in names:
+            try:
+                battles.append((name, os.path.getmtime(os.path.join(session_dir, name))))
+            except OSError:
+                continue  # 別のプロセスが削除した
+        return sorted(battles, key=lambda battle: battle[1], reverse=True)
+
+    def _segments(self, battle_dir: str) -> list:
+        return sorted(int(name[:-6]) for name in os.listdir(battle_dir) if name.endswith('.jsonl'))
+
+    def count(self, sid: str, battle_id: str):
+        """保存済みのイベント数（戦闘が無ければNone）"""
+        battle_dir = self._battle_dir(sid, battle_id)
+        if battle_dir is None or not os.path.isdir(battle_dir):
+            return None
+        segments = self._segments(battle_dir)
+        if not segments:
+            return 0
+        with open(self._segment_path(battle_dir, segments[-1]), 'rb') as f:
+            return segments[-1] * self.segment_events + sum(1 for _ in f)
+
+    def battles(self, sid: str) -> list:
+        """セッションの保存済みの戦闘（新しい順）"""
+        return [{'battle_id': battle_id, 'events': self.count(sid, battle_id), 'updated_at': mtime}
+                for battle_id, mtime in self._battles(sid)]
+
+    def read(self, sid: str, battle_id: str, offset: int = 0, limit: int = 100):
+        """offset 番目から最大 limit 件のイベント（戦闘が無ければNone）"""
+        battle_dir = self._battle_dir(sid, battle_id)
+        if battle_dir is None or not os.path.isdir(battle_dir):
+            return None
+        events = []
+        segment = offset // self.segment_events
+        skip = offset - segment * self.segment_events
+        while len(events) < limit:
+            path = self._segment_path(battle_dir, segment)
+            if not os.path.exists(path):
+                break
+            with open(path, encoding='utf-8') as f:
+                for i, line in enumerate(f):
+                    if i < skip:
+                        continue
+                    events.append(BattleEvent.from_dict(json.loads(line)))
+                    if len(events) >= limit:
+                        break
+            segment, skip = segment + 1, 0
+        return events
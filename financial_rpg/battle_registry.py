@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+進行中の戦闘を保持するレジストリ
+"""
+
+import os
+import pickle
+import threading
+import time
+
+from metrics import METRICS
+from state_store import MemoryStateStore, SessionLocks
+
+
+class BattleRegistry:
+    """セッションIDごとにBattleインスタンスをリクエスト間で保持する
+
+    放置された戦闘は idle_timeout 秒で失効し、同時戦闘数が max_battles を
+    超えた場合は最も長くアクセスのない戦闘から破棄する。
+    snapshot_path を指定するとクラッシュ復旧用のスナップショットを保存できる。
+    store を渡すと戦闘をそのストアに保存する（複数プロセスで共有する場合は
+    SQLiteStateStore）。上限と失効はそのストアの設定（max_entries, ttl）に従う。
+    プロセス外のストアはそれ自体が永続なので、スナップショットとは併用できない。
+    戦闘を進めるリクエストは locks（セッションごとのロック）を持っている前提で、
+    スナップショットは戦闘ごとに同じロックを取ってから保存する。
+    """
+
+    def __init__(self, max_battles: int = 1000, idle_timeout: float = 900.0,
+                 snapshot_path: str = None, snapshot_interval: float = 30.0, store=None,
+                 locks: SessionLocks = None):
+        if store is None:
+            store = MemoryStateStore(max_entries=max_battles, ttl=idle_timeout)
+        elif snapshot_path is not None:
+            raise ValueError("snapshot_path cannot be used with a custom battle store")
+        self._battles = store
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self._last_snapshot = time.monotonic()
+        self._snapshot_lock = threading.Lock()
+        self.locks = locks or SessionLocks()
+
+    def start(self, sid: str, battle):
+        """新しい戦闘を登録（既存の戦闘は置き換える）"""
+        self._battles.set(sid, battle)
+
+    def get(self, sid: str):
+        """進行中の戦闘を取得（なければNone）"""
+        with METRICS.phase('battle_load'):
+            return self._battles.get(sid)
+
+    def update(self, sid: str, battle):
+        """戦闘の進行を保存（プロセス外のストアでは行動のたびに必要）"""
+        with METRICS.phase('battle_save'):
+            self._battles.set(sid, battle)
+
+    def finish(self, sid: str):
+        """戦闘を終了して破棄"""
+        self._battles.delete(sid)
+
+    def __len__(self):
+        return len(self._battles)
+
+    @property
+    def in_process(self) -> bool:
+        """戦闘をこのプロセスのメモリに保持しているか"""
+        return isinstance(self._battles, MemoryStateStore)
+
+    def snapshot(self, path: str = None) -> int:
+        """進行中の戦闘をファイルに保存し、保存件数を返す"""
+        path = path or self.snapshot_path
+        if path is None or not self.in_process:
+            return 0
+        with self._snapshot_lock:
+            return self._write_snapshot(path)
+
+    def _write_snapshot(self, path: str) -> int:
+        """スナップショットを書き出す（_snapshot_lock を持った状態で呼ぶ）
+
+        行動の途中の戦闘を保存しないよう、戦闘ごとにセッションのロックを取って pickle する。
+        """
+        battles = {}
+        for sid, battle in self._battles.items():
+            with self.locks.get(sid):
+                battles[sid] = pickle.dumps(battle, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(battles, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._last_snapshot = time.monotonic()
+        return len(battles)
+
+    def restore(self, path: str = None) -> int:
+        """スナップショットから戦闘を復元し、復元件数を返す"""
+        path = path or self.snapshot_path
+        if path is None or not self.in_process or not os.path.exists(path):
+            return 0
+        with open(path, 'rb') as f:
+            battles = pickle.load(f)
+        for sid, battle in battles.items():
+            if isinstance(battle, bytes):
+                battle = pickle.loads(battle)
+            self._battles.set(sid, battle)
+        return len(battles)
+
+    def maybe_snapshot(self):
+        """前回の保存から snapshot_interval 秒以上経過していれば、バックグラウンドで保存
+
+        呼び出し元はセッションのロックを持っているため、他の戦闘のロックを待たないよう
+        別スレッドで保存する（保存中ならそのまま戻る）。
+        """
+        if self.snapshot_path is None or not self.in_process:
+            return
+        if time.monotonic() - self._last_snapshot < self.snapshot_interval:
+            return
+        if not self._snapshot_lock.acquire(blocking=False):
+            return
+        self._last_snapshot = time.monotonic()
+        threading.Thread(target=self._background_snapshot, args=(self.snapshot_path,),
+                         name='battle-snapshot', daemon=True).start()
+
+    def _background_snapshot(self, path: str):
+        try:
+            self._write_snapshot(path)
+        finally:
+            self._snapshot_lock.release()
@@ -0,0 +1,1603 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能計測用ベンチマーク
+
+使い方:
+    python benchmark.py session-store --iterations 500
+    python benchmark.py vector-battle
+    python benchmark.py spawn
+    python benchmark.py monster-cache
+    python benchmark.py memory --compare-rev HEAD~1
+    python benchmark.py serialize-battle
+    python benchmark.py battle-log --turns 20000
+    python benchmark.py replay --battles 1000
+    python benchmark.py codec
+    python benchmark.py battle-turn
+    python benchmark.py battle-auto
+    python benchmark.py metrics
+    python benchmark.py profiler
+    python benchmark.py shop-catalog
+    python benchmark.py assets
+    python benchmark.py item-index --items 100000
+    python benchmark.py inventory --items 10000
+    python benchmark.py economy --paths 1000000
+    python benchmark.py world-economy --processes 4
+    python benchmark.py delta
+    python benchmark.py events --connections 2000
+    python benchmark.py server --workers 1 2 4
+"""
+
+import argparse
+import functools
+import os
+import statistics
+import tempfile
+import time
+
+
+def _percentiles(samples):
+    """(p50, p99) をミリ秒で返す"""
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return value, value
+    quantiles = statistics.quantiles(samples, n=100)
+    return quantiles[49] * 1000, quantiles[98] * 1000
+
+
+def _print_latency(label, samples):
+    p50, p99 = _percentiles(samples)
+    print(f"  {label:<24} n={len(samples):<6} p50={p50:8.3f}ms  p99={p99:8.3f}ms")
+
+
+# ---------------------------------------------------------------------------
+# 状態ストア（Cookie / メモリ / SQLite）
+# ---------------------------------------------------------------------------
+
+def _grant_gold(app_module, client, kind, gold):
+    """ベンチ用に所持金を増やす（購入が資金不足で失敗し続けないように）"""
+    store = app_module.state_store
+    with client.session_transaction() as sess:
+        if kind == 'cookie':
+            state = store.decode(sess[store.key])
+            state.player.gold = gold
+            sess[store.key] = store.encode(state)
+        else:
+            state = store.get(sess['sid'])
+            state.player.gold = gold
+            store.set(sess['sid'], state)
+
+
+def bench_session_store(args):
+    """/api/battle/action と /api/shop/buy のレイテンシをストア別に比較"""
+    import app as app_module
+
+    tmp_dir = tempfile.mkdtemp()
+    os.environ['FINANCIAL_RPG_STATE_DB'] = os.path.join(tmp_dir, 'bench_state.db')
+
+    for kind in args.stores:
+        app_module.state_store = app_module.create_state_store(kind)
+        client = app_module.app.test_client()
+        client.post('/api/start', json={'name': 'ベンチ'})
+        _grant_gold(app_module, client, kind, 10 ** 9)
+
+        # 所持品を増やしてCookieサイズの影響を見る
+        for _ in range(args.inventory):
+            client.post('/api/shop/buy', json={'type': 'weapon', 'name': '木の剣'})
+
+        battle_samples = []
+        client.post('/api/adventure')
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            response = client.post('/api/battle/action', json={'action_type': 'attack'})
+            battle_samples.append(time.perf_counter() - start)
+            data = response.get_json()
+            if not data['success'] or data['battle_state']['is_battle_over']:
+                client.post('/api/adventure')
+
+        shop_samples = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            client.post('/api/shop/buy', json={'type': 'armor', 'name': '布の服'})
+            shop_samples.append(time.perf_counter() - start)
+
+        cookie = client.get_cookie('session')
+        print(f"[{kind}] Cookieサイズ: {len(cookie.value) if cookie else 0} bytes")
+        _print_latency('/api/battle/action', battle_samples)
+        _print_latency('/api/shop/buy', shop_samples)
+
+
+# ---------------------------------------------------------------------------
+# まとめて実行するターン
+# ---------------------------------------------------------------------------
+
+def bench_battle_turn(args):
+    """1ターンあたりのリクエスト数とCPU時間（1人ずつ /api/battle/action vs /api/battle/turn）"""
+    import app as app_module
+
+    tmp_dir = tempfile.mkdtemp()
+    os.environ['FINANCIAL_RPG_STATE_DB'] = os.path.join(tmp_dir, 'bench_turn.db')
+
+    print(f"パーティ4人で {args.turns} ターン")
+    print(f"  {'ストア':<8} {'方式':<20} {'リクエスト/ターン':>16} {'CPU/ターン':>12}")
+    for kind in args.stores:
+        app_module.state_store = app_module.create_state_store(kind)
+        for mode in ('action', 'turn'):
+            client = app_module.app.test_client()
+            client.post('/api/start', json={'name': 'ベンチ'})
+            for name in ('インフレゴブリン', 'デフレスライム', 'コインスライム'):
+                client.post('/api/recruit_monster', json={'monster_name': name})
+            battle_state = client.post('/api/adventure').get_json()['battle_state']
+
+            requests = 0
+            cpu = 0.0
+            for _ in range(args.turns):
+                alive = [m for m in battle_state['player_party'] if m['is_alive']]
+                start = time.process_time()
+                if mode == 'action':
+                    turn = battle_state['turn']
+                    for _ in alive:
+                        data = client.post('/api/battle/action', json={'action_type': 'attack'}).get_json()
+                        requests += 1
+                        if data['battle_state']['turn'] != turn or data['battle_result']:
+                            break
+                else:
+                    actions = [{'action_type': 'attack'} for _ in alive]
+                    data = client.post('/api/battle/turn', json={'actions': actions}).get_json()
+                    requests += 1
+                cpu += time.process_time() - start
+
+                battle_state = data['battle_state']
+                if data['battle_result']:
+                    battle_state = client.post('/api/adventure').get_json()['battle_state']
+
+            label = '/api/battle/action×人数' if mode == 'action' else '/api/battle/turn'
+            print(f"  {kind:<8} {label:<20} {requests / args.turns:>16.2f} {cpu / args.turns * 1000:>10.3f}ms")
+
+
+def _metrics_journey(client, battles: int) -> int:
+    """冒険 → /api/battle/action を戦闘が終わるまで → 購入、を battles 回（リクエスト数を返す）"""
+    requests = 0
+    for _ in range(battles):
+        client.post('/api/adventure')
+        requests += 1
+        while True:
+            data = client.post('/api/battle/action', json={'action_type': 'attack'}).get_json()
+            requests += 1
+            if data.get('battle_result') or not data.get('battle_state'):
+                break
+        client.post('/api/shop/buy', json={'type': 'weapon', 'name': '木の剣'})
+        requests += 1
+    return requests
+
+
+def _journey_client(app_module):
+    """_metrics_journey 用の新しいプレイヤー（所持金を増やし、仲間を3人加えた4人パーティ）"""
+    client = app_module.app.test_client()
+    client.post('/api/start', json={'name': 'ベンチ'})
+    _grant_gold(app_module, client, 'memory', 10 ** 9)
+    for name in ('インフレゴブリン', 'デフレスライム', 'コインスライム'):
+        client.post('/api/recruit_monster', json={'monster_name': name})
+    return client
+
+
+def bench_metrics(args):
+    """メトリクスの計測コスト（有効 vs 無効。/metrics の出力形式の検証は test_metrics.py）"""
+    import random
+    import app as app_module
+    from metrics import METRICS
+
+    app_module.state_store = app_module.create_state_store('memory')
+    app_module.battle_log_store = None  # ファイルへの書き込みのばらつきを除く
+    _metrics_journey(_journey_client(app_module), args.battles)  # ウォームアップ
+
+    # 有効・無効を順番を入れ替えながら繰り返す。各回は新しいプレイヤーと同じ乱数のシードで
+    # 始めるので戦闘の内容は同じ。比は同じ回の無効との比の中央値
+    samples = {True: [], False: []}
+    for round_index in range(args.rounds):
+        for enabled in ((False, True) if round_index % 2 == 0 else (True, False)):
+            METRICS.enabled = enabled
+            client = _journey_client(app_module)
+            random.seed(round_index)
+            start = time.process_time()
+            requests = _metrics_journey(client, args.battles)
+            samples[enabled].append((time.process_time() - start) / requests)
+    METRICS.enabled = True
+    disabled, enabled = statistics.median(samples[False]), statistics.median(samples[True])
+    ratio = statistics.median(on / off for on, off in zip(samples[True], samples[False]))
+    print(f"冒険・戦闘・購入のリクエスト（{args.rounds}回 × {args.battles}戦闘）のCPU時間の中央値")
+    print(f"  メトリクス無効 {disabled * 1e6:8.1f} µs/リクエスト")
+    print(f"  メトリクス有効 {enabled * 1e6:8.1f} µs/リクエスト（{(ratio - 1) * 100:+.2f}%）")
+
+    # 計測そのもののコスト（1リクエストの記録と段階8個）
+    iterations = 100000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        record = METRICS.begin()
+        METRICS.set_route('/bench')
+        for name in ('session_load', 'state_load', 'decode_player', 'game_logic',
+                     'serialize', 'state_save', 'encode_response', 'session_save'):
+            with METRICS.phase(name):
+                pass
+        METRICS.end(record, 'POST', '200')
+    per_request = (time.perf_counter() - start) / iterations
+    print(f"  記録のコスト   {per_request * 1e6:8.1f} µs/リクエスト（段階8個。無効時の処理時間の "
+          f"{per_request / disabled * 100:.2f}%）")
+
+
+def bench_profiler(args):
+    """プロファイラーのコスト（無効・サンプリング時。保存したプロファイルの整合性は test_profiler.py）"""
+    import random
+    import app as app_module
+    from profiler import ProfilerMiddleware, RequestProfiler
+
+    app_module.state_store = app_module.create_state_store('memory')
+    app_module.battle_log_store = None
+    middleware = app_module.app.wsgi_app
+
+    with tempfile.TemporaryDirectory() as directory:
+        profiler = RequestProfiler(directory, threshold=float('inf'), keep=args.keep)
+        middleware.profiler = profiler
+        _metrics_journey(_journey_client(app_module), args.battles)  # ウォームアップ
+
+        # ミドルウェア無し・無効・サンプリング（保存はしない）を順番を変えながら繰り返し、CPU時間の中央値で比べる。
+        # 各回は新しいプレイヤーと同じ乱数のシードで始めるので、モードの間で戦闘の内容は同じ
+        modes = [('ミドルウェア無し', None), ('無効', 0.0), (f'{args.rate:.0%}を計測', args.rate)]
+        samples = {label: [] for label, _ in modes}
+        for round_index in range(args.rounds):
+            for label, rate in modes[round_index % 3:] + modes[:round_index % 3]:
+                app_module.app.wsgi_app = middleware.wsgi_app if rate is None else middleware
+                profiler.sample_rate = rate or 0.0
+                client = _journey_client(app_module)
+                random.seed(round_index)
+                profiler._rng.seed(round_index)
+                start = time.process_time()
+                requests = _metrics_journey(client, args.battles)
+                samples[label].append((time.process_time() - start) / requests)
+        app_module.app.wsgi_app = middleware
+
+        # 比は同じ回のミドルウェア無しとの比の中央値
+        print(f"冒険・戦闘・購入のリクエスト（{args.rounds}回 × {args.battles}戦闘）のCPU時間の中央値")
+        baselines = samples[modes[0][0]]
+        baseline = statistics.median(baselines)
+        for label, _ in modes:
+            ratio = statistics.median(value / base for value, base in zip(samples[label], baselines))
+            print(f"  {label:<12} {statistics.median(samples[label]) * 1e6:8.1f} µs/リクエスト（{(ratio - 1) * 100:+.2f}%）")
+
+        # 無効時のミドルウェア1回分のコスト（何もしないWSGIアプリで計測）
+        disabled = ProfilerMiddleware(lambda environ, start_response: [], profiler)
+        iterations = 200000
+        start = time.perf_counter()
+        for _ in range(iterations):
+            disabled({}, None)
+        per_call = (time.perf_counter() - start) / iterations
+        print(f"  無効時のミドルウェアのコスト {per_call * 1e6:.2f} µs/リクエスト（{per_call / baseline:.3%}）")
+
+        # 全リクエストを保存（保存したプロファイルの整合性は test_profiler.py）
+        profiler.sample_rate, profiler.threshold = 1.0, 0.0
+        client = _journey_client(app_module)
+        start = time.process_time()
+        requests = _metrics_journey(client, args.battles)
+        saved = (time.process_time() - start) / requests
+        profiler.sample_rate = 0.0
+        print(f"  全て計測・保存 {saved * 1e6:8.1f} µs/リクエスト（保存したプロファイル {len(profiler.profiles())}件、"
+              f"上限 {args.keep}）")
+
+
+def bench_battle_auto(args):
+    """1戦闘あたりのリクエスト数とCPU時間（毎ターン /api/battle/turn vs /api/battle/auto。報酬の反映は test_app.py）"""
+    import app as app_module
+
+    app_module.state_store = app_module.create_state_store('memory')
+    print(f"パーティ4人で {args.battles} 戦闘")
+    print(f"  {'方式':<24} {'リクエスト/戦闘':>14} {'CPU/戦闘':>12} {'勝率':>8}")
+    modes = [('turn', 'attack')] + [('auto', policy) for policy in ('attack', 'smart')]
+    for mode, policy in modes:
+        client = app_module.app.test_client()
+        client.post('/api/start', json={'name': 'ベンチ'})
+        for name in ('インフレゴブリン', 'デフレスライム', 'コインスライム'):
+            client.post('/api/recruit_monster', json={'monster_name': name})
+
+        requests = 0
+        cpu = 0.0
+        victories = 0
+        for _ in range(args.battles):
+            data = client.post('/api/adventure').get_json()
+            start = time.process_time()
+            if mode == 'turn':
+                while not data.get('battle_result'):
+                    alive = [m for m in data['battle_state']['player_party'] if m['is_alive']]
+                    actions = [{'action_type': 'attack'} for _ in alive]
+                    data = client.post('/api/battle/turn', json={'actions': actions}).get_json()
+                    requests += 1
+            else:
+                data = client.post('/api/battle/auto', json={'policy': policy}).get_json()
+                requests += 1
+            cpu += time.process_time() - start
+
+            if data['battle_result']['victory']:
+                victories += 1
+            else:
+                # 全滅したら始め直す
+                client.post('/api/start', json={'name': 'ベンチ'})
+                for name in ('インフレゴブリン', 'デフレスライム', 'コインスライム'):
+                    client.post('/api/recruit_monster', json={'monster_name': name})
+
+        label = '/api/battle/turn×ターン数' if mode == 'turn' else f'/api/battle/auto ({policy})'
+        print(f"  {label:<24} {requests / args.battles:>14.2f} {cpu / args.battles * 1000:>10.3f}ms "
+              f"{victories / args.battles:>8.1%}")
+
+
+# ---------------------------------------------------------------------------
+# ショップカタログ
+# ---------------------------------------------------------------------------
+
+def bench_shop_catalog(args):
+    """/api/shop/items のCPU時間と転送量（毎回エンコード vs キャッシュ済み・304）"""
+    from flask import jsonify
+    import app as app_module
+    from catalog import build_catalog
+
+    # 変更前の実装（毎回リストを作ってJSONエンコード）を比較用に登録
+    def legacy_shop_items():
+        return jsonify({'success': True, **build_catalog()})
+    app_module.app.add_url_rule('/bench/legacy-shop-items', 'bench_legacy_shop_items', legacy_shop_items)
+    # Flask・テストクライアント自体のオーバーヘッドの目安
+    app_module.app.add_url_rule('/bench/empty', 'bench_empty', lambda: '')
+
+    # 変更前との内容の一致は test_catalog.py で確認する
+    client = app_module.app.test_client()
+    first = client.get('/api/shop/items', headers={'Accept-Encoding': 'gzip'})
+
+    cases = [
+        ('（空のレスポンス）', '/bench/empty', {}),
+        ('変更前', '/bench/legacy-shop-items', {}),
+        ('キャッシュ（非圧縮）', '/api/shop/items', {}),
+        ('キャッシュ（gzip）', '/api/shop/items', {'Accept-Encoding': 'gzip'}),
+        ('If-None-Match → 304', '/api/shop/items',
+         {'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']}),
+        ('?type=weapons&fields=', '/api/shop/items?type=weapons&fields=name,price_gold,attack_bonus',
+         {'Accept-Encoding': 'gzip'}),
+    ]
+    print(f"/api/shop/items {args.iterations}回（テストクライアント経由）")
+    for label, path, headers in cases:
+        client.get(path, headers=headers)
+        start = time.process_time()
+        for _ in range(args.iterations):
+            response = client.get(path, headers=headers)
+        cpu = (time.process_time() - start) / args.iterations
+        print(f"  {label:<24} {response.status_code}  {len(response.data):6d} bytes  CPU {cpu * 1e6:8.1f} µs/回")
+
+
+# ---------------------------------------------------------------------------
+# 静的ファイル
+# ---------------------------------------------------------------------------
+
+def bench_assets(args):
+    """メインページと静的ファイルのCPU時間・転送量（初回訪問 / 再訪問）"""
+    import re
+    from flask import render_template
+    import app as app_module
+
+    # 変更前の実装（毎回テンプレートを描画し、static/ をそのまま配信）を比較用に登録
+    def legacy_index():
+        return render_template('index.html').replace('/assets/', '/static/')
+    app_module.app.add_url_rule('/bench/legacy-index', 'bench_legacy_index', legacy_index)
+
+    client = app_module.app.test_client()
+    headers = {'Accept-Encoding': 'gzip, br'}
+    page = client.get('/').data.decode('utf-8')
+    hashed_urls = re.findall(r'(?:href|src)="(/assets/[^"]+)"', page)
+    legacy_urls = [re.sub(r'^/assets/(.*)\.[0-9a-f]{12}(\.\w+)$', r'/static/\1\2', url) for url in hashed_urls]
+
+    def visit(index_path, urls, etags):
+        """1回の訪問（ページと参照するファイル）の (転送バイト数, リクエスト数)"""
+        total = requests = 0
+        for path in [index_path] + urls:
+            request_headers = dict(headers)
+            cached = etags.get(path)
+            if cached is not None:
+                # immutable なファイルはブラウザがリクエスト自体を送らない
+                if cached[1]:
+                    continue
+                request_headers['If-None-Match'] = cached[0]
+            response = client.get(path, headers=request_headers)
+            requests += 1
+            total += len(response.data)
+            if response.status_code == 200 and response.headers.get('ETag'):
+                etags[path] = (response.headers['ETag'], 'immutable' in response.headers.get('Cache-Control', ''))
+            response.close()
+        return total, requests
+
+    print(f"{'方式':<10} {'初回訪問':>18} {'再訪問':>18} {'メインページのCPU':>18}")
+    for label, index_path, urls in (('変更前', '/bench/legacy-index', legacy_urls), ('変更後', '/', hashed_urls)):
+        etags = {}
+        first = visit(index_path, urls, etags)
+        repeat = visit(index_path, urls, etags)
+        start = time.process_time()
+        for _ in range(args.iterations):
+            client.get(index_path, headers=headers)
+        cpu = (time.process_time() - start) / args.iterations
+        print(f"{label:<10} {first[0]:>9d} bytes/{first[1]}件 {repeat[0]:>9d} bytes/{repeat[1]}件 {cpu * 1e6:>15.1f} µs")
+
+
+# ---------------------------------------------------------------------------
+# 装備の検索インデックス
+# ---------------------------------------------------------------------------
+
+def bench_item_index(args):
+    """「予算内で最も強い武器」の検索（線形走査 vs インデックス。結果の一致は test_item_index.py）"""
+    import random
+    from item import Weapon
+    from item_index import ItemIndex
+
+    rng = random.Random(args.seed)
+    weapons = []
+    for i in range(args.items):
+        attack = rng.randint(1, 1000)
+        price = attack * rng.randint(50, 150) + rng.randint(0, 1000)
+        weapons.append(Weapon(f"武器{i}", attack, price, max(1, price // rng.randint(40, 80)), ''))
+
+    start = time.perf_counter()
+    index = ItemIndex(weapons, 'attack_bonus')
+    build_time = time.perf_counter() - start
+    max_price = max(w.price_gold for w in weapons)
+    print(f"{args.items}品のカタログ: インデックス作成 {build_time * 1000:.1f}ms"
+          f"（パレート最適 {len(index.frontier('price_gold'))}品）")
+
+    def linear(currency, budget):
+        best = None
+        for w in weapons:
+            price = getattr(w, currency)
+            if price <= budget and (best is None or (w.attack_bonus, -price) > (best.attack_bonus, -getattr(best, currency))):
+                best = w
+        return best
+
+    samples = {'linear': [], 'index': []}
+    for i in range(args.queries):
+        currency = 'price_gold' if i % 2 == 0 else 'price_f_tickets'
+        budget = rng.randint(0, max_price if currency == 'price_gold' else max_price // 40)
+        start = time.perf_counter()
+        index.best_affordable(currency, budget)
+        samples['index'].append(time.perf_counter() - start)
+        if i < args.linear_queries:
+            start = time.perf_counter()
+            linear(currency, budget)
+            samples['linear'].append(time.perf_counter() - start)
+
+    _print_latency('線形走査', samples['linear'])
+    _print_latency('インデックス', samples['index'])
+
+
+# ---------------------------------------------------------------------------
+# 所持品
+# ---------------------------------------------------------------------------
+
+def bench_inventory(args):
+    """武器を大量に持つプレイヤーの購入・装備・保存（1個ずつのリスト vs 個数の辞書）"""
+    import gc
+    import json
+    import random
+    import tracemalloc
+    import app
+    import codec
+    from f_ticket import FTicketSystem
+    from item import WEAPONS, Weapon
+    from state_store import GameState
+
+    rng = random.Random(args.seed)
+    names = [rng.choice(list(WEAPONS)) for _ in range(args.items)]
+    # 最後に買った品だけ1個（リストでは末尾まで探す）
+    last = names[-1]
+    names = [name for name in names if name != last] + [last]
+
+    def buy_list():
+        weapons = []
+        for name in names:
+            t = WEAPONS[name]
+            weapons.append(Weapon(t.name, t.attack_bonus, t.price_gold, t.price_f_tickets, t.description))
+        return weapons
+
+    def buy_counted():
+        player = app.Player()
+        for name in names:
+            player.inventory_weapons.add(name)
+        return player
+
+    def measure(build):
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = build()
+        elapsed = time.perf_counter() - start
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return result, elapsed, size
+
+    weapons, list_time, list_memory = measure(buy_list)
+    player, counted_time, counted_memory = measure(buy_counted)
+    player.create_main_character('冒険者')
+    character = player.main_character
+
+    def equip_list():
+        for w in weapons:
+            if w.name == last:
+                return w
+        return None
+
+    def equip_counted():
+        player.equip_weapon_to_character(character, last)
+        player.inventory_weapons.unequip(last)
+        character.equip_weapon(None)
+
+    samples = {'list': [], 'counted': []}
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        equip_list()
+        samples['list'].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        equip_counted()
+        samples['counted'].append(time.perf_counter() - start)
+
+    print(f"武器{len(names)}個（{len(player.inventory_weapons.items())}種類）を持つプレイヤー")
+    print(f"  購入: リスト {list_time * 1000:.1f}ms / {list_memory / 1024:.0f}KB"
+          f"   個数 {counted_time * 1000:.1f}ms / {counted_memory / 1024:.1f}KB")
+    print("装備（末尾の品の検索）:")
+    _print_latency('リスト（線形探索）', samples['list'])
+    _print_latency('個数（辞書）', samples['counted'])
+
+    # 保存サイズ（従来はJSONに1個ずつ、codec v1 はカタログIDを1個ずつ並べていた）
+    player.equip_weapon_to_character(character, last)
+    state = GameState(player, FTicketSystem(), 1, 0)
+    legacy = json.dumps([{'name': w.name, 'attack_bonus': w.attack_bonus} for w in weapons], ensure_ascii=False)
+    v1_ids = codec.packb([codec.WEAPON_CATALOG.ids[w.name] for w in weapons])
+    print("保存サイズ（武器の所持品）:")
+    print(f"  従来JSON {len(legacy.encode('utf-8')):>8}B   "
+          f"game_state {len(json.dumps(app.serialize_game_state(*state.as_tuple())['player']['inventory_weapons'], ensure_ascii=False).encode('utf-8')):>6}B")
+    print(f"  codec v1 {len(v1_ids):>8}B   "
+          f"codec v2 {len(codec.packb(codec._encode_inventory(player.inventory_weapons, codec.WEAPON_CATALOG))):>6}B")
+
+    decoded = codec.decode_state(codec.encode_state(state, 'binary')).player
+    ok = (decoded.inventory_weapons.items() == player.inventory_weapons.items()
+          and decoded.main_character.equipped_weapon.name == last)
+    print(f"往復（binary）: {'一致' if ok else '不一致'}")
+    if not ok:
+        raise SystemExit(1)
+
+
+# ---------------------------------------------------------------------------
+# 経済状況のマルコフ連鎖
+# ---------------------------------------------------------------------------
+
+def bench_economy(args):
+    """経済の推移の生成（1経路ずつ change_condition vs 一括。解析的な予測との一致は test_economy.py）"""
+    import random
+    import numpy as np
+    from catalog import ForecastCache
+    from economy import ECONOMY
+    from f_ticket import EconomyCondition, FTicketSystem
+
+    model = ECONOMY
+    start_condition = EconomyCondition.STABLE
+    base_value = FTicketSystem().base_value
+    values = np.floor(model.multipliers * base_value)
+    expected = model.forecast(start_condition, args.steps) @ values
+
+    random.seed(args.seed)
+    start = time.perf_counter()
+    loop_sum = np.zeros(args.steps + 1)
+    for _ in range(args.loop_paths):
+        system = FTicketSystem()
+        loop_sum[0] += system.get_current_value()
+        for step in range(args.steps):
+            system.change_condition()
+            loop_sum[step + 1] += system.get_current_value()
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    states = model.simulate(start_condition, args.steps, args.paths, seed=args.seed)
+    simulated = model.simulated_values(states, base_value).mean(axis=0)
+    vector_time = time.perf_counter() - start
+
+    print(f"{args.steps}回の変動（開始: {start_condition.value}）")
+    print(f"  {'方式':<28} {'経路数':>10} {'経路/秒':>14} {'期待価値との最大誤差':>20}")
+    for label, paths, elapsed, means in (
+            ('change_condition（1経路ずつ）', args.loop_paths, loop_time, loop_sum / args.loop_paths),
+            ('EconomyModel.simulate（一括）', args.paths, vector_time, simulated)):
+        error = np.abs(means - expected).max()
+        print(f"  {label:<28} {paths:>10} {paths / elapsed:>14,.0f} {error:>18.3f}G")
+
+    cache = ForecastCache(model)
+    samples = {'uncached': [], 'cached': []}
+    for i in range(args.iterations):
+        start = time.perf_counter()
+        ForecastCache(model).get(start_condition, base_value, args.steps)
+        samples['uncached'].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        cache.get(start_condition, base_value, args.steps)
+        samples['cached'].append(time.perf_counter() - start)
+    print("/api/economy/forecast の本文の作成:")
+    _print_latency('毎回計算', samples['uncached'])
+    _print_latency('キャッシュ', samples['cached'])
+
+
+
+def _world_economy_at(task):
+    """別プロセスで世界の経済を作り、指定した時刻ごとの (ティック, 状況, 変化したティック) を返す"""
+    from economy import WorldEconomy
+    interval, seed, epoch, times = task
+    now = [epoch]
+    world = WorldEconomy(interval=interval, seed=seed, epoch=epoch, clock=lambda: now[0])
+    results = []
+    for now[0] in times:
+        snapshot = world.current()
+        results.append((snapshot.tick, snapshot.current_condition.value, snapshot.changed_tick))
+    return results
+
+
+def bench_world_economy(args):
+    """世界共通の経済：スナップショットの読み取り・保存サイズ・プロセス間の一致（決定性の検証は test_economy.py）"""
+    import multiprocessing
+    import random
+    import codec
+    from economy import WorldEconomy
+    from f_ticket import EconomyCondition, FTicketSystem
+
+    world = WorldEconomy(interval=args.interval, seed=args.seed)
+    system = FTicketSystem()
+    samples = {'change': [], 'snapshot': []}
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        if random.random() < 0.3:
+            system.change_condition()
+        system.get_current_value()
+        samples['change'].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        world.current().get_current_value()
+        samples['snapshot'].append(time.perf_counter() - start)
+    print("/api/adventure での経済の処理:")
+    _print_latency('セッションごと（変動あり）', samples['change'])
+    _print_latency('世界のスナップショット', samples['snapshot'])
+
+    system.condition_history = [random.choice(list(EconomyCondition)) for _ in range(FTicketSystem.HISTORY_LENGTH)]
+    conditions = list(EconomyCondition)
+    per_session = codec.packb([conditions.index(system.current_condition), system.base_value,
+                               [conditions.index(c) for c in system.condition_history]])
+    year_tick = int(365 * 86400 // args.interval)
+    print(f"保存する経済の状態: セッションごとのF券システム {len(per_session)}B → ティック "
+          f"{len(codec.packb(year_tick))}B（1年後のティック {year_tick}）")
+
+    # 起点時刻から1年分の範囲の時刻で、独立したプロセスが同じ経済を再現するか
+    epoch = time.time() - 365 * 86400
+    rng = random.Random(args.seed)
+    times = sorted(epoch + rng.uniform(0, 365 * 86400) for _ in range(args.samples))
+    task = (args.interval, args.seed, epoch, times)
+    context = multiprocessing.get_context('spawn')
+    start = time.perf_counter()
+    with context.Pool(args.processes) as pool:
+        results = pool.map(_world_economy_at, [task] * args.processes)
+    elapsed = time.perf_counter() - start
+    mismatches = sum(result != results[0] for result in results[1:])
+    print(f"{args.processes}プロセスで {args.samples}時点（ティック{args.interval:g}秒・1年分）を独立に計算: "
+          f"不一致 {mismatches}プロセス（{elapsed:.1f}秒）")
+
+
+# ---------------------------------------------------------------------------
+# 差分レスポンス
+# ---------------------------------------------------------------------------
+
+def bench_delta(args):
+    """/api/battle/action のレスポンスサイズとJSONエンコード時間（全体 vs 差分）"""
+    import app as app_module
+    from delta import apply_patch
+
+    app_module.state_store = app_module.create_state_store('memory')
+    results = {}
+    mismatches = 0
+    for mode in ('full', 'delta'):
+        client = app_module.app.test_client()
+        client.post('/api/start', json={'name': 'ベンチ'})
+        _grant_gold(app_module, client, 'memory', 10 ** 9)
+        for name in ('インフレゴブリン', 'デフレスライム', 'コインスライム'):
+            client.post('/api/recruit_monster', json={'monster_name': name})
+        for _ in range(args.inventory):
+            client.post('/api/shop/buy', json={'type': 'weapon', 'name': '木の剣'})
+
+        version = None
+        document = {}
+
+        def call(path, body=None):
+            nonlocal version, document
+            headers = {'X-State-Version': '' if version is None else str(version)} if mode == 'delta' else {}
+            response = client.post(path, json=body, headers=headers)
+            data = response.get_json()
+            if 'state_patch' in data:
+                assert data['state_base_version'] == version
+                apply_patch(document, data['state_patch'])
+            elif 'state_version' in data:
+                document = {k: data[k] for k in ('battle_state', 'game_state') if k in data}
+            version = data.get('state_version', version)
+            return response, data
+
+        sizes, encode_times = [], []
+        call('/api/adventure')
+        for _ in range(args.actions):
+            response, data = call('/api/battle/action', {'action_type': 'attack'})
+            sizes.append(len(response.data))
+            start = time.perf_counter()
+            app_module.app.json.dumps(data)
+            encode_times.append(time.perf_counter() - start)
+
+            if mode == 'delta':
+                # パッチ適用後の状態がヘッダー無しで取得した全体と一致するか
+                battle = client.get('/api/battle/state').get_json()
+                if battle['success'] and battle['battle_state'] != document['battle_state']:
+                    mismatches += 1
+                if data.get('battle_result'):
+                    status = client.get('/api/status').get_json()
+                    if status['game_state'] != document['game_state']:
+                        mismatches += 1
+            if not data['success'] or data.get('battle_result'):
+                call('/api/adventure')
+        results[mode] = (sizes, encode_times)
+
+    print(f"/api/battle/action {args.actions}回（パーティ4人・武器{args.inventory}個）")
+    for mode, (sizes, encode_times) in results.items():
+        print(f"  {mode:<6} 平均 {statistics.mean(sizes):8.1f} bytes/回  最大 {max(sizes):6d} bytes  "
+              f"JSONエンコード {statistics.mean(encode_times) * 1e6:7.1f} µs/回")
+    print(f"  差分適用後の状態の不一致: {mismatches}件")
+    if mismatches:
+        raise SystemExit(1)
+
+
+# ---------------------------------------------------------------------------
+# 複数プロセスサーバー
+# ---------------------------------------------------------------------------
+
+def _server_load_client(port, duration, result_queue):
+    """1セッション分の負荷クライアント（冒険開始 → 自動戦闘を繰り返す）"""
+    import http.client
+    import json
+
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    cookie = None
+
+    def post(path, body):
+        nonlocal cookie
+        headers = {'Content-Type': 'application/json'}
+        if cookie:
+            headers['Cookie'] = cookie
+        conn.request('POST', path, body=json.dumps(body).encode('utf-8'), headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+        if response.getheader('Set-Cookie'):
+            cookie = response.getheader('Set-Cookie').split(';', 1)[0]
+        return response.status, data
+
+    post('/api/start', {'name': '負荷試験'})
+    requests = errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        for path, body in (('/api/adventure', {}), ('/api/battle/auto', {'policy': 'attack'})):
+            status, data = post(path, body)
+            requests += 1
+            if status != 200 or b'"success":true' not in data:
+                errors += 1
+    conn.close()
+    result_queue.put((requests, errors))
+
+
+def _wait_for_port(port, timeout=30.0):
+    import socket
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def bench_server(args):
+    """server.py のワーカー数ごとのスループット（リクエスト/秒）"""
+    import multiprocessing
+    import signal
+    import socket
+    import subprocess
+    import sys
+
+    tmp_dir = tempfile.mkdtemp()
+    print(f"CPU {os.cpu_count()}コア / クライアント {args.clients}プロセス × {args.duration}秒")
+    print(f"  {'ワーカー':<8} {'リクエスト/秒':>14} {'エラー':>8}")
+    for workers in args.workers:
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        # ワーカー1つでも複数の場合と同じSQLiteストアで比べる
+        env = dict(os.environ,
+                   FINANCIAL_RPG_STATE_STORE='sqlite', FINANCIAL_RPG_BATTLE_STORE='sqlite',
+                   FINANCIAL_RPG_STATE_DB=os.path.join(tmp_dir, f'state_{workers}.db'),
+                   FINANCIAL_RPG_BATTLE_DB=os.path.join(tmp_dir, f'battles_{workers}.db'))
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py'),
+             '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            if not _wait_for_port(port):
+                print(f"  {workers:<8} サーバーが起動しませんでした")
+                continue
+            result_queue = multiprocessing.Queue()
+            clients = [multiprocessing.Process(target=_server_load_client, args=(port, args.duration, result_queue))
+                       for _ in range(args.clients)]
+            start = time.perf_counter()
+            for client in clients:
+                client.start()
+            results = [result_queue.get(timeout=args.duration + 60) for _ in clients]
+            elapsed = time.perf_counter() - start
+            for client in clients:
+                client.join()
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+        requests = sum(r for r, _ in results)
+        errors = sum(e for _, e in results)
+        print(f"  {workers:<8} {requests / elapsed:>14.1f} {errors:>8d}")
+
+
+# ---------------------------------------------------------------------------
+# サーバープッシュ（SSE）
+# ---------------------------------------------------------------------------
+
+def _serve_app(port_queue, heartbeat):
+    """別プロセスでアプリを起動（スレッド方式の開発用サーバー）"""
+    import logging
+    from werkzeug.serving import make_server
+    import app as app_module
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app_module.EVENT_HEARTBEAT = heartbeat
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    server.socket.listen(4096)  # 同時接続のバックログを増やす
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def _process_status(pid):
+    """(RSS MB, スレッド数)（Linuxのみ）"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            fields = dict(line.split(':', 1) for line in f)
+    except OSError:
+        return None, None
+    return int(fields['VmRSS'].split()[0]) / 1024, int(fields['Threads'])
+
+
+def bench_events(args):
+    """/api/events の同時接続数・ハートビート・配信遅延の負荷試験"""
+    import http.client
+    import multiprocessing
+    import selectors
+    import socket
+    from events import EventBus
+
+    # 上限付きキュー：読み出さない接続では古いイベントから捨てる
+    bus = EventBus(max_pending=10)
+    slow = bus.subscribe('slow')
+    for i in range(100):
+        bus.publish('slow', 'battle_log', {'lines': [str(i)]})
+    events, dropped = slow.wait(0)
+    print(f"バックプレッシャー: 100件発行 → キュー {len(events)}件 / 破棄 {dropped}件")
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve_app, args=(port_queue, args.heartbeat), daemon=True)
+    server.start()
+    port = port_queue.get(timeout=30)
+    base_rss, base_threads = _process_status(server.pid)
+
+    def request(method, path, cookie=None):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        headers = {'Content-Type': 'application/json'}
+        if cookie:
+            headers['Cookie'] = cookie
+        conn.request(method, path, body='{"name": "負荷試験"}'.encode('utf-8') if method == 'POST' else None, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        return response
+
+    cookie = request('POST', '/api/start').getheader('Set-Cookie').split(';', 1)[0]
+    handshake = (f"GET /api/events HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: {cookie}\r\n"
+                 f"Accept: text/event-stream\r\n\r\n").encode()
+
+    selector = selectors.DefaultSelector()
+    buffers = {}
+    start = time.perf_counter()
+    for _ in range(args.connections):
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.sendall(handshake)
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ)
+        buffers[sock] = b''
+
+    def read_until(predicate, timeout):
+        """全接続の受信内容が predicate を満たすまで読む。満たした時刻を返す"""
+        done = {}
+        deadline = time.perf_counter() + timeout
+        while len(done) < len(buffers) and time.perf_counter() < deadline:
+            for key, _ in selector.select(timeout=0.1):
+                sock = key.fileobj
+                try:
+                    chunk = sock.recv(65536)
+                except BlockingIOError:
+                    continue
+                buffers[sock] += chunk
+                if sock not in done and predicate(buffers[sock]):
+                    done[sock] = time.perf_counter()
+        return done
+
+    connected = read_until(lambda data: b'retry:' in data, 60)
+    connect_time = time.perf_counter() - start
+    rss, threads = _process_status(server.pid)
+    print(f"\n同時接続: {len(connected)}/{args.connections} 接続確立 {connect_time:.2f}秒")
+    if rss is not None:
+        print(f"  サーバープロセス RSS {base_rss:.1f}MB → {rss:.1f}MB "
+              f"（{(rss - base_rss) * 1024 / max(1, len(connected)):.1f}KB/接続）  スレッド {base_threads} → {threads}")
+
+    for sock in buffers:
+        buffers[sock] = b''
+    heartbeats = read_until(lambda data: b': ping' in data, args.heartbeat * 3)
+    print(f"  ハートビート受信: {len(heartbeats)}/{len(buffers)}（間隔 {args.heartbeat}秒）")
+
+    # 戦闘アクション1回分のイベントが全接続に届くまでの時間
+    request('POST', '/api/adventure', cookie)
+    latencies = []
+    for _ in range(args.rounds):
+        for sock in buffers:
+            buffers[sock] = b''
+        sent = time.perf_counter()
+        request('POST', '/api/battle/action', cookie)
+        delivered = read_until(lambda data: b'event: battle_log' in data, 30)
+        latencies.extend(t - sent for t in delivered.values())
+        if len(delivered) < len(buffers):
+            print(f"  未着: {len(buffers) - len(delivered)}接続")
+    _print_latency(f'配信遅延（{args.rounds}回×{len(buffers)}接続）', latencies)
+
+    for sock in buffers:
+        selector.unregister(sock)
+        sock.close()
+    server.terminate()
+    server.join()
+    if len(connected) < args.connections or len(heartbeats) < len(buffers):
+        raise SystemExit(1)
+
+
+# ---------------------------------------------------------------------------
+# ベクトル化戦闘エンジン
+# ---------------------------------------------------------------------------
+
+def bench_vector_battle(args):
+    """NumPy版エンジンとBattle.execute_battleの戦闘/秒を比較（同値性は test_vector_battle.py）"""
+    from vector_battle import VectorBattle, run_object_engine
+
+    level, template_name, num_enemies, party_size = 3, '債権スライム', 3, 2
+    start = time.perf_counter()
+    run_object_engine(args.object_battles, level, template_name, num_enemies, party_size, seed=args.seed)
+    object_rate = args.object_battles / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    VectorBattle.from_template(args.vector_battles, level, template_name,
+                               num_enemies, party_size).run(seed=args.seed)
+    vector_rate = args.vector_battles / (time.perf_counter() - start)
+
+    print(f"オブジェクト版: {object_rate:12,.0f} 戦闘/秒")
+    print(f"NumPy版:        {vector_rate:12,.0f} 戦闘/秒  ({vector_rate / object_rate:.1f}倍)")
+
+
+# ---------------------------------------------------------------------------
+# モンスター出現テーブル
+# ---------------------------------------------------------------------------
+
+def _spawn_weights_linear(player_level):
+    """従来の get_random_monster と同じ重み計算（全テンプレートを毎回走査）"""
+    from monster import MONSTER_TEMPLATES
+    level_weights = {}
+    for template_name, template in MONSTER_TEMPLATES.items():
+        base_level = template.get('base_level', 1)
+        level_diff = abs(base_level - player_level)
+        if level_diff == 0:
+            weight = 10.0
+        elif level_diff == 1:
+            weight = 7.0
+        elif level_diff == 2:
+            weight = 4.0
+        elif level_diff == 3:
+            weight = 2.0
+        elif level_diff <= 5:
+            weight = 0.5
+        else:
+            weight = 0.1
+        if player_level <= 3 and base_level <= 3:
+            weight *= 2.0
+        elif player_level <= 5 and base_level <= 5:
+            weight *= 1.5
+        elif player_level <= 10 and base_level <= 10:
+            weight *= 1.2
+        level_weights[template_name] = weight
+    return level_weights
+
+
+def _sample_linear(player_level):
+    import random
+    level_weights = _spawn_weights_linear(player_level)
+    return random.choices(list(level_weights.keys()), weights=list(level_weights.values()))[0]
+
+
+def bench_spawn(args):
+    """出現テーブルの抽選速度（従来実装との分布の検定は test_spawn_table.py）"""
+    import random
+    from spawn_table import spawn_table
+
+    random.seed(args.seed)
+    level = args.level
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        _sample_linear(level)
+    linear = (time.perf_counter() - start) / args.iterations
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        spawn_table.sample(level)
+    alias = (time.perf_counter() - start) / args.iterations
+
+    start = time.perf_counter()
+    for _ in range(args.iterations // 3):
+        spawn_table.sample_many(level, 3)
+    alias_many = (time.perf_counter() - start) / (args.iterations // 3)
+
+    print(f"従来（全テンプレート走査）: {linear * 1e6:8.2f} µs/回")
+    print(f"エイリアステーブル:         {alias * 1e6:8.2f} µs/回  ({linear / alias:.1f}倍)")
+    print(f"3体まとめて抽選:            {alias_many * 1e6:8.2f} µs/回")
+
+
+# ---------------------------------------------------------------------------
+# モンスターのプロトタイプキャッシュ
+# ---------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=None)
+def _legacy_monster_class():
+    """__slots__ を持たず、__dict__ に報酬等を保持する従来のモンスタークラス"""
+    from character import Character
+
+    class LegacyMonster(Character):
+        pass
+
+    return LegacyMonster
+
+
+def _create_monster_legacy(template_name, level=1):
+    """従来の create_monster（テンプレートのコピーと補正計算を毎回行い、報酬等を各インスタンスに保持）"""
+    from character import CharacterType
+    from monster import MONSTER_TEMPLATES
+
+    template = MONSTER_TEMPLATES[template_name].copy()
+    base_level = template.get('base_level', 1)
+    level_multiplier = 1.0 + (level - base_level) * 0.15
+    monster = _legacy_monster_class()(template['name'], CharacterType.MONSTER,
+                        int(template['max_hp'] * level_multiplier),
+                        int(template['max_mp'] * level_multiplier),
+                        int(template['attack'] * level_multiplier),
+                        int(template['defense'] * level_multiplier))
+    monster.gold_reward = int(template['gold_reward'] * level_multiplier)
+    monster.f_ticket_reward = template['f_ticket_reward']
+    monster.recruitment_rate = template['recruitment_rate']
+    monster.base_level = base_level
+    monster.level = level
+    return monster
+
+
+def _measure_allocations(factory, names, count):
+    """(経過秒, 保持バイト/体, ピークバイト/体) を返す"""
+    import tracemalloc
+
+    # 計測外でキャッシュを温めておく（リクエストを繰り返す定常状態を想定）
+    for name in names:
+        factory(name, 5)
+
+    start = time.perf_counter()
+    for i in range(count):
+        factory(names[i % len(names)], 5)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    monsters = [factory(names[i % len(names)], 5) for i in range(count)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del monsters
+    return elapsed, current / count, peak / count
+
+
+def bench_monster_cache(args):
+    """create_monster のアロケーション量と速度を従来実装と比較"""
+    from monster import MONSTER_TEMPLATES, create_monster, get_monster_prototype
+
+    names = list(MONSTER_TEMPLATES.keys())[:args.templates]
+    results = [
+        ('従来（毎回コピー）', _measure_allocations(_create_monster_legacy, names, args.count)),
+        ('プロトタイプキャッシュ', _measure_allocations(create_monster, names, args.count)),
+    ]
+    print(f"{args.count}体生成（テンプレート{len(names)}種, レベル5）")
+    for label, (elapsed, retained, peak) in results:
+        print(f"  {label:<14} {elapsed / args.count * 1e6:7.2f} µs/体  "
+              f"保持 {retained:7.1f} B/体  ピーク {peak:7.1f} B/体")
+    print(f"  キャッシュ: {get_monster_prototype.cache_info()}")
+
+
+# ---------------------------------------------------------------------------
+# オブジェクトのメモリ使用量
+# ---------------------------------------------------------------------------
+
+MEMORY_MODULES = ['character.py', 'monster.py', 'item.py', 'party.py', 'player.py']
+
+
+def _populated_player():
+    """パーティ4人が全員装備し、所持品を持ったプレイヤー"""
+    from monster import create_monster
+    from player import Player
+
+    player = Player()
+    player.gold = 10 ** 9
+    player.f_tickets = 10 ** 6
+    player.create_main_character('冒険者')
+    for name in ('インフレゴブリン', 'デフレスライム', 'コインスライム'):
+        player.party.add_member(create_monster(name, 5))
+    for _ in range(10):
+        player.buy_weapon('鉄の剣')
+        player.buy_armor('布の服')
+    player.buy_consumable('薬草', quantity=5)
+    for member in player.party.members:
+        player.equip_weapon_to_character(member, '鉄の剣')
+        player.equip_armor_to_character(member, '布の服')
+    return player
+
+
+def measure_object_sizes(count=10000):
+    """Character / Monster / Player 1つあたりの保持バイト数（tracemalloc）"""
+    import gc
+    import tracemalloc
+    from character import Character, CharacterType
+    from monster import create_monster
+
+    factories = [
+        ('Character', lambda: Character('冒険者', CharacterType.HUMAN, 100, 20, 15, 10)),
+        ('Monster', lambda: create_monster('インフレゴブリン', 5)),
+        ('Player（装備・所持品込み）', _populated_player),
+    ]
+    sizes = {}
+    for label, factory in factories:
+        factory()  # キャッシュ等を計測外で初期化
+        gc.collect()
+        n = count if label != 'Player（装備・所持品込み）' else max(1, count // 10)
+        tracemalloc.start()
+        objects = [factory() for _ in range(n)]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del objects
+        sizes[label] = current / n
+    return sizes
+
+
+def bench_memory(args):
+    """オブジェクト1つあたりのメモリ使用量（--compare-rev で別リビジョンと比較）"""
+    import json
+    import subprocess
+    import sys
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    columns = [('現在', measure_object_sizes(args.count))]
+
+    if args.compare_rev:
+        # 指定リビジョンのモデルクラスを一時ディレクトリに展開し、別プロセスで同じ計測を行う
+        tmp_dir = tempfile.mkdtemp()
+        prefix = subprocess.run(['git', 'rev-parse', '--show-prefix'], cwd=here,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        for module in MEMORY_MODULES:
+            source = subprocess.run(['git', 'show', f'{args.compare_rev}:{prefix}{module}'], cwd=here,
+                                    capture_output=True, check=True).stdout
+            with open(os.path.join(tmp_dir, module), 'wb') as f:
+                f.write(source)
+        code = ('import sys, json; sys.path[:0] = [sys.argv[1], sys.argv[2]]; '
+                'import benchmark; print(json.dumps(benchmark.measure_object_sizes(int(sys.argv[3]))))')
+        output = subprocess.run([sys.executable, '-c', code, tmp_dir, here, str(args.count)],
+                                cwd=tmp_dir, capture_output=True, text=True, check=True).stdout
+        columns.insert(0, (args.compare_rev, json.loads(output)))
+
+    print(f"{'':<28}" + ''.join(f'{label:>16}' for label, _ in columns))
+    for key in columns[-1][1]:
+        print(f'{key:<28}' + ''.join(f'{sizes[key]:>14.1f} B' for _, sizes in columns))
+
+
+# ---------------------------------------------------------------------------
+# テンプレート索引によるシリアライズ
+# ---------------------------------------------------------------------------
+
+def _legacy_battle_state(battle):
+    """従来の Battle.get_battle_state（キャラクターごとに全テンプレートを走査して絵文字を探す）"""
+    from monster import MONSTER_TEMPLATES, Monster
+
+    def serialize(char):
+        emoji = '👤'
+        if isinstance(char, Monster):
+            for template in MONSTER_TEMPLATES.values():
+                if template['name'] == char.name:
+                    emoji = template.get('emoji', '👤')
+                    break
+        return {'name': char.name, 'character_type': char.character_type.value,
+                'hp': char.hp, 'max_hp': char.max_hp, 'mp': char.mp, 'max_mp': char.max_mp,
+                'level': char.level, 'emoji': emoji, 'is_alive': char.is_alive()}
+
+    return {
+        'turn': battle.turn,
+        'is_player_turn': battle.is_player_turn,
+        'current_character_index': battle.current_character_index,
+        'player_party': [serialize(c) for c in battle.player_party.members],
+        'enemy_party': [serialize(c) for c in battle.enemy_party.members],
+        'battle_id': battle.log.battle_id,
+        'battle_log': battle.log.messages(),
+        'is_battle_over': battle.player_party.is_all_dead() or battle.enemy_party.is_all_dead()
+    }
+
+
+def bench_serialize_battle(args):
+    """4対3の戦闘状態のシリアライズ時間（表示名での線形探索 vs テンプレート索引）"""
+    from battle import Battle
+    from monster import MONSTER_TEMPLATES, create_monster
+    from party import Party
+
+    # 索引の効果が出るよう、テンプレート一覧の後ろの方のモンスターを使う
+    names = list(MONSTER_TEMPLATES.keys())
+    player = _populated_player()
+    enemy_party = Party()
+    for name in names[-3:]:
+        enemy_party.add_member(create_monster(name, 5))
+    battle = Battle(player.party, enemy_party)
+
+    results = []
+    for label, func in [('従来（線形探索）', _legacy_battle_state), ('テンプレート索引', Battle.get_battle_state)]:
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            func(battle)
+        results.append((label, (time.perf_counter() - start) / args.iterations))
+
+    print(f"4対3の戦闘状態のシリアライズ（{args.iterations}回）")
+    for label, elapsed in results:
+        print(f"  {label:<12} {elapsed * 1e6:8.2f} µs/回")
+    print(f"  {results[0][1] / results[1][1]:.1f}倍")
+
+
+# ---------------------------------------------------------------------------
+# 戦闘ログ
+# ---------------------------------------------------------------------------
+
+def _boss_battle():
+    """倒れない4対1のボス戦"""
+    from battle import Battle
+    from monster import create_monster
+    from party import Party
+
+    player = _populated_player()
+    enemy_party = Party()
+    enemy_party.add_member(create_monster('インフレゴブリン', 50))
+    for member in player.party.members + enemy_party.members:
+        member.max_hp = member.hp = 10 ** 12
+    return Battle(player.party, enemy_party, record=True)
+
+
+def bench_battle_log(args):
+    """長いボス戦の戦闘ログ：メモリ使用量・セグメントへの追記とページ単位の読み出し"""
+    import tracemalloc
+    from battle_log import BattleLogStore
+
+    actions = [{'action_type': 'attack', 'target_index': 0}] * 4
+
+    # 従来と同じく全行を文字列のリストに残す場合と、ターンごとにセグメントへ書き出す場合
+    with tempfile.TemporaryDirectory() as directory:
+        store = BattleLogStore(directory, segment_events=args.segment)
+        results = {}
+        for mode in ('list', 'store'):
+            battle = _boss_battle()
+            lines = []
+            tracemalloc.start()
+            start = time.perf_counter()
+            for _ in range(args.turns):
+                battle.player_turn(actions)
+                events = battle.log.drain()
+                if mode == 'list':
+                    lines.extend(event.message for event in events)
+                else:
+                    store.append('bench', battle.log.battle_id, events)
+            elapsed = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[mode] = (current, peak, elapsed)
+
+        print(f"{args.turns}ターンのボス戦（{battle.log.count}イベント）")
+        for mode, label in (('list', '全行をリストに保持'), ('store', 'セグメントに追記')):
+            current, peak, elapsed = results[mode]
+            print(f"  {label:<14} 保持 {current / 1024:9.1f} KB  ピーク {peak / 1024:9.1f} KB  "
+                  f"{elapsed / args.turns * 1e6:7.1f} µs/ターン")
+
+        # 全イベントをページ単位で読み戻す（順序・内容の検証は test_battle_log.py）
+        battle_id = battle.log.battle_id
+        total = store.count('bench', battle_id)
+        start = time.perf_counter()
+        offset = 0
+        while offset < total:
+            offset += len(store.read('bench', battle_id, offset, args.page))
+        elapsed = time.perf_counter() - start
+        print(f"  全{total}件を{args.page}件ずつ読み出し: {elapsed * 1000:.1f} ms")
+
+        for offset in (0, total // 2, total - args.page):
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                store.read('bench', battle_id, offset, args.page)
+            elapsed = (time.perf_counter() - start) / args.iterations
+            print(f"  offset {offset:>8} から{args.page}件: {elapsed * 1000:.3f} ms")
+
+
+def bench_replay(args):
+    """戦闘のリプレイ：保存サイズ（状態の pickle・JSON vs リプレイ）と一括再生の検証"""
+    import json
+    import pickle
+    import random
+    from battle import AutoPolicy, Battle
+    from monster import get_random_monsters
+    from party import Party
+    from replay import BattleReplay, new_seed, outcome
+
+    # /api/battle/turn で1ターンずつ進めた戦闘（4人パーティ・敵1〜3体）
+    rng = random.Random(args.seed)
+    policy = AutoPolicy()
+    replays, sizes = [], {'pickle': [], 'json': [], 'replay': []}
+    for _ in range(args.battles):
+        player = _populated_player()
+        enemy_party = Party()
+        for monster in get_random_monsters(5, rng.randint(1, 3), rng):
+            enemy_party.add_member(monster)
+        battle = Battle(player.party, enemy_party, seed=new_seed(rng), record=True)
+        lines = []
+        while not battle.player_party.is_all_dead() and not battle.enemy_party.is_all_dead():
+            alive_enemies = battle.enemy_party.get_alive_members()
+            battle.player_turn([policy.choose(actor, alive_enemies) for actor in battle.player_party.get_alive_members()])
+            lines.extend(event.message for event in battle.log.drain())
+        battle.replay.finish(battle)
+
+        # 従来は戦闘の属性（全ログ付き）をそのまま pickle していた
+        legacy = {k: v for k, v in vars(battle).items() if k not in ('log', 'rng', 'replay', 'seed')}
+        sizes['pickle'].append(len(pickle.dumps(dict(legacy, battle_log=lines), protocol=pickle.HIGHEST_PROTOCOL)))
+        sizes['json'].append(len(json.dumps(dict(battle.get_battle_state(), battle_log=lines),
+                                            ensure_ascii=False).encode('utf-8')))
+        data = battle.replay.encode()
+        sizes['replay'].append(len(data))
+        replays.append((data, outcome(battle)))
+
+    print(f"{args.battles}戦闘（4人パーティ・/api/battle/turn で進行）の保存サイズ（平均）")
+    for label, key in (('状態の pickle', 'pickle'), ('状態の JSON', 'json'), ('リプレイ', 'replay')):
+        print(f"  {label:<12} {statistics.mean(sizes[key]):8.0f} B")
+    print(f"  リプレイは pickle の {statistics.mean(sizes['pickle']) / statistics.mean(sizes['replay']):.1f}分の1")
+
+    # 長いボス戦（自動戦闘）：状態はログの分だけ大きくなるが、リプレイは方針1件だけ
+    battle = _boss_battle()
+    battle.auto_resolve(policy, max_turns=args.boss_turns)
+    lines = [event.message for event in battle.log.drain()]
+    legacy = {k: v for k, v in vars(battle).items() if k not in ('log', 'rng', 'replay', 'seed')}
+    boss_pickle = len(pickle.dumps(dict(legacy, battle_log=lines), protocol=pickle.HIGHEST_PROTOCOL))
+    battle.replay.finish(battle)
+    boss_replay = battle.replay.encode()
+    print(f"{args.boss_turns}ターンの自動のボス戦: 状態の pickle {boss_pickle:,} B → リプレイ {len(boss_replay)} B"
+          f"（{boss_pickle / len(boss_replay):,.0f}分の1）")
+    replays.append((boss_replay, outcome(battle)))
+
+    # 保存したリプレイを一括で再生し、記録した結果・元の戦闘の結果と照合する
+    start = time.perf_counter()
+    mismatches = 0
+    for data, expected in replays:
+        replay = BattleReplay.decode(data)
+        mismatches += not replay.verify() or replay.outcome != expected
+    elapsed = time.perf_counter() - start
+    print(f"  一括再生: {len(replays) / elapsed:,.0f} 戦闘/秒（不一致 {mismatches}件）")
+
+    # 結果を書き換えたリプレイは検出されること
+    tampered = BattleReplay.decode(replays[0][0])
+    tampered.outcome[0] += 1
+    detected = not tampered.verify()
+    print(f"  書き換えたリプレイの検出: {'OK' if detected else 'NG'}")
+    if mismatches or not detected:
+        raise SystemExit(1)
+
+
+# ---------------------------------------------------------------------------
+# ゲーム状態のコーデック
+# ---------------------------------------------------------------------------
+
+def bench_codec(args):
+    """コーデックのエンコード・デコード速度（従来のJSONとの比較。往復テストは test_codec.py）"""
+    import json
+    import app
+    import codec
+    from f_ticket import FTicketSystem
+    from state_store import GameState
+
+    state = GameState(_populated_player(), FTicketSystem(), 3, 10, economy_tick=12345)
+    lazy = codec.decode_state(codec.encode_state(state, 'binary'))
+    lazy.economy_tick
+    print(f"遅延デコード: economy_tick のみ参照後に player 未復元 = {not lazy.is_player_loaded}")
+
+    formats = [
+        ('従来JSON', lambda s: json.dumps(app.serialize_game_state(*s.as_tuple())),
+         lambda d: GameState(*app.deserialize_game_state(json.loads(d)))),
+        ('codec json', lambda s: codec.encode_state(s, 'json'), codec.decode_state),
+        ('codec binary', lambda s: codec.encode_state(s, 'binary'), codec.decode_state),
+    ]
+    print(f"\nパーティ4人・装備20個の状態（{args.iterations}回, msgpack={'あり' if codec.msgpack else 'なし（純Python）'}）")
+    print(f"  {'形式':<14} {'サイズ':>8} {'encode':>12} {'decode':>12} {'decode+player':>14}")
+    for label, encode, decode in formats:
+        data = encode(state)
+        size = len(data.encode('utf-8') if isinstance(data, str) else data)
+
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            encode(state)
+        encode_time = (time.perf_counter() - start) / args.iterations
+
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            decode(data).current_area
+        decode_time = (time.perf_counter() - start) / args.iterations
+
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            decode(data).player
+        full_time = (time.perf_counter() - start) / args.iterations
+
+        print(f"  {label:<14} {size:>7}B {encode_time * 1e6:>10.1f}µs {decode_time * 1e6:>10.1f}µs "
+              f"{full_time * 1e6:>12.1f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='金融知識学習RPG ベンチマーク')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p = subparsers.add_parser('session-store', help='状態ストア別のAPIレイテンシ')
+    p.add_argument('--iterations', type=int, default=300)
+    p.add_argument('--inventory', type=int, default=20, help='事前に購入する武器の数')
+    p.add_argument('--stores', nargs='+', default=['cookie', 'memory', 'sqlite'])
+    p.set_defaults(func=bench_session_store)
+
+    p = subparsers.add_parser('vector-battle', help='NumPy版戦闘エンジンの速度')
+    p.add_argument('--object-battles', type=int, default=5000)
+    p.add_argument('--vector-battles', type=int, default=200000)
+    p.add_argument('--seed', type=int, default=1)
+    p.set_defaults(func=bench_vector_battle)
+
+    p = subparsers.add_parser('spawn', help='モンスター出現テーブルの速度')
+    p.add_argument('--level', type=int, default=1)
+    p.add_argument('--iterations', type=int, default=100000)
+    p.add_argument('--seed', type=int, default=1)
+    p.set_defaults(func=bench_spawn)
+
+    p = subparsers.add_parser('monster-cache', help='create_monster のアロケーション量（tracemalloc）')
+    p.add_argument('--count', type=int, default=20000)
+    p.add_argument('--templates', type=int, default=20)
+    p.set_defaults(func=bench_monster_cache)
+
+    p = subparsers.add_parser('memory', help='Character/Monster/Player 1つあたりのメモリ使用量')
+    p.add_argument('--count', type=int, default=10000)
+    p.add_argument('--compare-rev', help='比較対象のgitリビジョン（例: HEAD~1）')
+    p.set_defaults(func=bench_memory)
+
+    p = subparsers.add_parser('serialize-battle', help='4対3の戦闘状態のシリアライズ時間')
+    p.add_argument('--iterations', type=int, default=20000)
+    p.set_defaults(func=bench_serialize_battle)
+
+    p = subparsers.add_parser('battle-log', help='長いボス戦の戦闘ログのメモリ使用量とページ単位の読み出し')
+    p.add_argument('--turns', type=int, default=20000)
+    p.add_argument('--segment', type=int, default=1000, help='1セグメントのイベント数')
+    p.add_argument('--page', type=int, default=100)
+    p.add_argument('--iterations', type=int, default=200)
+    p.set_defaults(func=bench_battle_log)
+
+    p = subparsers.add_parser('replay', help='戦闘のリプレイの保存サイズと一括再生の検証')
+    p.add_argument('--battles', type=int, default=1000)
+    p.add_argument('--boss-turns', type=int, default=1000)
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_replay)
+
+    p = subparsers.add_parser('codec', help='ゲーム状態コーデックの速度')
+    p.add_argument('--iterations', type=int, default=2000)
+    p.set_defaults(func=bench_codec)
+
+    p = subparsers.add_parser('battle-turn', help='1ターンあたりのリクエスト数とCPU時間')
+    p.add_argument('--turns', type=int, default=300)
+    p.add_argument('--stores', nargs='+', default=['memory', 'sqlite', 'cookie'],
+                   choices=['memory', 'sqlite', 'cookie'])
+    p.set_defaults(func=bench_battle_turn)
+
+    p = subparsers.add_parser('battle-auto', help='1戦闘あたりのリクエスト数とCPU時間（自動戦闘）')
+    p.add_argument('--battles', type=int, default=200)
+    p.set_defaults(func=bench_battle_auto)
+
+    p = subparsers.add_parser('metrics', help='メトリクスの計測コストと /metrics の出力形式の検証')
+    p.add_argument('--battles', type=int, default=20, help='1回あたりの戦闘数')
+    p.add_argument('--rounds', type=int, default=7)
+    p.set_defaults(func=bench_metrics)
+
+    p = subparsers.add_parser('profiler', help='プロファイラーのコストと保存したプロファイルの整合性')
+    p.add_argument('--battles', type=int, default=20, help='1回あたりの戦闘数')
+    p.add_argument('--rounds', type=int, default=7)
+    p.add_argument('--rate', type=float, default=0.1, help='計測するリクエストの割合')
+    p.add_argument('--keep', type=int, default=20)
+    p.set_defaults(func=bench_profiler)
+
+    p = subparsers.add_parser('shop-catalog', help='ショップカタログのCPU時間と転送量')
+    p.add_argument('--iterations', type=int, default=2000)
+    p.set_defaults(func=bench_shop_catalog)
+
+    p = subparsers.add_parser('assets', help='メインページと静的ファイルのCPU時間・転送量')
+    p.add_argument('--iterations', type=int, default=2000)
+    p.set_defaults(func=bench_assets)
+
+    p = subparsers.add_parser('item-index', help='予算内で最も強い装備の検索（線形走査 vs インデックス）')
+    p.add_argument('--items', type=int, default=100000)
+    p.add_argument('--queries', type=int, default=10000)
+    p.add_argument('--linear-queries', type=int, default=200, help='線形走査でも検索して比べる件数')
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_item_index)
+
+    p = subparsers.add_parser('inventory', help='武器を大量に持つプレイヤーの購入・装備・保存サイズ')
+    p.add_argument('--items', type=int, default=10000)
+    p.add_argument('--iterations', type=int, default=1000)
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_inventory)
+
+    p = subparsers.add_parser('economy', help='経済の推移の一括生成と予測の検証')
+    p.add_argument('--paths', type=int, default=1000000)
+    p.add_argument('--loop-paths', type=int, default=20000, help='change_condition で1経路ずつ生成する数')
+    p.add_argument('--steps', type=int, default=10)
+    p.add_argument('--iterations', type=int, default=1000)
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_economy)
+
+    p = subparsers.add_parser('world-economy', help='世界共通の経済の読み取りコストとプロセス間の一致')
+    p.add_argument('--interval', type=float, default=60.0, help='ティックの間隔（秒）')
+    p.add_argument('--iterations', type=int, default=10000)
+    p.add_argument('--processes', type=int, default=4)
+    p.add_argument('--samples', type=int, default=20)
+    p.add_argument('--seed', type=int, default=0)
+    p.set_defaults(func=bench_world_economy)
+
+    p = subparsers.add_parser('delta', help='差分レスポンスのサイズと検証')
+    p.add_argument('--actions', type=int, default=300)
+    p.add_argument('--inventory', type=int, default=20, help='事前に購入する武器の数')
+    p.set_defaults(func=bench_delta)
+
+    p = subparsers.add_parser('server', help='server.py のワーカー数ごとのスループット')
+    p.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    p.add_argument('--clients', type=int, default=16, help='同時に負荷をかけるクライアントプロセス数')
+    p.add_argument('--duration', type=float, default=10.0, help='計測時間（秒）')
+    p.set_defaults(func=bench_server)
+
+    p = subparsers.add_parser('events', help='/api/events（SSE）の同時接続の負荷試験')
+    p.add_argument('--connections', type=int, default=2000)
+    p.add_argument('--heartbeat', type=float, default=2.0, help='ハートビート間隔（秒）')
+    p.add_argument('--rounds', type=int, default=5, help='配信遅延を測る戦闘アクションの回数')
+    p.set_defaults(func=bench_events)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ショップカタログとF券の価値の予測のレスポンス（/api/shop/items, /api/economy/forecast）
+
+カタログ（item.py の WEAPONS, ARMORS, CONSUMABLES）はプロセス中で変わらないので、
+?type= と ?fields= の組み合わせごとにJSONとgzip圧縮済みのバイト列を一度だけ作り、
+本文のハッシュを強いETagとしてキャッシュする。
+
+F券の価値の予測（/api/economy/forecast）も同じく、economy.py のモデルの予測を
+(行列のバージョン, 状況, 基本価値, 期間) ごとにエンコード済みで保持する。
+"""
+
+import json
+
+from assets import EncodedBody
+from economy import ECONOMY, EconomyModel
+from f_ticket import EconomyCondition
+from item import WEAPONS, ARMORS, CONSUMABLES
+from state_store import MemoryStateStore
+
+# レスポンスでの並び順
+CATALOG_TYPES = ('weapons', 'armors', 'consumables')
+
+
+def _weapon_entry(w) -> dict:
+    return {
+        'name': w.name,
+        'attack_bonus': w.attack_bonus,
+        'price_gold': w.price_gold,
+        'price_f_tickets': w.price_f_tickets,
+        'description': w.description,
+        'emoji': '⚔️'
+    }
+
+
+def _armor_entry(a) -> dict:
+    return {
+        'name': a.name,
+        'defense_bonus': a.defense_bonus,
+        'price_gold': a.price_gold,
+        'price_f_tickets': a.price_f_tickets,
+        'description': a.description,
+        'emoji': '🛡️'
+    }
+
+
+def _consumable_entry(c) -> dict:
+    return {
+        'name': c.name,
+        'hp_restore': c.hp_restore,
+        'mp_restore': c.mp_restore,
+        'price_gold': c.price_gold,
+        'price_f_tickets': c.price_f_tickets,
+        'description': c.description,
+        'emoji': c.emoji
+    }
+
+
+def build_catalog() -> dict:
+    """カタログ全体（種類ごとのアイテムのリスト）"""
+    return {
+        'weapons': [_weapon_entry(w) for w in WEAPONS.values()],
+        'armors': [_armor_entry(a) for a in ARMORS.values()],
+        'consumables': [_consumable_entry(c) for c in CONSUMABLES.values()],
+    }
+
+
+class CatalogRequestError(ValueError):
+    """?type= / ?fields= の指定が不正"""
+
+
+class CatalogCache:
+    """(種類, 項目) の組み合わせごとのエンコード済みのレスポンス（EncodedBody）を保持する"""
+
+    def __init__(self, max_entries: int = 256):
+        self._catalog = build_catalog()
+        self.fields = frozenset(key for items in self._catalog.values() for item in items for key in item)
+        self._compiled = MemoryStateStore(max_entries=max_entries, ttl=float('inf'))
+
+    def parse(self, type_param: str = None, fields_param: str = None):
+        """クエリ文字列を正規化したキー (types, fields) に変換（順序・重複の違いは同じキー）"""
+        types = CATALOG_TYPES
+        if type_param:
+            requested = {t.strip() for t in type_param.split(',') if t.strip()}
+            unknown = requested - set(CATALOG_TYPES)
+            if unknown or not requested:
+                raise CatalogRequestError(f"不明な種類です: {', '.join(sorted(unknown)) or type_param}")
+            types = tuple(t for t in CATALOG_TYPES if t in requested)
+
+        fields = None
+        if fields_param:
+            requested = {f.strip() for f in fields_param.split(',') if f.strip()}
+            unknown = requested - self.fields
+            if unknown or not requested:
+                raise CatalogRequestError(f"不明な項目です: {', '.join(sorted(unknown)) or fields_param}")
+            fields = tuple(sorted(requested))
+        return types, fields
+
+    def get(self, types: tuple = CATALOG_TYPES, fields: tuple = None) -> EncodedBody:
+        """正規化したキーのレスポンスを返す（初回だけエンコード・圧縮する）"""
+        key = (types, fields)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            document = {'success': True}
+            for catalog_type in types:
+                items = self._catalog[catalog_type]
+                if fields is not None:
+                    items = [{f: item[f] for f in fields if f in item} for item in items]
+                document[catalog_type] = items
+            body = json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            compiled = EncodedBody(body, 'application/json')
+            self._compiled.set(key, compiled)
+        return compiled
+
+
+class ForecastCache:
+    """/api/economy/forecast のレスポンスを (行列のバージョン, 状況, 基本価値, 期間) ごとに保持する"""
+
+    def __init__(self, model: EconomyModel = ECONOMY, max_entries: int = 1024):
+        self.model = model
+        self._compiled = MemoryStateStore(max_entries=max_entries, ttl=float('inf'))
+
+    def get(self, condition: EconomyCondition, base_value: int, horizon: int) -> EncodedBody:
+        model = self.model
+        key = (model.version, condition, base_value, horizon)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            document = {'success': True, **model.forecast_summary(condition, base_value, horizon)}
+            body = json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            compiled = EncodedBody(body, 'application/json')
+            self._compiled.set(key, compiled)
+        return compiled
@@ -15,6 +15,21 @@ class CharacterType(Enum):
 class Character:
     """キャラクター基本クラス"""
     
+    __slots__ = ('name', 'character_type', 'max_hp', 'max_mp', 'hp', 'mp',
+                 'base_attack', 'base_defense', 'attack', 'defense',
+                 'level', 'experience', 'equipped_weapon', 'equipped_armor')
+    
+    # 魔法の定義
+    SPELLS = {
+        'メラ': {'mp_cost': 3, 'damage_multiplier': 1.5, 'description': '敵に炎のダメージを与える'},
+        'ギラ': {'mp_cost': 5, 'damage_multiplier': 2.0, 'description': '敵に強力な炎のダメージを与える'},
+        'ホイミ': {'mp_cost': 3, 'heal_amount': 30, 'description': 'HPを回復する'},
+        'ベホイミ': {'mp_cost': 8, 'heal_amount': 80, 'description': 'HPを大幅に回復する'},
+    }
+    
+    # 生成したキャラクターの種類（クラス名）を受け取るフック（app.py がメトリクスにつなぐ。Noneなら何もしない）
+    on_created = None
+    
     def __init__(self, name: str, character_type: CharacterType, 
                  max_hp: int, max_mp: int, attack: int, defense: int):
         self.name = name
@@ -31,6 +46,8 @@ class Character:
         self.experience = 0
         self.equipped_weapon = None
         self.equipped_armor = None
+        if Character.on_created is not None:
+            Character.on_created(type(self).__name__)
         
     def take_damage(self, damage: int) -> int:
         """ダメージを受ける"""
@@ -85,6 +102,10 @@ class Character:
         self.mp = self.max_mp
         self.base_attack += 2
         self.base_defense += 2
+        self.reset_stats()
+    
+    def reset_stats(self):
+        """攻撃力・防御力を基本値と装備から計算し直す（防御による一時的な補正を戻す）"""
         self.attack = self.base_attack
         self.defense = self.base_defense
         if self.equipped_weapon:
@@ -104,17 +125,10 @@ class Character:
     
     def use_spell(self, spell_name: str, target=None) -> dict:
         """魔法を使用"""
-        spells = {
-            'メラ': {'mp_cost': 3, 'damage_multiplier': 1.5, 'description': '敵に炎のダメージを与える'},
-            'ギラ': {'mp_cost': 5, 'damage_multiplier': 2.0, 'description': '敵に強力な炎のダメージを与える'},
-            'ホイミ': {'mp_cost': 3, 'heal_amount': 30, 'description': 'HPを回復する'},
-            'ベホイミ': {'mp_cost': 8, 'heal_amount': 80, 'description': 'HPを大幅に回復する'},
-        }
-        
-        if spell_name not in spells:
+        if spell_name not in self.SPELLS:
             return {'success': False, 'message': '未知の魔法です'}
         
-        spell = spells[spell_name]
+        spell = self.SPELLS[spell_name]
         
         if self.mp < spell['mp_cost']:
             return {'success': False, 'message': 'MPが足りません'}
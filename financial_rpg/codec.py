@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ゲーム状態のコーデック（Cookie・SQLiteストア用）
+
+Player / Party / Character をスキーマに従って位置ベースのリストに変換し、
+JSON またはmsgpack形式のバイナリにエンコードする。
+
+- 武器・防具・消費アイテムはカタログID（item.py の WEAPON_IDS などで固定）と個数で保存する
+- 装備はカタログIDで保存し、復元時に所持品の1個を装備中にする
+- プレイヤー部分は最初にアクセスされたときに復元する（遅延デコード）
+- 経済は世界共通（economy.WorldEconomy）なので、最後に見たティックだけを保存する
+
+スキーマにフィールドを追加するときは末尾に追加する。古いデータに存在しない
+フィールドは初期値のまま残るので、CODEC_VERSION を上げずに読み込める。
+バージョン1（所持品を1個ずつ並べた形式）のデータは読み込み時に変換する。
+バージョン2以前のセッションごとのF券システムは読み込み時に捨てる。
+"""
+
+import json
+import struct
+
+from character import Character, CharacterType
+from inventory import Inventory
+from item import WEAPONS, ARMORS, CONSUMABLES, WEAPON_IDS, ARMOR_IDS, CONSUMABLE_IDS
+from metrics import METRICS
+from monster import Monster, get_monster_prototype, get_template_info
+from player import Player
+from state_store import GameState
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack は任意
+    msgpack = None
+
+CODEC_VERSION = 3
+BINARY_MAGIC = b'FRPG'
+
+
+class CodecError(ValueError):
+    """デコードできないデータ"""
+
+
+class UnsupportedVersionError(CodecError):
+    """対応していないバージョンのデータ（コーデック導入前のJSONは version=0）"""
+
+    def __init__(self, version):
+        super().__init__(f"Unsupported game state version: {version}")
+        self.version = version
+
+
+# ---------------------------------------------------------------------------
+# msgpack形式（msgpackが無い環境用の純Python実装。仕様のサブセット）
+# ---------------------------------------------------------------------------
+
+def _pack(obj, out: bytearray):
+    if obj is None:
+        out.append(0xc0)
+    elif obj is True:
+        out.append(0xc3)
+    elif obj is False:
+        out.append(0xc2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xff)
+        elif 0 <= obj <= 0xff:
+            out += b'\xcc' + struct.pack('>B', obj)
+        elif 0 <= obj <= 0xffff:
+            out += b'\xcd' + struct.pack('>H', obj)
+        elif 0 <= obj <= 0xffffffff:
+            out += b'\xce' + struct.pack('>I', obj)
+        elif 0 <= obj <= 0xffffffffffffffff:
+            out += b'\xcf' + struct.pack('>Q', obj)
+        elif -0x80 <= obj:
+            out += b'\xd0' + struct.pack('>b', obj)
+        elif -0x8000 <= obj:
+            out += b'\xd1' + struct.pack('>h', obj)
+        elif -0x80000000 <= obj:
+            out += b'\xd2' + struct.pack('>i', obj)
+        elif -0x8000000000000000 <= obj:
+            out += b'\xd3' + struct.pack('>q', obj)
+        else:
+            raise OverflowError(f"Integer out of range: {obj}")
+    elif isinstance(obj, float):
+        out += b'\xcb' + struct.pack('>d', obj)
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        n = len(data)
+        if n < 32:
+            out.append(0xa0 | n)
+        elif n <= 0xff:
+            out += b'\xd9' + struct.pack('>B', n)
+        elif n <= 0xffff:
+            out += b'\xda' + struct.pack('>H', n)
+        else:
+            out += b'\xdb' + struct.pack('>I', n)
+        out += data
+    elif isinstance(obj, (bytes, bytearray)):
+        n = len(obj)
+        if n <= 0xff:
+            out += b'\xc4' + struct.pack('>B', n)
+        elif n <= 0xffff:
+            out += b'\xc5' + struct.pack('>H', n)
+        else:
+            out += b'\xc6' + struct.pack('>I', n)
+        out += obj
+    elif isinstance(obj, (list, tuple)):
+        n = len(obj)
+        if n < 16:
+            out.append(0x90 | n)
+        elif n <= 0xffff:
+            out += b'\xdc' + struct.pack('>H', n)
+        else:
+            out += b'\xdd' + struct.pack('>I', n)
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, dict):
+        n = len(obj)
+        if n < 16:
+            out.append(0x80 | n)
+        elif n <= 0xffff:
+            out += b'\xde' + struct.pack('>H', n)
+        else:
+            out += b'\xdf' + struct.pack('>I', n)
+        for key, value in obj.items():
+            _pack(key, out)
+            _pack(value, out)
+    else:
+        raise TypeError(f"Cannot pack {type(obj).__name__}")
+
+
+# 固定長の型: 先頭バイト -> (structフォーマット, バイト数)
+_FIXED = {
+    0xcc: ('>B', 1), 0xcd: ('>H', 2), 0xce: ('>I', 4), 0xcf: ('>Q', 8),
+    0xd0: ('>b', 1), 0xd1: ('>h', 2), 0xd2: ('>i', 4), 0xd3: ('>q', 8),
+    0xca: ('>f', 4), 0xcb: ('>d', 8),
+}
+# 長さ付きの型: 先頭バイト -> (長さのstructフォーマット, バイト数, 種類)
+_SIZED = {
+    0xd9: ('>B', 1, 'str'), 0xda: ('>H', 2, 'str'), 0xdb: ('>I', 4, 'str'),
+    0xc4: ('>B', 1, 'bin'), 0xc5: ('>H', 2, 'bin'), 0xc6: ('>I', 4, 'bin'),
+    0xdc: ('>H', 2, 'array'), 0xdd: ('>I', 4, 'array'),
+    0xde: ('>H', 2, 'map'), 0xdf: ('>I', 4, 'map'),
+}
+
+
+def _unpack(data, pos: int):
+    """data[pos:] から1つ取り出し、(値, 次の位置) を返す"""
+    b = data[pos]
+    pos += 1
+    if b < 0x80:
+        return b, pos
+    if b >= 0xe0:
+        return b - 0x100, pos
+    if 0xa0 <= b <= 0xbf:
+        n = b & 0x1f
+        return data[pos:pos + n].decode('utf-8'), pos + n
+    if 0x90 <= b <= 0x9f:
+        return _unpack_array(data, pos, b & 0x0f)
+    if 0x80 <= b <= 0x8f:
+        return _unpack_map(data, pos, b & 0x0f)
+    if b == 0xc0:
+        return None, pos
+    if b == 0xc2:
+        return False, pos
+    if b == 0xc3:
+        return True, pos
+    if b in _FIXED:
+        fmt, size = _FIXED[b]
+        return struct.unpack_from(fmt, data, pos)[0], pos + size
+    if b in _SIZED:
+        fmt, size, kind = _SIZED[b]
+        n = struct.unpack_from(fmt, data, pos)[0]
+        pos += size
+        if kind == 'str':
+            return data[pos:pos + n].decode('utf-8'), pos + n
+        if kind == 'bin':
+            return bytes(data[pos:pos + n]), pos + n
+        if kind == 'array':
+            return _unpack_array(data, pos, n)
+        return _unpack_map(data, pos, n)
+    raise CodecError(f"Unsupported msgpack type: 0x{b:02x}")
+
+
+def _unpack_array(data, pos: int, n: int):
+    items = []
+    for _ in range(n):
+        item, pos = _unpack(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data, pos: int, n: int):
+    result = {}
+    for _ in range(n):
+        key, pos = _unpack(data, pos)
+        result[key], pos = _unpack(data, pos)
+    return result, pos
+
+
+def packb(obj) -> bytes:
+    """msgpack形式でエンコード（msgpackがあればそちらを使う）"""
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    out = bytearray()
+    _pack(obj, out)
+    return bytes(out)
+
+
+def unpackb(data):
+    """msgpack形式をデコード（msgpackがあればそちらを使う）"""
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    try:
+        obj, pos = _unpack(bytes(data), 0)
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise CodecError(f"Malformed msgpack data: {e}") from e
+    if pos != len(data):
+        raise CodecError("Trailing data after msgpack object")
+    return obj
+
+
+# ---------------------------------------------------------------------------
+# スキーマ
+# ---------------------------------------------------------------------------
+
+class _Catalog:
+    """アイテム定義の辞書とカタログID（item.py の *_IDS。並び順とは無関係）の対応"""
+
+    def __init__(self, items: dict, ids: dict):
+        missing = set(items) - set(ids)
+        if missing:
+            raise ValueError(f"Catalog items without an id: {', '.join(sorted(missing))}")
+        if len(set(ids.values())) != len(ids):
+            raise ValueError("Duplicate catalog ids")
+        self.items = items
+        self.ids = {name: ids[name] for name in items}
+        self._names = {item_id: name for name, item_id in self.ids.items()}
+
+    def get(self, item_id: int):
+        name = self._names.get(item_id)
+        if name is None:
+            raise CodecError(f"Unknown catalog id: {item_id}")
+        return self.items[name]
+
+
+WEAPON_CATALOG = _Catalog(WEAPONS, WEAPON_IDS)
+ARMOR_CATALOG = _Catalog(ARMORS, ARMOR_IDS)
+CONSUMABLE_CATALOG = _Catalog(CONSUMABLES, CONSUMABLE_IDS)
+
+
+class _Context:
+    """1つの Player をデコードする間の状態（装備を復元する所持品）"""
+
+    __slots__ = ('weapons', 'armors')
+
+    def __init__(self, weapons, armors):
+        self.weapons = weapons
+        self.armors = armors
+
+
+class Field:
+    """属性をそのまま保存するフィールド"""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def encode(self, value, ctx):
+        return value
+
+    def decode(self, data, ctx):
+        return data
+
+
+class EnumField(Field):
+    """Enumを定義順の番号で保存"""
+
+    __slots__ = ('members', 'ordinals')
+
+    def __init__(self, name: str, enum_class):
+        super().__init__(name)
+        self.members = list(enum_class)
+        self.ordinals = {member: i for i, member in enumerate(self.members)}
+
+    def encode(self, value, ctx):
+        return self.ordinals[value]
+
+    def decode(self, data, ctx):
+        return self.members[data]
+
+
+class EquipmentField(Field):
+    """装備中のアイテム（カタログIDで保存し、復元時に所持品の1個を装備中にする）"""
+
+    __slots__ = ('catalog', 'inventory')
+
+    def __init__(self, name: str, catalog: _Catalog, inventory: str):
+        super().__init__(name)
+        self.catalog = catalog
+        self.inventory = inventory
+
+    def encode(self, value, ctx):
+        if value is None:
+            return None
+        return self.catalog.ids[value.name]
+
+    def decode(self, data, ctx):
+        if data is None:
+            return None
+        return getattr(ctx, self.inventory).restore_equipped(self.catalog.get(data).name)
+
+
+class Schema:
+    """オブジェクトの属性とリストの位置の対応"""
+
+    def __init__(self, fields):
+        self.fields = list(fields)
+
+    def encode(self, obj, ctx=None) -> list:
+        return [field.encode(getattr(obj, field.name), ctx) for field in self.fields]
+
+    def decode_into(self, obj, data, ctx=None):
+        # 古いデータに無い末尾のフィールドは obj の初期値のまま
+        for field, value in zip(self.fields, data):
+            setattr(obj, field.name, field.decode(value, ctx))
+        return obj
+
+
+CHARACTER_SCHEMA = Schema([
+    Field('name'),
+    EnumField('character_type', CharacterType),
+    Field('level'),
+    Field('experience'),
+    Field('hp'),
+    Field('max_hp'),
+    Field('mp'),
+    Field('max_mp'),
+    Field('base_attack'),
+    Field('base_defense'),
+    Field('attack'),
+    Field('defense'),
+    EquipmentField('equipped_weapon', WEAPON_CATALOG, 'weapons'),
+    EquipmentField('equipped_armor', ARMOR_CATALOG, 'armors'),
+])
+
+# キャラクターのデータ（先頭はプロトタイプ）での装備の位置
+_EQUIPMENT_POSITIONS = tuple(i + 1 for i, field in enumerate(CHARACTER_SCHEMA.fields)
+                             if isinstance(field, EquipmentField))
+
+# テンプレートに無いモンスター（Monster を直接生成したもの）のプロトタイプ
+ADHOC_PROTOTYPE_SCHEMA = Schema([
+    Field('max_hp'),
+    Field('max_mp'),
+    Field('attack'),
+    Field('defense'),
+    Field('gold_reward'),
+    Field('f_ticket_reward'),
+    Field('recruitment_rate'),
+    Field('base_level'),
+])
+
+
+def _encode_character(char: Character, ctx: _Context = None) -> list:
+    """[モンスターのプロトタイプ（人間はNone）, キャラクターのフィールド...]"""
+    prototype = None
+    if isinstance(char, Monster):
+        if char.template_id is not None:
+            prototype = [char.template_id, char.prototype.level]
+        else:
+            prototype = [None, char.name] + ADHOC_PROTOTYPE_SCHEMA.encode(char)
+    return [prototype] + CHARACTER_SCHEMA.encode(char, ctx)
+
+
+def _decode_character(data: list, ctx: _Context) -> Character:
+    prototype = data[0]
+    if prototype is None:
+        char = Character.__new__(Character)
+        if Character.on_created is not None:
+            Character.on_created('Character')
+    elif prototype[0] is not None:
+        template = get_template_info(prototype[0])
+        if template is None:
+            raise CodecError(f"Unknown monster template id: {prototype[0]}")
+        char = Monster.from_prototype(get_monster_prototype(template.key, prototype[1]))
+    else:
+        values = dict(zip((f.name for f in ADHOC_PROTOTYPE_SCHEMA.fields), prototype[2:]))
+        char = Monster(prototype[1], **values)
+    return CHARACTER_SCHEMA.decode_into(char, data[1:], ctx)
+
+
+def _encode_inventory(inventory, catalog: _Catalog) -> list:
+    return [[catalog.ids[item.name], count] for item, count, _ in inventory.items()]
+
+
+def _decode_inventory(inventory, catalog: _Catalog, data: list):
+    for item_id, count in data:
+        inventory.add(catalog.get(item_id).name, count)
+
+
+def encode_party(members: list) -> list:
+    """パーティのメンバーだけをエンコード（戦闘のリプレイ用。所持品は含まない）"""
+    return [_encode_character(member) for member in members]
+
+
+def decode_party(data: list) -> list:
+    """encode_party の結果からメンバーを復元（装備は新しい所持品から装備する）"""
+    ctx = _Context(Inventory(WEAPONS), Inventory(ARMORS))
+    return [_decode_character(member_data, ctx) for member_data in data]
+
+
+def _encode_player(player: Player) -> list:
+    main_index = None
+    for i, member in enumerate(player.party.members):
+        if member is player.main_character:
+            main_index = i
+    return [
+        player.gold,
+        player.f_tickets,
+        _encode_inventory(player.inventory_weapons, WEAPON_CATALOG),
+        _encode_inventory(player.inventory_armors, ARMOR_CATALOG),
+        [[CONSUMABLE_CATALOG.ids[name], count] for name, count in player.inventory_consumables.items()],
+        [_encode_character(member) for member in player.party.members],
+        main_index,
+    ]
+
+
+def _decode_player(data: list) -> Player:
+    gold, f_tickets, weapons, armors, consumables, party, main_index = data
+    player = Player()
+    player.gold = gold
+    player.f_tickets = f_tickets
+    _decode_inventory(player.inventory_weapons, WEAPON_CATALOG, weapons)
+    _decode_inventory(player.inventory_armors, ARMOR_CATALOG, armors)
+    player.inventory_consumables = {CONSUMABLE_CATALOG.get(i).name: count for i, count in consumables}
+    ctx = _Context(player.inventory_weapons, player.inventory_armors)
+    for member_data in party:
+        player.party.members.append(_decode_character(member_data, ctx))
+    if main_index is not None:
+        player.main_character = player.party.members[main_index]
+    return player
+
+
+def _upgrade_player_v1(data: list) -> list:
+    """バージョン1のプレイヤー部分を現在の形式に変換
+
+    バージョン1では所持品は1個ごとのカタログIDのリスト、装備は所持品リスト内の位置
+    （所持品に無ければ -(カタログID + 1)）だった。
+    """
+    gold, f_tickets, weapon_ids, armor_ids, consumables, party, main_index = data
+
+    def counted(ids):
+        counts = {}
+        for item_id in ids:
+            counts[item_id] = counts.get(item_id, 0) + 1
+        return [[item_id, count] for item_id, count in counts.items()]
+
+    def equipment(value, ids):
+        if value is None or value < 0:
+            return None if value is None else -value - 1
+        if value >= len(ids):
+            raise CodecError(f"Invalid inventory slot: {value}")
+        return ids[value]
+
+    members = []
+    for member in party:
+        member = list(member)
+        for position, ids in zip(_EQUIPMENT_POSITIONS, (weapon_ids, armor_ids)):
+            if position < len(member):
+                member[position] = equipment(member[position], ids)
+        members.append(member)
+    return [gold, f_tickets, counted(weapon_ids), counted(armor_ids), consumables, members, main_index]
+
+
+# 読み込めるバージョンと、プレイヤー部分を現在の形式に変換する関数
+_PLAYER_UPGRADES = {1: _upgrade_player_v1, 2: None, CODEC_VERSION: None}
+
+
+def _player_decoder(version: int, unpack=None):
+    if version not in _PLAYER_UPGRADES:
+        raise UnsupportedVersionError(version)
+    upgrade = _PLAYER_UPGRADES[version]
+
+    def decode_player(data):
+        if unpack is not None:
+            data = unpack(data)
+        if upgrade is not None:
+            data = upgrade(data)
+        return _decode_player(data)
+    return decode_player
+
+
+# ---------------------------------------------------------------------------
+# GameState
+# ---------------------------------------------------------------------------
+
+class LazyGameState(GameState):
+    """player を最初にアクセスしたときに復元する GameState"""
+
+    def __init__(self, player_data, decode_player, economy_tick: int = None,
+                 current_area: int = 1, story_progress: int = 0):
+        self._player = None
+        self._player_data = player_data
+        self._decode_player = decode_player
+        self.f_ticket_system = None  # 読み込んだ側が世界の経済のスナップショットを入れる
+        self.current_area = current_area
+        self.story_progress = story_progress
+        self.economy_tick = economy_tick
+
+    @property
+    def player(self):
+        if self._player_data is not None:
+            with METRICS.phase('decode_player'):
+                self._player = self._decode_player(self._player_data)
+            self._player_data = None
+        return self._player
+
+    @player.setter
+    def player(self, value):
+        self._player = value
+        self._player_data = None
+
+    @property
+    def is_player_loaded(self) -> bool:
+        return self._player_data is None
+
+
+def encode_state(state: GameState, fmt: str = 'binary'):
+    """GameState をエンコード（'binary' は bytes、'json' は str を返す）"""
+    player = state.player
+    if fmt == 'binary':
+        player_data = packb(_encode_player(player))
+        body = packb([state.economy_tick, state.current_area, state.story_progress, player_data])
+        return BINARY_MAGIC + bytes([CODEC_VERSION]) + body
+    if fmt == 'json':
+        return json.dumps({
+            'v': CODEC_VERSION,
+            't': state.economy_tick,
+            'a': state.current_area,
+            's': state.story_progress,
+            'p': _encode_player(player),
+        }, ensure_ascii=False, separators=(',', ':'))
+    raise ValueError(f"Unknown format: {fmt}")
+
+
+def decode_state(data) -> LazyGameState:
+    """encode_state の結果から GameState を復元（形式は自動判別）"""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data)
+        if data.startswith(BINARY_MAGIC):
+            version = data[len(BINARY_MAGIC)]
+            decode_player = _player_decoder(version, unpackb)
+            economy_tick, area, progress, player_data = unpackb(data[len(BINARY_MAGIC) + 1:])
+            if version < 3:
+                economy_tick = None  # セッションごとのF券システム（使わない）
+            return LazyGameState(player_data, decode_player, economy_tick, area, progress)
+        data = data.decode('utf-8')
+
+    try:
+        obj = json.loads(data)
+    except ValueError as e:
+        raise CodecError(f"Malformed game state: {e}") from e
+    if not isinstance(obj, dict):
+        raise CodecError("Malformed game state")
+    decode_player = _player_decoder(obj.get('v', 0))
+    return LazyGameState(obj['p'], decode_player, obj.get('t'), obj['a'], obj['s'])
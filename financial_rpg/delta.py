@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON APIの差分レスポンス
+
+クライアントが X-State-Version ヘッダーで手元の状態の版を送ると、
+サーバーは前回送った状態との差分（パッチ）だけを返す。版が一致しない場合は
+状態全体を返し直す（再同期）。パッチの適用は static/js/game.js の applyStatePatch。
+
+パッチは操作のリスト:
+    ['s', path, value]           path の値を value に置き換える
+    ['d', path]                  path のキーを削除する
+    ['w', path, drop, items]     path のリストの先頭から drop 件を捨て、items を末尾に追加する
+"""
+
+import threading
+import time
+
+from state_store import MemoryStateStore
+
+_MISSING = object()
+
+
+def _window(old: list, new: list):
+    """new が old の先頭を drop 件捨てて要素を追加したものなら drop を返す（battle_log 用）"""
+    for drop in range(len(old) + 1):
+        kept = len(old) - drop
+        if kept <= len(new) and old[drop:] == new[:kept]:
+            return drop
+    return None
+
+
+def _diff(old, new, path: list, ops: list):
+    if old == new and type(old) is type(new):
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append(['d', path + [key]])
+        for key, value in new.items():
+            previous = old.get(key, _MISSING)
+            if previous is _MISSING:
+                ops.append(['s', path + [key], value])
+            else:
+                _diff(previous, value, path + [key], ops)
+        return
+    if isinstance(old, list) and isinstance(new, list):
+        drop = _window(old, new)
+        appended = len(new) - (len(old) - drop) if drop is not None else None
+        if drop is not None and (appended <= len(new) // 2 or len(old) != len(new)):
+            ops.append(['w', path, drop, new[len(old) - drop:]])
+        elif len(old) == len(new):
+            for i, (a, b) in enumerate(zip(old, new)):
+                _diff(a, b, path + [i], ops)
+        else:
+            ops.append(['s', path, new])
+        return
+    ops.append(['s', path, new])
+
+
+def diff(old: dict, new: dict) -> list:
+    """old から new へのパッチを作成"""
+    ops = []
+    _diff(old, new, [], ops)
+    return ops
+
+
+def apply_patch(doc: dict, ops: list) -> dict:
+    """パッチを doc に適用（game.js の applyStatePatch と同じ処理。検証用）"""
+    for op in ops:
+        path = op[1]
+        parent = doc
+        for key in path[:-1]:
+            parent = parent[key]
+        key = path[-1]
+        if op[0] == 's':
+            parent[key] = op[2]
+        elif op[0] == 'd':
+            del parent[key]
+        elif op[0] == 'w':
+            del parent[key][:op[2]]
+            parent[key].extend(op[3])
+        else:
+            raise ValueError(f"Unknown patch op: {op[0]}")
+    return doc
+
+
+class DeltaTracker:
+    """セッションごとに最後に送った状態と版を保持し、差分レスポンスを作る
+
+    版は単調増加する。保持していないセッション（期限切れ・別プロセス）は
+    現在時刻（ミリ秒）から版を始めるので、再同期後も版が戻らない。
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 3600.0):
+        self._sent = MemoryStateStore(max_entries=max_sessions, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def respond(self, sid: str, base_version, views: dict) -> dict:
+        """views（'battle_state' などの状態）をレスポンス用のフィールドに変換
+
+        base_version がサーバーの版と一致すれば差分、そうでなければ全体を返す。
+        再同期では以前に送った他の状態は捨てる（次に含めるときは全体を送る）。
+        views の値は以後変更しないこと（次回の差分の基準として保持する）。
+        """
+        with self._lock:
+            entry = self._sent.get(sid)
+            if entry is None:
+                version, sent = int(time.time() * 1000), None
+            else:
+                version, sent = entry
+            new_version = version + 1
+            resync = sent is None or base_version != version
+            # 再同期では今回送った状態だけを保持し直す（クライアントが持っていない古い状態を基準にしない）
+            document = {} if resync else dict(sent)
+            document.update(views)
+            self._sent.set(sid, (new_version, document))
+
+        if resync:
+            return dict(views, state_version=new_version, state_resync=True)
+
+        ops = []
+        for name, value in views.items():
+            previous = sent.get(name, _MISSING)
+            if previous is _MISSING:
+                ops.append(['s', [name], value])
+            else:
+                _diff(previous, value, [name], ops)
+        return {
+            'state_version': new_version,
+            'state_base_version': version,
+            'state_patch': ops,
+            'state_views': list(views),
+        }
+
+    def forget(self, sid: str):
+        self._sent.delete(sid)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+経済状況のマルコフ連鎖モデル
+
+EconomyCondition の遷移確率を行列（行: 現在の状況, 列: 次の状況）で保持し、
+定常分布・nステップ後の分布・F券の期待価値をNumPyで計算する。大量の経済の推移は
+全経路を1ステップずつまとめて進めて生成する（1経路ずつのループより速い）。
+
+行列を変更するとバージョンが上がり、予測のキャッシュはバージョンごとに分かれる。
+
+WorldEconomy は全プレイヤー共通の経済（一定間隔のティックで変動する）。ティック t の
+遷移に使う乱数は (シード, t) のハッシュで決まるので、同じシード・起点時刻の
+プロセスはどれも同じ経済を再現する（複数ワーカーで共有ストアが要らない）。
+"""
+
+import hashlib
+import struct
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+
+import numpy as np
+
+from f_ticket import EconomyCondition, FTicketSystem
+
+# 行列の行・列の順
+STATES = tuple(EconomyCondition)
+
+# 既定の遷移（従来の FTicketSystem.change_condition と同じく、3つの候補から等確率）
+DEFAULT_TRANSITIONS = {
+    EconomyCondition.BOOM: (EconomyCondition.BOOM, EconomyCondition.RECOVERY, EconomyCondition.STABLE),
+    EconomyCondition.RECOVERY: (EconomyCondition.RECOVERY, EconomyCondition.STABLE, EconomyCondition.BOOM),
+    EconomyCondition.STABLE: (EconomyCondition.STABLE, EconomyCondition.RECOVERY, EconomyCondition.RECESSION),
+    EconomyCondition.RECESSION: (EconomyCondition.RECESSION, EconomyCondition.STABLE, EconomyCondition.DEPRESSION),
+    EconomyCondition.DEPRESSION: (EconomyCondition.DEPRESSION, EconomyCondition.RECESSION, EconomyCondition.STABLE),
+}
+
+# /api/economy/forecast で指定できる最大の期間
+MAX_HORIZON = 100
+
+
+def matrix_from_transitions(transitions: dict) -> np.ndarray:
+    """{状況: 次の候補（等確率）} から遷移行列を作る"""
+    index = {state: i for i, state in enumerate(STATES)}
+    matrix = np.zeros((len(STATES), len(STATES)))
+    for state, candidates in transitions.items():
+        for candidate in candidates:
+            matrix[index[state], index[candidate]] += 1.0 / len(candidates)
+    return matrix
+
+
+class EconomyModel:
+    """経済状況の遷移行列と、それから求める分布・期待価値"""
+
+    def __init__(self, matrix=None):
+        self.index = {state: i for i, state in enumerate(STATES)}
+        self.multipliers = np.array([FTicketSystem.VALUE_MULTIPLIERS[state] for state in STATES])
+        self.version = 0
+        self.set_matrix(matrix_from_transitions(DEFAULT_TRANSITIONS) if matrix is None else matrix)
+
+    def set_matrix(self, matrix):
+        """遷移行列を差し替える（各行は合計1に正規化する。バージョンが上がる）"""
+        matrix = np.array(matrix, dtype=np.float64)
+        n = len(STATES)
+        if matrix.shape != (n, n):
+            raise ValueError(f"遷移行列は {n}x{n} で指定してください: {matrix.shape}")
+        if (matrix < 0).any() or not np.isfinite(matrix).all():
+            raise ValueError("遷移確率は0以上の有限の値で指定してください")
+        totals = matrix.sum(axis=1)
+        if (totals <= 0).any():
+            raise ValueError("遷移先の無い状況があります")
+        matrix = matrix / totals[:, None]
+        matrix.setflags(write=False)
+
+        cumulative = np.cumsum(matrix, axis=1)
+        cumulative[:, -1] = 1.0
+        # simulate 用：行 i の累積確率に i を足して連結すると全体が昇順になる
+        offsets = (cumulative + np.arange(n)[:, None]).ravel()
+
+        self.matrix = matrix
+        self._cumulative_rows = [tuple(row) for row in cumulative]
+        self._offsets = offsets
+        self._stationary = None
+        self.version += 1
+
+    def next_condition(self, condition: EconomyCondition, u: float) -> EconomyCondition:
+        """一様乱数 u（0以上1未満）で次の状況を選ぶ"""
+        return STATES[bisect_right(self._cumulative_rows[self.index[condition]], u)]
+
+    def stationary_distribution(self) -> np.ndarray:
+        """定常分布 π（π P = π, Σπ = 1）"""
+        if self._stationary is None:
+            n = len(STATES)
+            a = np.vstack([self.matrix.T - np.eye(n), np.ones(n)])
+            b = np.append(np.zeros(n), 1.0)
+            pi = np.linalg.lstsq(a, b, rcond=None)[0]
+            pi = np.clip(pi, 0.0, None)
+            self._stationary = pi / pi.sum()
+        return self._stationary
+
+    def forecast(self, condition: EconomyCondition, horizon: int) -> np.ndarray:
+        """0〜horizon ステップ後の状況の分布（形は (horizon + 1, 状況の数)）"""
+        distributions = np.empty((horizon + 1, len(STATES)))
+        distributions[0] = 0.0
+        distributions[0, self.index[condition]] = 1.0
+        for step in range(horizon):
+            distributions[step + 1] = distributions[step] @ self.matrix
+        return distributions
+
+    def expected_values(self, condition: EconomyCondition, horizon: int, base_value: float) -> np.ndarray:
+        """0〜horizon ステップ後のF券1枚の期待価値（ゴールド）"""
+        return self.forecast(condition, horizon) @ self.multipliers * base_value
+
+    def simulate(self, condition: EconomyCondition, steps: int, paths: int, seed=None) -> np.ndarray:
+        """paths 本の経済の推移（形は (paths, steps + 1) の状況番号。STATES の順）"""
+        rng = np.random.default_rng(seed)
+        states = np.empty((paths, steps + 1), dtype=np.int8)
+        states[:, 0] = self.index[condition]
+        n = len(STATES)
+        for step in range(steps):
+            current = states[:, step].astype(np.int64)
+            position = np.searchsorted(self._offsets, current + rng.random(paths), side='right')
+            states[:, step + 1] = position - current * n
+        return states
+
+    def simulated_values(self, states: np.ndarray, base_value: float) -> np.ndarray:
+        """simulate の結果をF券1枚の価値に変換（get_current_value と同じく切り捨て）"""
+        return np.floor(self.multipliers[states] * base_value)
+
+    def forecast_summary(self, condition: EconomyCondition, base_value: float, horizon: int) -> dict:
+        """予測の要約（/api/economy/forecast の内容。値は丸めたPythonの数値）"""
+        distributions = self.forecast(condition, horizon)
+        stationary = self.stationary_distribution()
+        return {
+            'matrix_version': self.version,
+            'condition': condition.value,
+            'horizon': horizon,
+            'conditions': [state.value for state in STATES],
+            'expected_values': [round(float(v), 2) for v in distributions @ self.multipliers * base_value],
+            'probabilities': [[round(float(p), 4) for p in row] for row in distributions],
+            'stationary': [round(float(p), 4) for p in stationary],
+            'long_run_value': round(float(stationary @ self.multipliers * base_value), 2),
+        }
+
+
+# ゲーム全体で使うモデル（FTicketSystem.change_condition もこれに従う）
+ECONOMY = EconomyModel()
+
+
+class EconomySnapshot(FTicketSystem):
+    """あるティックでの経済状況（読み取り専用の FTicketSystem）"""
+
+    def __init__(self, tick: int, condition: EconomyCondition, changed_tick: int, history: tuple,
+                 base_value: int = 50):
+        values = {
+            'tick': tick,
+            'current_condition': condition,
+            'changed_tick': changed_tick,  # 最後に状況が変わったティック
+            'condition_history': history,
+            'base_value': base_value,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("EconomySnapshot は変更できません")
+
+    def change_condition(self, rng=None):
+        raise AttributeError("世界の経済は WorldEconomy のティックでのみ変動します")
+
+
+def _uniform(seed: int, tick: int) -> float:
+    """(シード, ティック) から決まる 0以上1未満の乱数"""
+    digest = hashlib.blake2b(struct.pack('<qq', seed, tick), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') / 2 ** 64
+
+
+class WorldEconomy:
+    """全プレイヤー共通の経済（interval 秒ごとのティックで遷移行列に従って変動する）
+
+    リクエストからは current() で最新の EconomySnapshot を読む（ロック不要）。
+    ティックはバックグラウンドのスレッド（start）が進めるが、スレッドが動いていなくても
+    current() が時刻から追いつく。同時に追いついても結果は同じなので競合は問題にならない。
+    """
+
+    def __init__(self, interval: float = 60.0, seed: int = 0, epoch: float = None,
+                 model: EconomyModel = ECONOMY, clock=time.time):
+        self.interval = interval
+        self.seed = seed
+        self.model = model
+        self.clock = clock
+        self.epoch = clock() if epoch is None else epoch
+        self._thread = None
+        self._stopped = threading.Event()
+        initial = EconomyCondition.STABLE
+        self.snapshot = EconomySnapshot(0, initial, 0, (initial,))
+        self.current()
+
+    def tick_at(self, now: float) -> int:
+        return max(0, int((now - self.epoch) // self.interval))
+
+    def _advance(self, snapshot: EconomySnapshot, tick: int) -> EconomySnapshot:
+        condition, changed_tick = snapshot.current_condition, snapshot.changed_tick
+        history = deque(snapshot.condition_history, maxlen=FTicketSystem.HISTORY_LENGTH)
+        for t in range(snapshot.tick + 1, tick + 1):
+            following = self.model.next_condition(condition, _uniform(self.seed, t))
+            if following != condition:
+                condition, changed_tick = following, t
+            history.append(condition)
+        return EconomySnapshot(tick, condition, changed_tick, tuple(history), snapshot.base_value)
+
+    def current(self) -> EconomySnapshot:
+        """現在のティックの経済状況"""
+        snapshot = self.snapshot
+        tick = self.tick_at(self.clock())
+        if tick > snapshot.tick:
+            snapshot = self._advance(snapshot, tick)
+            if snapshot.tick > self.snapshot.tick:
+                self.snapshot = snapshot
+        return snapshot
+
+    def next_tick_at(self, tick: int) -> float:
+        """tick の次のティックの時刻"""
+        return self.epoch + (tick + 1) * self.interval
+
+    def start(self, on_change=None):
+        """ティックごとに経済を進めるスレッドを起動（状況が変わると on_change(snapshot) を呼ぶ）"""
+        if self._thread is not None:
+            return
+
+        def run():
+            # リクエストの current() が先に追いついていても通知を漏らさないよう、最後に見たティックを持つ
+            seen = self.current().tick
+            while not self._stopped.wait(max(0.0, self.next_tick_at(seen) - self.clock())):
+                snapshot = self.current()
+                if on_change is not None and snapshot.changed_tick > seen:
+                    on_change(snapshot)
+                seen = snapshot.tick
+
+        self._thread = threading.Thread(target=run, name='world-economy', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+サーバープッシュ用のイベントバス（Server-Sent Events）
+
+戦闘ログ・敵の行動結果・経済状況の変化をセッションごとの購読者に配信する。
+購読者ごとのキューは上限付きで、読み出しが追いつかない接続では古いイベントから
+捨てて、次の配信で 'resync'（状態を取り直す合図）を送る。発行側は待たされない。
+"""
+
+import itertools
+import json
+import threading
+from collections import deque
+
+
+def format_event(event_id: int, event_type: str, data) -> str:
+    """SSEの1イベント分の文字列"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
+
+
+# 接続直後の再接続間隔（ミリ秒）とハートビート
+RETRY_MESSAGE = "retry: 3000\n\n"
+HEARTBEAT_MESSAGE = ": ping\n\n"
+
+
+class Subscription:
+    """1つの接続の配信キュー"""
+
+    __slots__ = ('sid', 'max_pending', 'dropped', 'closed', '_events', '_cond')
+
+    def __init__(self, sid: str, max_pending: int):
+        self.sid = sid
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.closed = False
+        self._events = deque()
+        self._cond = threading.Condition(threading.Lock())
+
+    def push(self, message: str):
+        """整形済みのイベントを追加（満杯なら最も古いものを捨てる）"""
+        with self._cond:
+            if len(self._events) >= self.max_pending:
+                self._events.popleft()
+                self.dropped += 1
+            self._events.append(message)
+            self._cond.notify()
+
+    def wait(self, timeout: float):
+        """イベントが届くか timeout 秒経つまで待ち、(イベントのリスト, 捨てた件数) を返す"""
+        with self._cond:
+            if not self._events and not self.closed:
+                self._cond.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            dropped, self.dropped = self.dropped, 0
+        return events, dropped
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+
+class EventBus:
+    """セッションIDごとの購読者にイベントを配信する"""
+
+    def __init__(self, max_pending: int = 100, max_subscribers: int = 10000):
+        self.max_pending = max_pending
+        self.max_subscribers = max_subscribers
+        self._subscribers = {}  # sid: set(Subscription)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, sid: str):
+        """購読を開始（接続数の上限に達していればNone）"""
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                return None
+            subscription = Subscription(sid, self.max_pending)
+            self._subscribers.setdefault(sid, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.sid)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.sid]
+            self._count -= 1
+
+    def publish(self, sid: str, event_type: str, data) -> int:
+        """セッションの購読者に配信し、配信先の数を返す"""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(sid, ()))
+        if not subscriptions:
+            return 0
+        message = format_event(next(self._ids), event_type, data)
+        for subscription in subscriptions:
+            subscription.push(message)
+        return len(subscriptions)
+
+    def broadcast(self, event_type: str, data) -> int:
+        """全購読者に配信（整形は1回だけ）"""
+        with self._lock:
+            subscriptions = [s for group in self._subscribers.values() for s in group]
+        if not subscriptions:
+            return 0
+        message = format_event(next(self._ids), event_type, data)
+        for subscription in subscriptions:
+            subscription.push(message)
+        return len(subscriptions)
+
+    def close_all(self):
+        """全接続を終了させる（シャットダウン用）"""
+        with self._lock:
+            subscriptions = [s for group in self._subscribers.values() for s in group]
+        for subscription in subscriptions:
+            self.unsubscribe(subscription)
+
+    def __len__(self):
+        return self._count
+
+    def stream(self, subscription: Subscription, heartbeat: float = 15.0):
+        """SSEのレスポンス本体（ジェネレーター）
+
+        heartbeat 秒イベントが無ければコメント行を送り、切断された接続を検出する。
+        """
+        try:
+            yield RETRY_MESSAGE
+            while not subscription.closed:
+                events, dropped = subscription.wait(heartbeat)
+                if dropped:
+                    yield format_event(next(self._ids), 'resync', {'dropped': dropped})
+                if events:
+                    yield ''.join(events)
+                elif not dropped and not subscription.closed:
+                    yield HEARTBEAT_MESSAGE
+        finally:
+            self.unsubscribe(subscription)
@@ -36,6 +36,9 @@ class FTicketSystem:
         EconomyCondition.DEPRESSION: "経済恐慌により、F券の価値が大幅に下落しています。"
     }
     
+    # 保持する経済状況の履歴の長さ
+    HISTORY_LENGTH = 10
+    
     def __init__(self):
         self.base_value = 50  # F券1枚の基本価値（ゴールド）
         self.current_condition = EconomyCondition.STABLE
@@ -46,34 +49,16 @@ class FTicketSystem:
         multiplier = self.VALUE_MULTIPLIERS[self.current_condition]
         return int(self.base_value * multiplier)
     
-    def change_condition(self):
-        """経済状況をランダムに変更"""
-        # 前の状況から遷移しやすい状況に変更
-        transitions = {
-            EconomyCondition.BOOM: [
-                EconomyCondition.BOOM, EconomyCondition.RECOVERY, EconomyCondition.STABLE
-            ],
-            EconomyCondition.RECOVERY: [
-                EconomyCondition.RECOVERY, EconomyCondition.STABLE, EconomyCondition.BOOM
-            ],
-            EconomyCondition.STABLE: [
-                EconomyCondition.STABLE, EconomyCondition.RECOVERY, EconomyCondition.RECESSION
-            ],
-            EconomyCondition.RECESSION: [
-                EconomyCondition.RECESSION, EconomyCondition.STABLE, EconomyCondition.DEPRESSION
-            ],
-            EconomyCondition.DEPRESSION: [
-                EconomyCondition.DEPRESSION, EconomyCondition.RECESSION, EconomyCondition.STABLE
-            ]
-        }
+    def change_condition(self, rng=random):
+        """経済状況を遷移行列（economy.ECONOMY）に従ってランダムに変更"""
+        from economy import ECONOMY  # NumPyを使うので必要になるまで読み込まない
         
-        possible_conditions = transitions.get(self.current_condition, [EconomyCondition.STABLE])
-        self.current_condition = random.choice(possible_conditions)
+        self.current_condition = ECONOMY.next_condition(self.current_condition, rng.random())
         self.condition_history.append(self.current_condition)
         
-        # 履歴が長すぎる場合は削除
-        if len(self.condition_history) > 10:
-            self.condition_history.pop(0)
+        # 履歴が長すぎる場合は古いものから削除
+        if len(self.condition_history) > self.HISTORY_LENGTH:
+            del self.condition_history[:-self.HISTORY_LENGTH]
     
     def get_condition_description(self) -> str:
         """現在の経済状況の説明を取得"""
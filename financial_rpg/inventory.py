@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+武器・防具の所持品
+
+同じ品を何個持っていても、カタログ（item.py の WEAPONS / ARMORS）の名前と個数だけを保持し、
+アイテムのオブジェクトはカタログのものを共有する。品ごとの状態は「何個が装備中か」だけ。
+購入・検索・装備はいずれも O(1)。
+"""
+
+
+class Inventory:
+    """1種類（武器または防具）の所持品（名前: 個数）"""
+
+    __slots__ = ('catalog', '_counts', '_equipped', '_total')
+
+    def __init__(self, catalog: dict):
+        self.catalog = catalog
+        self._counts = {}    # 名前: 所持数（購入順）
+        self._equipped = {}  # 名前: そのうち装備中の数
+        self._total = 0
+
+    def __len__(self):
+        return self._total
+
+    def __contains__(self, name):
+        return name in self._counts
+
+    def __iter__(self):
+        """所持している品（カタログのオブジェクト。1種類につき1回）"""
+        return (self.catalog[name] for name in self._counts)
+
+    def count(self, name: str) -> int:
+        return self._counts.get(name, 0)
+
+    def equipped_count(self, name: str) -> int:
+        return self._equipped.get(name, 0)
+
+    def available(self, name: str) -> int:
+        """装備されていない個数"""
+        return self._counts.get(name, 0) - self._equipped.get(name, 0)
+
+    def items(self) -> list:
+        """[(カタログのオブジェクト, 所持数, 装備中の数), ...]（購入順）"""
+        return [(self.catalog[name], count, self._equipped.get(name, 0))
+                for name, count in self._counts.items()]
+
+    def add(self, name: str, count: int = 1) -> bool:
+        """count 個追加（カタログに無い品ならFalse）"""
+        if name not in self.catalog or count <= 0:
+            return False
+        self._counts[name] = self._counts.get(name, 0) + count
+        self._total += count
+        return True
+
+    def remove(self, name: str, count: int = 1) -> bool:
+        """装備されていない品を count 個減らす（足りなければFalse）"""
+        if count <= 0 or self.available(name) < count:
+            return False
+        remaining = self._counts[name] - count
+        if remaining:
+            self._counts[name] = remaining
+        else:
+            del self._counts[name]
+        self._total -= count
+        return True
+
+    def equip(self, name: str):
+        """装備されていない1個を装備中にしてカタログのオブジェクトを返す（無ければNone）"""
+        if self.available(name) <= 0:
+            return None
+        self._equipped[name] = self._equipped.get(name, 0) + 1
+        return self.catalog[name]
+
+    def unequip(self, name: str):
+        """装備中の1個を外す"""
+        equipped = self._equipped.get(name, 0)
+        if equipped > 1:
+            self._equipped[name] = equipped - 1
+        elif equipped == 1:
+            del self._equipped[name]
+
+    def restore_equipped(self, name: str):
+        """保存された装備を復元する
+
+        装備されていない所持品が無ければNone（古いデータで所持数より多く装備していた分は外す。
+        所持品を増やすと復元のたびに品が増えるため）。
+        """
+        if name not in self.catalog:
+            return None
+        return self.equip(name)
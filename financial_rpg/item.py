@@ -15,6 +15,8 @@ class ItemType(Enum):
 class Item:
     """アイテム基本クラス"""
     
+    __slots__ = ('name', 'item_type', 'price_gold', 'price_f_tickets', 'description')
+    
     def __init__(self, name: str, item_type: ItemType, 
                  price_gold: int, price_f_tickets: int, description: str):
         self.name = name
@@ -26,6 +28,8 @@ class Item:
 class Weapon(Item):
     """武器クラス"""
     
+    __slots__ = ('attack_bonus',)
+    
     def __init__(self, name: str, attack_bonus: int, 
                  price_gold: int, price_f_tickets: int, description: str):
         super().__init__(name, ItemType.WEAPON, price_gold, price_f_tickets, description)
@@ -34,6 +38,8 @@ class Weapon(Item):
 class Armor(Item):
     """防具クラス"""
     
+    __slots__ = ('defense_bonus',)
+    
     def __init__(self, name: str, defense_bonus: int,
                  price_gold: int, price_f_tickets: int, description: str):
         super().__init__(name, ItemType.ARMOR, price_gold, price_f_tickets, description)
@@ -42,6 +48,8 @@ class Armor(Item):
 class Consumable(Item):
     """消費アイテムクラス"""
     
+    __slots__ = ('hp_restore', 'mp_restore', 'emoji')
+    
     def __init__(self, name: str, item_type: ItemType,
                  hp_restore: int, mp_restore: int,
                  price_gold: int, price_f_tickets: int, description: str, emoji: str = "💊"):
@@ -188,3 +196,123 @@ CONSUMABLES = {
     'マクロ経済の薬': Consumable('マクロ経済の薬', ItemType.CONSUMABLE, 900, 500, 6000, 60, 'マクロ経済知識が込められた究極の薬', '🌍'),
     'グローバル金融の薬': Consumable('グローバル金融の薬', ItemType.CONSUMABLE, 850, 450, 5500, 55, 'グローバル金融知識が込められた薬', '🌐'),
 }
+
+
+# カタログID（codec.py が保存データに使う）。定義の並び順とは無関係に固定で、
+# 新しい品には未使用のIDを付け、削除した品のIDは再利用しないこと
+WEAPON_IDS = {
+    '木の剣': 0,
+    '竹刀': 1,
+    '短剣': 2,
+    '銅の剣': 3,
+    '鉄の剣': 4,
+    'ブロンズソード': 5,
+    '鋼の剣': 6,
+    '銀の剣': 7,
+    '投資の剣': 8,
+    '金融の杖': 9,
+    'ミスリルソード': 10,
+    'プラチナソード': 11,
+    'ダイヤモンドソード': 12,
+    '株式投資の剣': 13,
+    '債券の杖': 14,
+    '為替の剣': 15,
+    '投資信託の杖': 16,
+    'ETFの剣': 17,
+    '不動産投資の剣': 18,
+    'コモディティの杖': 19,
+    'ヘッジファンドの剣': 20,
+    'プライベートエクイティの杖': 21,
+    'ベンチャーキャピタルの剣': 22,
+    'デリバティブの杖': 23,
+    'レバレッジの剣': 24,
+    'アルゴリズムトレードの杖': 25,
+    'クォンツファンドの剣': 26,
+    'HFTの杖': 27,
+    'シャドウバンキングの剣': 28,
+    '証券化の杖': 29,
+    '金融危機の剣': 30,
+    'バブルの杖': 31,
+    '経済崩壊の剣': 32,
+    'システムリスクの杖': 33,
+    '流動性危機の剣': 34,
+    '中央銀行の杖': 35,
+    'マクロ経済の剣': 36,
+    'グローバル金融の杖': 37,
+    '金融市場支配の剣': 38,
+    '究極の金融の杖': 39,
+}
+
+ARMOR_IDS = {
+    '布の服': 0,
+    '革の服': 1,
+    '皮の鎧': 2,
+    '革の鎧': 3,
+    '銅の鎧': 4,
+    'ブロンズの鎧': 5,
+    '鉄の鎧': 6,
+    '銀の鎧': 7,
+    '金融の鎧': 8,
+    '投資の盾': 9,
+    '鋼の鎧': 10,
+    'ミスリルメイル': 11,
+    'プラチナメイル': 12,
+    '株式投資の盾': 13,
+    '債券の鎧': 14,
+    '為替の盾': 15,
+    '投資信託の鎧': 16,
+    'ETFの盾': 17,
+    '不動産投資の鎧': 18,
+    'コモディティの盾': 19,
+    '資産管理の盾': 20,
+    'ヘッジファンドの鎧': 21,
+    'プライベートエクイティの盾': 22,
+    'ベンチャーキャピタルの鎧': 23,
+    'デリバティブの盾': 24,
+    'レバレッジの鎧': 25,
+    'アルゴリズムトレードの盾': 26,
+    'クォンツファンドの鎧': 27,
+    'HFTの盾': 28,
+    'シャドウバンキングの鎧': 29,
+    '金融危機の盾': 30,
+    'バブルの鎧': 31,
+    '経済崩壊の盾': 32,
+    'システムリスクの鎧': 33,
+    '流動性危機の盾': 34,
+    '中央銀行の鎧': 35,
+    'マクロ経済の盾': 36,
+    'グローバル金融の鎧': 37,
+    '金融市場支配の盾': 38,
+    '究極の金融の鎧': 39,
+}
+
+CONSUMABLE_IDS = {
+    '薬草': 0,
+    '小薬草': 1,
+    '薬草の葉': 2,
+    '上薬草': 3,
+    '特薬草': 4,
+    '魔法の水': 5,
+    '小魔法の水': 6,
+    '上魔法の水': 7,
+    '特魔法の水': 8,
+    '万能薬': 9,
+    '超薬草': 10,
+    '極薬草': 11,
+    '超魔法の水': 12,
+    '極魔法の水': 13,
+    '上万能薬': 14,
+    '特万能薬': 15,
+    '完全回復薬': 16,
+    'エリクサー': 17,
+    '金融の薬': 18,
+    '投資の薬': 19,
+    '究極の薬草': 20,
+    '究極の魔法の水': 21,
+    '究極の万能薬': 22,
+    '完全エリクサー': 23,
+    '金融のエリクサー': 24,
+    '投資のエリクサー': 25,
+    'マクロ経済の薬': 26,
+    'グローバル金融の薬': 27,
+}
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+武器・防具の検索用インデックス
+
+カタログを price_gold, price_f_tickets と性能（attack_bonus / defense_bonus）で
+ソートして保持し、支払い方法ごとのパレート最適な品（それより安くて強い品が無いもの）を
+事前に求めておく。「予算内で最も強い品」は二分探索で O(log n) で求まる。
+"""
+
+from bisect import bisect_left, bisect_right
+
+from item import WEAPONS, ARMORS
+
+# 支払い方法と価格の属性
+CURRENCIES = ('price_gold', 'price_f_tickets')
+
+
+class ItemIndex:
+    """1種類（武器または防具）のカタログのインデックス"""
+
+    def __init__(self, items, stat: str):
+        self.stat = stat
+        items = list(items)
+        self._keys = {}
+        self._sorted = {}
+        for key in CURRENCIES + (stat,):
+            ordered = sorted(items, key=lambda item: getattr(item, key))
+            self._keys[key] = [getattr(item, key) for item in ordered]
+            self._sorted[key] = ordered
+
+        # パレート最適な品：価格の昇順に見て、それまでより性能が高いものだけを残す
+        # （価格も性能も昇順に並ぶので、予算内で最も強い品は予算以下の最後の品）
+        self._frontier_prices = {}
+        self._frontiers = {}
+        for currency in CURRENCIES:
+            frontier = []
+            for item in sorted(items, key=lambda item: (getattr(item, currency), -getattr(item, stat))):
+                if not frontier or getattr(item, stat) > getattr(frontier[-1], stat):
+                    frontier.append(item)
+            self._frontiers[currency] = frontier
+            self._frontier_prices[currency] = [getattr(item, currency) for item in frontier]
+
+    def __len__(self):
+        return len(self._sorted[self.stat])
+
+    def sorted_by(self, key: str) -> list:
+        """key の昇順に並べた品"""
+        return self._sorted[key]
+
+    def between(self, key: str, low=None, high=None) -> list:
+        """low <= key <= high の品（key の昇順）"""
+        keys = self._keys[key]
+        start = 0 if low is None else bisect_left(keys, low)
+        end = len(keys) if high is None else bisect_right(keys, high)
+        return self._sorted[key][start:end]
+
+    def frontier(self, currency: str = 'price_gold') -> list:
+        """パレート最適な品（価格・性能の昇順）"""
+        return self._frontiers[currency]
+
+    def best_affordable(self, currency: str, budget: int):
+        """価格が budget 以下で最も性能の高い品（同じ性能なら安い方。無ければNone）"""
+        position = bisect_right(self._frontier_prices[currency], budget)
+        return self._frontiers[currency][position - 1] if position else None
+
+
+WEAPON_INDEX = ItemIndex(WEAPONS.values(), 'attack_bonus')
+ARMOR_INDEX = ItemIndex(ARMORS.values(), 'defense_bonus')
+INDEXES = {'weapon': WEAPON_INDEX, 'armor': ARMOR_INDEX}
+
+
+def recommend(index: ItemIndex, gold: int, f_tickets: int, f_ticket_value: int) -> dict:
+    """所持金・F券で買える最も強い品と、そのうちの最良の買い方
+
+    F券払いの費用は現在のF券の価値でゴールドに換算して比べる（同じ性能なら換算額の安い方）。
+    """
+    by_gold = index.best_affordable('price_gold', gold)
+    by_f_tickets = index.best_affordable('price_f_tickets', f_tickets)
+
+    options = []
+    if by_gold is not None:
+        options.append((getattr(by_gold, index.stat), -by_gold.price_gold, 'gold', by_gold))
+    if by_f_tickets is not None:
+        cost = by_f_tickets.price_f_tickets * f_ticket_value
+        options.append((getattr(by_f_tickets, index.stat), -cost, 'f_tickets', by_f_tickets))
+    best = max(options, key=lambda option: option[:2]) if options else None
+
+    def entry(item):
+        if item is None:
+            return None
+        return {
+            'name': item.name,
+            index.stat: getattr(item, index.stat),
+            'price_gold': item.price_gold,
+            'price_f_tickets': item.price_f_tickets,
+            'f_tickets_in_gold': item.price_f_tickets * f_ticket_value
+        }
+
+    return {
+        'gold': entry(by_gold),
+        'f_tickets': entry(by_f_tickets),
+        'best': None if best is None else dict(entry(best[3]), use_f_tickets=best[2] == 'f_tickets')
+    }
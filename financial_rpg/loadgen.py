@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON API の負荷試験（プレイヤーの行動の流れを再現する asyncio の仮想ユーザー）
+
+各仮想ユーザーは自分のセッションCookieを持ち、次の流れを繰り返す。
+
+1. /api/start でゲームを開始し、/api/shop/items で品揃えを見る
+2. /api/adventure → 戦闘が終わるまで /api/battle/action を数回
+3. ときどき戦った敵を /api/recruit_monster で仲間にする（満員なら誰かを手放す）
+4. ときどき /api/shop/buy で買える中で一番高い武器・防具を買い、
+   /api/shop/buy_consumable → /api/use_consumable で傷ついた仲間を回復する
+
+エンドポイントごとに件数・スループット・エラー率・レイテンシのパーセンタイルを表示する。
+エラーは通信の失敗とステータス4xx/5xx、失敗はステータス200で "success": false のもの
+（資金不足など。ゲームとしては正常）。
+
+使い方:
+    python loadgen.py --url http://127.0.0.1:5000 --users 50 --duration 30
+    python loadgen.py --url http://127.0.0.1:8080/game --users 50   # /game の下に置いたアプリ
+    python loadgen.py --in-process --users 20 --duration 10   # Flask のテストクライアントで実行
+
+--in-process はアプリをこのプロセスに読み込み、サーバーもソケットも使わない
+（リクエストは1件ずつ順に処理されるので、仮想ユーザーの数は同時接続ではなくセッション数になる）。
+サーバーの設定（FINANCIAL_RPG_STATE_STORE など）は環境変数で指定する。
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import unicodedata
+from urllib.parse import urlsplit
+
+# 1戦闘あたりの行動の上限（終わらない戦闘で止まらないように）
+MAX_ACTIONS_PER_BATTLE = 200
+
+
+class LoadgenError(Exception):
+    """通信の失敗（接続できない、レスポンスが壊れているなど）"""
+
+
+# ---------------------------------------------------------------------------
+# HTTPクライアント
+# ---------------------------------------------------------------------------
+
+class _StaleConnection(Exception):
+    """レスポンスを1バイトも受け取る前に接続が閉じられた"""
+
+
+class HTTPClient:
+    """asyncio の HTTP/1.1 クライアント（1ユーザー1接続。keep-alive とCookieを保持する）
+
+    prefix はアプリを置いたパス（--url のパス部分。'/game' なら /game/api/start などに送る）。
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 30.0, prefix: str = ''):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.prefix = prefix.rstrip('/')
+        self.cookies = {}
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method: str, path: str, body: dict = None) -> tuple:
+        """(ステータス, JSONのレスポンス（JSONでなければNone）) を返す"""
+        payload = b'' if body is None else json.dumps(body).encode('utf-8')
+        head = [f'{method} {self.prefix}{path} HTTP/1.1', f'Host: {self.host}:{self.port}',
+                f'Content-Length: {len(payload)}']
+        if body is not None:
+            head.append('Content-Type: application/json')
+        if self.cookies:
+            head.append('Cookie: ' + '; '.join(f'{name}={value}' for name, value in self.cookies.items()))
+        message = ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + payload
+
+        for retry in (False, True):
+            reused = self._writer is not None
+            if not reused:
+                await self._connect()
+            try:
+                self._writer.write(message)
+                await self._writer.drain()
+                status, headers, data = await asyncio.wait_for(self._read_response(), self.timeout)
+                break
+            except _StaleConnection:
+                self.close()
+                if retry or not reused:
+                    raise LoadgenError('接続が閉じられました')
+                # keep-alive の接続がサーバー側で閉じられていたので、つなぎ直して送り直す
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as e:
+                self.close()
+                raise LoadgenError(f'{type(e).__name__}: {e}') from e
+
+        for cookie in headers.get('set-cookie', ()):
+            name, _, value = cookie.split(';', 1)[0].partition('=')
+            self.cookies[name.strip()] = value.strip()
+        if 'close' in headers.get('connection', ()):
+            self.close()
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+
+    async def _connect(self):
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise LoadgenError(f'接続できません: {e}') from e
+
+    async def _read_response(self) -> tuple:
+        reader = self._reader
+        status_line = await reader.readline()
+        if not status_line:
+            raise _StaleConnection()
+        version, status, *_ = status_line.decode('latin-1').split(' ', 2)
+        headers = {}
+        while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers.setdefault(name.strip().lower(), []).append(value.strip())
+        if version == 'HTTP/1.0' and 'keep-alive' not in headers.get('connection', ()):
+            headers.setdefault('connection', []).append('close')
+
+        if 'chunked' in headers.get('transfer-encoding', ()):
+            chunks = []
+            while size := int((await reader.readline()).split(b';', 1)[0], 16):
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            while await reader.readline() not in (b'\r\n', b'\n', b''):
+                pass  # トレーラー
+            data = b''.join(chunks)
+        elif 'content-length' in headers:
+            data = await reader.readexactly(int(headers['content-length'][0]))
+        else:
+            data = await reader.read()
+            headers.setdefault('connection', []).append('close')
+        return int(status), headers, data
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+class TestClientTransport:
+    """Flask のテストクライアントで HTTPClient と同じように呼び出す（Cookieはテストクライアントが保持する）"""
+
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    async def request(self, method: str, path: str, body: dict = None) -> tuple:
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+    def close(self):
+        pass
+
+
+# ---------------------------------------------------------------------------
+# 集計
+# ---------------------------------------------------------------------------
+
+# 表の列（見出し, 表示幅）。全角文字は2桁として揃える
+REPORT_COLUMNS = (('エンドポイント', 30), ('件数', 7), ('件/秒', 8), ('エラー', 8), ('失敗', 7),
+                  ('p50ms', 8), ('p90ms', 8), ('p99ms', 8), ('最大ms', 8))
+
+
+def _display_width(text: str) -> int:
+    return sum(2 if unicodedata.east_asian_width(c) in 'WF' else 1 for c in text)
+
+
+def _table_row(cells) -> str:
+    """REPORT_COLUMNS の幅で1行にする（最初の列は左寄せ、他は右寄せ）"""
+    padded = []
+    for i, (cell, (_, width)) in enumerate(zip(cells, REPORT_COLUMNS)):
+        fill = ' ' * max(0, width - _display_width(cell))
+        padded.append(cell + fill if i == 0 else fill + cell)
+    return ' '.join(padded)
+
+
+class EndpointStats:
+    """1つのエンドポイントの件数・エラー・レイテンシ"""
+
+    __slots__ = ('latencies', 'errors', 'failures')
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.failures = 0
+
+    def percentile(self, q: float) -> float:
+        """レイテンシの q パーセンタイル（秒。nearest-rank）"""
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * q / 100) - 1))]
+
+
+class LoadStats:
+    """エンドポイントごとの集計"""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.journeys = 0
+
+    def record(self, endpoint: str, latency: float, error: bool, failure: bool):
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        stats.latencies.append(latency)
+        stats.errors += error
+        stats.failures += failure
+
+    def total(self) -> EndpointStats:
+        total = EndpointStats()
+        for stats in self.endpoints.values():
+            total.latencies.extend(stats.latencies)
+            total.errors += stats.errors
+            total.failures += stats.failures
+        return total
+
+    def report(self, elapsed: float) -> str:
+        lines = [_table_row([title for title, _ in REPORT_COLUMNS])]
+        rows = sorted(self.endpoints.items()) + [('合計', self.total())]
+        for endpoint, stats in rows:
+            count = len(stats.latencies)
+            lines.append(_table_row([
+                endpoint, f'{count:d}', f'{count / elapsed:.1f}',
+                f'{stats.errors / count:.1%}', f'{stats.failures / count:.1%}',
+                f'{stats.percentile(50) * 1e3:.2f}', f'{stats.percentile(90) * 1e3:.2f}',
+                f'{stats.percentile(99) * 1e3:.2f}', f'{max(stats.latencies) * 1e3:.2f}'
+            ]))
+        return '\n'.join(lines)
+
+
+# ---------------------------------------------------------------------------
+# 仮想ユーザー
+# ---------------------------------------------------------------------------
+
+class VirtualUser:
+    """1人のプレイヤーの行動（レスポンスの game_state から所持金・パーティを追う）"""
+
+    def __init__(self, index: int, client, stats: LoadStats, rng: random.Random, think_time: float = 0.0):
+        self.index = index
+        self.client = client
+        self.stats = stats
+        self.rng = rng
+        self.think_time = think_time
+        self.game_state = None
+        self.catalog = {}
+        self.deadline = float('inf')
+
+    async def call(self, method: str, path: str, body: dict = None):
+        """リクエストを送って集計する（エラーならNone、それ以外はJSONのレスポンス）"""
+        start = time.perf_counter()
+        try:
+            status, data = await self.client.request(method, path, body)
+        except LoadgenError:
+            self.stats.record(path.split('?', 1)[0], time.perf_counter() - start, True, False)
+            return None
+        error = status >= 400 or data is None
+        failure = not error and data.get('success') is False
+        self.stats.record(path.split('?', 1)[0], time.perf_counter() - start, error, failure)
+        if error:
+            return None
+        if data.get('game_state'):
+            self.game_state = data['game_state']
+        if self.think_time:
+            await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+        return data
+
+    @property
+    def party(self) -> list:
+        return self.game_state['player']['party'] if self.game_state else []
+
+    @property
+    def gold(self) -> int:
+        return self.game_state['player']['gold'] if self.game_state else 0
+
+    async def start(self) -> bool:
+        data = await self.call('POST', '/api/start', {'name': f'負荷試験{self.index}'})
+        if not data or not data.get('success'):
+            return False
+        catalog = await self.call('GET', '/api/shop/items?type=weapons,armors,consumables&fields=name,price_gold')
+        if catalog:
+            self.catalog = {kind: catalog.get(kind, []) for kind in ('weapons', 'armors', 'consumables')}
+        return True
+
+    async def journey(self):
+        """冒険と戦闘を数回 → 仲間集め → 買い物"""
+        enemies = []
+        for _ in range(self.rng.randint(1, 4)):
+            if time.perf_counter() >= self.deadline:
+                return
+            enemies = await self.battle() or enemies
+        if enemies and self.rng.random() < 0.3:
+            await self.recruit(self.rng.choice(enemies))
+        if self.rng.random() < 0.5:
+            await self.shop()
+        self.stats.journeys += 1
+
+    async def battle(self) -> list:
+        """1回の戦闘（戦った敵の名前を返す）"""
+        data = await self.call('POST', '/api/adventure')
+        if not data or not data.get('battle_state'):
+            return []
+        enemies = [enemy['name'] for enemy in data['battle_state']['enemy_party']]
+        for _ in range(MAX_ACTIONS_PER_BATTLE):
+            if time.perf_counter() >= self.deadline:
+                break  # 戦闘の途中でも終了時刻で止める
+            action = {'action_type': 'defend' if self.rng.random() < 0.1 else 'attack'}
+            data = await self.call('POST', '/api/battle/action', action)
+            if not data or data.get('battle_result') or not data.get('battle_state'):
+                break
+        return enemies
+
+    async def recruit(self, monster_name: str):
+        body = {'monster_name': monster_name}
+        monsters = [member['name'] for member in self.party if member.get('template_id') is not None]
+        if len(self.party) >= 4 and monsters:
+            body['release_name'] = self.rng.choice(monsters)
+        await self.call('POST', '/api/recruit_monster', body)
+
+    async def shop(self):
+        kind = self.rng.choice(('weapons', 'armors'))
+        affordable = [item for item in self.catalog.get(kind, []) if item['price_gold'] <= self.gold]
+        if affordable:
+            best = max(affordable, key=lambda item: item['price_gold'])
+            await self.call('POST', '/api/shop/buy', {'type': kind[:-1], 'name': best['name']})
+
+        wounded = [member for member in self.party if member['hp'] < member['max_hp']]
+        potions = [item for item in self.catalog.get('consumables', []) if item['price_gold'] <= self.gold]
+        if wounded and potions:
+            potion = min(potions, key=lambda item: item['price_gold'])['name']
+            if await self.call('POST', '/api/shop/buy_consumable', {'name': potion}):
+                await self.call('POST', '/api/use_consumable',
+                                {'character_name': self.rng.choice(wounded)['name'], 'name': potion})
+
+    async def run(self, deadline: float, journeys: int = None):
+        self.deadline = deadline
+        if not await self.start():
+            return
+        done = 0
+        while time.perf_counter() < deadline and (journeys is None or done < journeys):
+            await self.journey()
+            done += 1
+
+
+async def run_load(client_factory, users: int, duration: float, ramp_up: float = 0.0, journeys: int = None,
+                   think_time: float = 0.0, seed: int = None) -> tuple:
+    """仮想ユーザーを ramp_up 秒かけて起動し、duration 秒（または各 journeys 回）まで動かす
+
+    (LoadStats, 経過秒) を返す。
+    """
+    if users < 1:
+        raise ValueError(f"users は1以上で指定してください: {users}")
+    stats = LoadStats()
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def user(index: int):
+        await asyncio.sleep(ramp_up * index / users)
+        client = client_factory()
+        try:
+            await VirtualUser(index, client, stats, random.Random(rng.getrandbits(64)), think_time).run(
+                deadline, journeys)
+        finally:
+            client.close()
+
+    await asyncio.gather(*(user(index) for index in range(users)))
+    return stats, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='プレイヤーの行動の流れを再現する JSON API の負荷試験')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', default='http://127.0.0.1:5000', help='サーバーのURL')
+    target.add_argument('--in-process', action='store_true', help='app.py をこのプロセスに読み込み、テストクライアントで実行')
+    parser.add_argument('--users', type=int, default=10, help='仮想ユーザー数')
+    parser.add_argument('--duration', type=float, default=30.0, help='実行する秒数')
+    parser.add_argument('--journeys', type=int, default=None, help='1ユーザーあたりの回数（指定すると duration より先に終わる）')
+    parser.add_argument('--ramp-up', type=float, default=0.0, help='全ユーザーを起動し終えるまでの秒数')
+    parser.add_argument('--think-time', type=float, default=0.0, help='リクエスト間の平均待ち時間（秒、指数分布）')
+    parser.add_argument('--timeout', type=float, default=30.0, help='1リクエストのタイムアウト（秒）')
+    parser.add_argument('--seed', type=int, default=None, help='仮想ユーザーの行動の乱数シード')
+    args = parser.parse_args()
+    if args.users < 1:
+        parser.error('--users は1以上で指定してください')
+
+    if args.in_process:
+        import app as app_module
+        client_factory = lambda: TestClientTransport(app_module.app)  # noqa: E731
+        target_name = 'テストクライアント（プロセス内）'
+    else:
+        url = urlsplit(args.url)
+        if url.scheme != 'http' or not url.hostname or url.query or url.fragment:
+            parser.error('--url は http://ホスト:ポート[/パス] の形式で指定してください')
+        host, port = url.hostname, url.port or 80
+        client_factory = lambda: HTTPClient(host, port, args.timeout, url.path)  # noqa: E731
+        target_name = args.url
+
+    print(f"{target_name} に仮想ユーザー {args.users}人 × {args.duration:g}秒")
+    stats, elapsed = asyncio.run(run_load(client_factory, args.users, args.duration, args.ramp_up,
+                                          args.journeys, args.think_time, args.seed))
+    total = stats.total()
+    if not total.latencies:
+        print("リクエストを送れませんでした")
+        return 1
+    print(stats.report(elapsed))
+    print(f"{elapsed:.1f}秒で {len(total.latencies)}リクエスト（{len(total.latencies) / elapsed:.1f}件/秒）、"
+          f"行動の流れ {stats.journeys}回、エラー {total.errors}件")
+    return 1 if total.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+リクエストのメトリクス（/metrics で Prometheus のテキスト形式に出力）
+
+- ルートごとのレイテンシのヒストグラム
+- 処理の段階（phase）ごとの時間のヒストグラム。段階は入れ子にでき、外側の段階の時間には
+  内側の段階の時間を含めない（段階の合計がリクエストの時間を超えない）
+- 保存する状態のサイズなどの値のヒストグラムと、Monster / Character の生成数などのカウンター
+
+リクエストの記録はスレッドごとで、記録中でなければ phase() などは何もしない。
+メトリクスはプロセスごとなので、server.py で複数ワーカーを動かす場合はワーカーごとの値になる。
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+# レイテンシのバケット（秒）
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# サイズのバケット（バイト）
+SIZE_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536)
+
+# method ラベルにする HTTP メソッド（それ以外は other。クライアントが任意の値を送れるため）
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+REQUEST_DURATION = 'financial_rpg_request_duration_seconds'
+PHASE_DURATION = 'financial_rpg_phase_duration_seconds'
+OBJECTS_CREATED = 'financial_rpg_objects_created_total'
+
+
+class Histogram:
+    """Prometheus のヒストグラム（バケットごとの件数・合計・件数）"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最後は +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestRecord:
+    """1リクエストの記録（段階の開始・終了の時刻の列）
+
+    Metrics.phase() は記録そのものをコンテキストマネージャーとして返し、段階の開始・終了では
+    時刻を追記するだけにする。段階ごとの時間は end でまとめて計算する。
+    """
+
+    __slots__ = ('route', 'start', 'events', 'created')
+
+    def __init__(self, start: float):
+        self.route = None
+        self.start = start
+        self.events = []   # (段階名, 時刻)。段階名が None なら直前に開始した段階の終了
+        self.created = {}  # 生成したオブジェクトの種類: 数（end でまとめて数える）
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.events.append((None, time.perf_counter()))
+
+    def phases(self, now: float) -> dict:
+        """段階ごとの時間（内側の段階を除く。終了していない段階は now まで）"""
+        phases, stack, mark = {}, [], self.start
+        for name, at in self.events:
+            if stack:
+                phases[stack[-1]] = phases.get(stack[-1], 0.0) + at - mark
+            if name is None:
+                stack.pop()
+            else:
+                stack.append(name)
+            mark = at
+        if stack:  # 例外で抜けた段階
+            phases[stack[-1]] = phases.get(stack[-1], 0.0) + now - mark
+        return phases
+
+
+class _NoPhase:
+    """記録中でないときの Metrics.phase()（何もしない）"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+def _labels(labels: tuple) -> str:
+    """{key="value",...}（ラベルが無ければ空文字列）"""
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels) + '}'
+
+
+class Metrics:
+    """メトリクスの登録と集計"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._histograms = {}  # 名前: (説明, バケット, {ラベル: Histogram})
+        self._counters = {}    # 名前: (説明, {ラベル: 値})
+        self._route_phases = {}  # ルート: {段階: PHASE_DURATION のヒストグラム}
+        self.histogram(REQUEST_DURATION, 'リクエストの処理時間（ルート・メソッド・ステータスごと）')
+        self.histogram(PHASE_DURATION, 'リクエスト内の段階ごとの処理時間（内側の段階を除く。other は段階の外）')
+        self.counter(OBJECTS_CREATED, '生成した Monster / Character の数（生成したリクエストのルートごと）')
+
+    def histogram(self, name: str, description: str, buckets: tuple = LATENCY_BUCKETS):
+        self._histograms.setdefault(name, (description, buckets, {}))
+
+    def counter(self, name: str, description: str):
+        self._counters.setdefault(name, (description, {}))
+
+    # --- リクエストの記録 ---
+
+    def current(self):
+        """このスレッドで記録中のリクエスト（無ければNone）"""
+        return getattr(self._local, 'record', None)
+
+    def begin(self):
+        if not self.enabled:
+            return None
+        record = RequestRecord(time.perf_counter())
+        self._local.record = record
+        return record
+
+    def set_route(self, route: str):
+        record = self.current()
+        if record is not None:
+            record.route = route
+
+    def end(self, record: RequestRecord, method: str, status: str):
+        now = time.perf_counter()
+        self._local.record = None
+        route = record.route or 'unmatched'
+        if method not in METHODS:
+            method = 'other'
+        total = now - record.start
+        phases = record.phases(now)
+        phases['other'] = total - sum(phases.values())
+        with self._lock:
+            requests = self._histograms[REQUEST_DURATION][2]
+            key = (('route', route), ('method', method), ('status', status))
+            (requests.get(key) or requests.setdefault(key, Histogram(LATENCY_BUCKETS))).observe(total)
+            # ルートごとの {段階: ヒストグラム}（段階のヒストグラムのラベルを毎回作らない）
+            route_phases = self._route_phases.get(route)
+            if route_phases is None:
+                route_phases = self._route_phases[route] = {}
+            for name, elapsed in phases.items():
+                histogram = route_phases.get(name)
+                if histogram is None:
+                    histogram = route_phases[name] = self._histograms[PHASE_DURATION][2].setdefault(
+                        (('route', route), ('phase', name)), Histogram(LATENCY_BUCKETS))
+                histogram.observe(elapsed)
+            if record.created:
+                counters = self._counters[OBJECTS_CREATED][1]
+                for kind, count in record.created.items():
+                    key = (('type', kind), ('route', route))
+                    counters[key] = counters.get(key, 0) + count
+
+    def phase(self, name: str):
+        """with metrics.phase('game_logic'): ... の時間を記録中のリクエストの段階として数える"""
+        record = getattr(self._local, 'record', None)
+        if record is None:
+            return _NO_PHASE
+        record.events.append((name, time.perf_counter()))
+        return record
+
+    def timed(self, name: str):
+        """関数の実行時間を段階 name として数えるデコレーター"""
+        def decorator(func):
+            def wrapper(*args, **kwargs):
+                with self.phase(name):
+                    return func(*args, **kwargs)
+            wrapper.__name__ = func.__name__
+            wrapper.__doc__ = func.__doc__
+            wrapper.__wrapped__ = func
+            return wrapper
+        return decorator
+
+    # --- 値の記録 ---
+
+    def observe(self, name: str, labels: tuple, value: float):
+        if not self.enabled:
+            return
+        _, buckets, series = self._histograms[name]
+        with self._lock:
+            (series.get(labels) or series.setdefault(labels, Histogram(buckets))).observe(value)
+
+    def inc(self, name: str, labels: tuple, amount: float = 1):
+        if not self.enabled:
+            return
+        series = self._counters[name][1]
+        with self._lock:
+            series[labels] = series.get(labels, 0) + amount
+
+    def created(self, kind: str):
+        """Monster / Character を1つ生成した（記録中のリクエストのルートで数える。リクエスト外は数えない）"""
+        record = getattr(self._local, 'record', None)
+        if record is not None:
+            record.created[kind] = record.created.get(kind, 0) + 1
+
+    # --- 出力 ---
+
+    def render(self) -> str:
+        """Prometheus のテキスト形式（version 0.0.4）"""
+        lines = []
+        with self._lock:
+            for name, (description, buckets, series) in sorted(self._histograms.items()):
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip((*buckets, '+Inf'), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_labels((*labels, ("le", bound)))} {cumulative}')
+                    lines.append(f'{name}_sum{_labels(labels)} {histogram.sum!r}')
+                    lines.append(f'{name}_count{_labels(labels)} {histogram.count}')
+            for name, (description, series) in sorted(self._counters.items()):
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} counter')
+                for labels, value in sorted(series.items()):
+                    lines.append(f'{name}{_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """WSGIアプリの前後でリクエストの記録を開始・終了する（セッションの読み書きも含めて計測）
+
+    ストリーミングのレスポンス（/api/events など）は本体を返すまでの時間になる。
+    """
+
+    def __init__(self, wsgi_app, metrics: Metrics):
+        self.wsgi_app = wsgi_app
+        self.metrics = metrics
+
+    def __call__(self, environ, start_response):
+        record = self.metrics.begin()
+        if record is None:
+            return self.wsgi_app(environ, start_response)
+        status = ['500']
+
+        def recording_start_response(status_line, headers, exc_info=None):
+            status[0] = status_line.split(' ', 1)[0]
+            return start_response(status_line, headers, exc_info)
+
+        try:
+            return self.wsgi_app(environ, recording_start_response)
+        finally:
+            self.metrics.end(record, environ.get('REQUEST_METHOD', ''), status[0])
+
+
+# アプリ全体で使うメトリクス（app.py が FINANCIAL_RPG_METRICS に従って有効・無効を設定する）
+METRICS = Metrics()
@@ -6,8 +6,9 @@
 
 from character import Character, CharacterType
 from party import Party
-from item import WEAPONS, ARMORS, CONSUMABLES, Weapon, Armor, Consumable
-from typing import Dict, List
+from inventory import Inventory
+from item import WEAPONS, ARMORS, CONSUMABLES
+from typing import Dict
 
 class Player:
     """プレイヤークラス"""
@@ -15,8 +16,8 @@ class Player:
     def __init__(self):
         self.gold = 500  # 初期資金
         self.f_tickets = 0  # F券
-        self.inventory_weapons: List[Weapon] = []
-        self.inventory_armors: List[Armor] = []
+        self.inventory_weapons = Inventory(WEAPONS)  # 武器名: 個数
+        self.inventory_armors = Inventory(ARMORS)  # 防具名: 個数
         self.inventory_consumables: Dict[str, int] = {}  # アイテム名: 個数
         self.party = Party()
         self.main_character = None
@@ -55,83 +56,57 @@ class Player:
             return True
         return False
     
-    def buy_weapon(self, weapon_name: str, use_f_tickets: bool = False) -> bool:
-        """武器を購入"""
-        if weapon_name not in WEAPONS:
+    def _buy(self, inventory: Inventory, name: str, use_f_tickets: bool) -> bool:
+        """武器・防具を購入して所持品に1個加える"""
+        template = inventory.catalog.get(name)
+        if template is None:
             return False
         
-        weapon_template = WEAPONS[weapon_name]
-        weapon = Weapon(
-            weapon_template.name,
-            weapon_template.attack_bonus,
-            weapon_template.price_gold,
-            weapon_template.price_f_tickets,
-            weapon_template.description
-        )
-        
         if use_f_tickets:
-            if self.spend_f_tickets(weapon.price_f_tickets):
-                self.inventory_weapons.append(weapon)
-                return True
+            paid = self.spend_f_tickets(template.price_f_tickets)
         else:
-            if self.spend_gold(weapon.price_gold):
-                self.inventory_weapons.append(weapon)
-                return True
-        
-        return False
+            paid = self.spend_gold(template.price_gold)
+        return paid and inventory.add(name)
+    
+    def buy_weapon(self, weapon_name: str, use_f_tickets: bool = False) -> bool:
+        """武器を購入"""
+        return self._buy(self.inventory_weapons, weapon_name, use_f_tickets)
     
     def buy_armor(self, armor_name: str, use_f_tickets: bool = False) -> bool:
         """防具を購入"""
-        if armor_name not in ARMORS:
-            return False
-        
-        armor_template = ARMORS[armor_name]
-        armor = Armor(
-            armor_template.name,
-            armor_template.defense_bonus,
-            armor_template.price_gold,
-            armor_template.price_f_tickets,
-            armor_template.description
-        )
-        
-        if use_f_tickets:
-            if self.spend_f_tickets(armor.price_f_tickets):
-                self.inventory_armors.append(armor)
-                return True
-        else:
-            if self.spend_gold(armor.price_gold):
-                self.inventory_armors.append(armor)
-                return True
-        
-        return False
+        return self._buy(self.inventory_armors, armor_name, use_f_tickets)
     
-    def equip_weapon_to_character(self, character: Character, weapon_name: str) -> bool:
-        """キャラクターに武器を装備"""
-        weapon = None
-        for w in self.inventory_weapons:
-            if w.name == weapon_name:
-                weapon = w
-                break
-        
-        if weapon is None:
+    @staticmethod
+    def _equip(inventory: Inventory, current, equip, name: str) -> bool:
+        """装備されていない1個を装備し、それまでの装備は所持品に戻す"""
+        if current is not None and current.name == name:
+            return True
+        item = inventory.equip(name)
+        if item is None:
             return False
-        
-        character.equip_weapon(weapon)
+        if current is not None:
+            inventory.unequip(current.name)
+        equip(item)
         return True
     
+    def equip_weapon_to_character(self, character: Character, weapon_name: str) -> bool:
+        """キャラクターに武器を装備（所持していないか、すべて装備中ならFalse）"""
+        return self._equip(self.inventory_weapons, character.equipped_weapon,
+                           character.equip_weapon, weapon_name)
+    
     def equip_armor_to_character(self, character: Character, armor_name: str) -> bool:
-        """キャラクターに防具を装備"""
-        armor = None
-        for a in self.inventory_armors:
-            if a.name == armor_name:
-                armor = a
-                break
-        
-        if armor is None:
-            return False
-        
-        character.equip_armor(armor)
-        return True
+        """キャラクターに防具を装備（所持していないか、すべて装備中ならFalse）"""
+        return self._equip(self.inventory_armors, character.equipped_armor,
+                           character.equip_armor, armor_name)
+    
+    def unequip_all(self, character: Character):
+        """キャラクターの装備を外して所持品に戻す（パーティから外すとき用）"""
+        if character.equipped_weapon is not None:
+            self.inventory_weapons.unequip(character.equipped_weapon.name)
+            character.equip_weapon(None)
+        if character.equipped_armor is not None:
+            self.inventory_armors.unequip(character.equipped_armor.name)
+            character.equip_armor(None)
     
     def buy_consumable(self, consumable_name: str, use_f_tickets: bool = False, quantity: int = 1) -> bool:
         """消費アイテムを購入"""
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+遅いリクエストのプロファイル
+
+リクエストの一部（sample_rate の割合）を cProfile で計測し、threshold 秒以上かかったものだけ
+<directory> に保存する。1つのプロファイルは次の3ファイル。
+
+- <id>.pstats     cProfile の結果（python -m pstats, snakeviz などで開く）
+- <id>.collapsed  フレームグラフ用の折りたたみスタック（flamegraph.pl, speedscope などで開く）
+- <id>.json       ルート・処理時間などの情報
+
+cProfile は呼び出し元ごとの時間しか持たないので、折りたたみスタックは呼び出しグラフを根から
+たどり、各関数の時間を呼び出し元ごとの時間の比で配分したもの（近似）。
+
+sample_rate が 0 なら無効で、リクエストごとのコストは sample_rate の比較だけ。
+configure() の設定は <directory>/profiler.json に保存し、各プロセスの watch() のスレッドが
+refresh 秒ごとに読み直すので、server.py の全ワーカーに反映される。
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import secrets
+import threading
+import time
+
+# 管理エンドポイントの設定の保存先（プロファイルのディレクトリ内）
+CONTROL_FILE = 'profiler.json'
+
+# 保存するファイルの種類（拡張子）
+PROFILE_KINDS = ('pstats', 'collapsed')
+
+# 折りたたみスタックに出力する最小の時間（マイクロ秒）と最大の深さ
+_MIN_MICROSECONDS = 1
+_MAX_DEPTH = 200
+
+_PROFILE_ID = re.compile(r'\d{8}-\d{6}-\d+-[0-9a-f]{6}')
+
+
+def _frame_label(func: tuple) -> str:
+    """pstats の関数キー (ファイル, 行, 名前) をフレームグラフのフレーム名にする"""
+    filename, line, name = func
+    if filename == '~':  # 組み込み関数
+        label = name
+    else:
+        label = f'{name} ({os.path.basename(filename)}:{line})'
+    return label.replace(';', ':')
+
+
+def collapsed_stacks(stats: pstats.Stats) -> list:
+    """pstats の呼び出しグラフから折りたたみスタックの行（'a;b;c 時間µs'）を作る"""
+    entries = stats.stats  # 関数: (呼び出し回数, 再帰を除く回数, 自身の時間, 累積時間, {呼び出し元: (...)})
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, entry in entries.items()
+             if not any(caller in entries for caller in entry[4])]
+
+    totals = {}
+
+    def walk(func, elapsed, stack):
+        _, _, self_time, cumulative, _ = entries[func]
+        stack.append(_frame_label(func))
+        scale = elapsed / cumulative if cumulative > 0 else 0.0
+        own = self_time * scale
+        for callee, edge_time in callees.get(func, ()):
+            if _frame_label(callee) in stack:
+                continue  # 再帰の呼び出しの時間は、スタック上の同じ関数の時間（全段の合計）に含まれている
+            child = edge_time * scale
+            if child * 1e6 >= _MIN_MICROSECONDS and len(stack) < _MAX_DEPTH:
+                walk(callee, child, stack)
+            else:
+                own += child  # 短すぎる・深すぎる呼び出しは呼び出し元の時間に含める
+        key = ';'.join(stack)
+        totals[key] = totals.get(key, 0.0) + own
+        stack.pop()
+
+    for root in roots:
+        walk(root, entries[root][3], [])
+    return [f'{key} {round(value * 1e6)}' for key, value in sorted(totals.items())
+            if round(value * 1e6) >= _MIN_MICROSECONDS]
+
+
+class RequestProfiler:
+    """リクエストのサンプリングと、遅いリクエストのプロファイルの保存・一覧"""
+
+    def __init__(self, directory: str, sample_rate: float = 0.0, threshold: float = 0.5,
+                 keep: int = 100, refresh: float = 1.0):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.keep = keep
+        self.refresh = refresh
+        self.defaults = {'sample_rate': sample_rate, 'threshold': threshold}
+        self._control_path = os.path.join(directory, CONTROL_FILE)
+        self._control_mtime = None
+        self._watcher = None
+        self._rng = random.Random()  # ゲームの random の列を変えない
+        self._active = threading.Lock()  # 同時に計測するのは1リクエストだけ
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    # --- 設定 ---
+
+    def configure(self, sample_rate: float = None, threshold: float = None):
+        """設定を変えて保存する（他のプロセスも refresh 秒以内に読み込む）"""
+        settings = self.settings()
+        if sample_rate is not None:
+            settings['sample_rate'] = sample_rate
+        if threshold is not None:
+            settings['threshold'] = threshold
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f'{self._control_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(settings, f)
+        os.replace(temp_path, self._control_path)
+        self.reload()
+
+    def reset(self):
+        """保存した設定を消して環境変数の設定に戻す"""
+        try:
+            os.remove(self._control_path)
+        except FileNotFoundError:
+            pass
+        self.reload()
+
+    def settings(self) -> dict:
+        return {'sample_rate': self.sample_rate, 'threshold': self.threshold}
+
+    def reload(self):
+        """保存された設定が変わっていれば読み込む"""
+        try:
+            mtime = os.stat(self._control_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._control_mtime:
+            return
+        self._control_mtime = mtime
+        settings = dict(self.defaults)
+        if mtime is not None:
+            try:
+                with open(self._control_path, encoding='utf-8') as f:
+                    settings.update(json.load(f))
+            except (OSError, ValueError):
+                return  # 書き込み途中などは次の機会に読み直す
+        self.sample_rate = float(settings['sample_rate'])
+        self.threshold = float(settings['threshold'])
+
+    def watch(self):
+        """refresh 秒ごとに保存された設定を読み直すスレッドを起動（リクエストの処理中には読まない）"""
+        if self._watcher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.refresh)
+                self.reload()
+
+        self._watcher = threading.Thread(target=run, name='profiler-settings', daemon=True)
+        self._watcher.start()
+
+    # --- 計測 ---
+
+    def start(self):
+        """このリクエストを計測するなら開始した cProfile.Profile を返す（しないならNone）"""
+        rate = self.sample_rate
+        if rate <= 0 or (rate < 1 and self._rng.random() >= rate):
+            return None
+        if not self._active.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def finish(self, profile: cProfile.Profile, elapsed: float, info: dict):
+        """計測を終え、threshold 秒以上かかっていれば保存する（保存したらプロファイルのIDを返す）"""
+        profile.disable()
+        self._active.release()
+        if elapsed < self.threshold:
+            return None
+        try:
+            return self.save(profile, elapsed, info)
+        except OSError:
+            return None  # 保存できなくてもリクエストは失敗させない
+
+    def save(self, profile: cProfile.Profile, elapsed: float, info: dict) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{secrets.token_hex(3)}"
+        stats = pstats.Stats(profile)
+        stats.dump_stats(self._path(profile_id, 'pstats'))
+        with open(self._path(profile_id, 'collapsed'), 'w', encoding='utf-8') as f:
+            f.writelines(line + '\n' for line in collapsed_stacks(stats))
+        meta = dict(info, id=profile_id, duration=elapsed, created_at=time.time())
+        with open(self._path(profile_id, 'json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        self._prune()
+        return profile_id
+
+    # --- 保存済みのプロファイル ---
+
+    def _path(self, profile_id: str, kind: str) -> str:
+        return os.path.join(self.directory, f'{profile_id}.{kind}')
+
+    def path(self, profile_id: str, kind: str):
+        """ダウンロードするファイルのパス（IDや種類が不正、またはファイルが無ければNone）"""
+        if kind not in PROFILE_KINDS or not _PROFILE_ID.fullmatch(profile_id or ''):
+            return None
+        path = self._path(profile_id, kind)
+        return path if os.path.exists(path) else None
+
+    def profiles(self) -> list:
+        """保存済みのプロファイルの情報（新しい順）"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        profiles = []
+        for name in names:
+            if not name.endswith('.json') or not _PROFILE_ID.fullmatch(name[:-5]):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # 別のプロセスが削除した
+        return sorted(profiles, key=lambda profile: profile['created_at'], reverse=True)
+
+    def _prune(self):
+        for profile in self.profiles()[self.keep:]:
+            for kind in (*PROFILE_KINDS, 'json'):
+                try:
+                    os.remove(self._path(profile['id'], kind))
+                except FileNotFoundError:
+                    pass
+
+
+class ProfilerMiddleware:
+    """WSGIアプリの呼び出しを RequestProfiler でサンプリングする
+
+    計測するのはアプリがレスポンスを返すまで（ストリーミングの本体は含めない）。
+    """
+
+    def __init__(self, wsgi_app, profiler: RequestProfiler):
+        self.wsgi_app = wsgi_app
+        self.profiler = profiler
+
+    def __call__(self, environ, start_response):
+        profiler = self.profiler
+        if profiler.sample_rate <= 0:
+            return self.wsgi_app(environ, start_response)
+        profile = profiler.start()
+        if profile is None:
+            return self.wsgi_app(environ, start_response)
+        status = ['500']
+
+        def recording_start_response(status_line, headers, exc_info=None):
+            status[0] = status_line.split(' ', 1)[0]
+            return start_response(status_line, headers, exc_info)
+
+        start = time.perf_counter()
+        try:
+            return self.wsgi_app(environ, recording_start_response)
+        finally:
+            elapsed = time.perf_counter() - start
+            profiler.finish(profile, elapsed, {
+                'method': environ.get('REQUEST_METHOD', ''),
+                'path': environ.get('PATH_INFO', ''),
+                'status': status[0],
+            })
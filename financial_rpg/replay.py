@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+戦闘のリプレイ
+
+Battle の乱数は戦闘ごとの random.Random（シードは Battle.seed）なので、戦闘は
+(シード, 開始時のパーティ, 行動の列) だけで決まる。BattleReplay はこれを記録し、
+replay() で同じ戦闘を最初から再現する。
+
+- パーティは codec.encode_party の形式（モンスターはテンプレートIDとレベル）
+- 行動は player_action / player_turn / auto_resolve の呼び出し単位（成功したものだけ）
+- 終了した戦闘は結果（ターン数・各メンバーのHP/MPなど）も保存し、verify で再生結果と照合する
+
+終了した戦闘の保存（アーカイブ）用の形式。進行中の戦闘を BattleRegistry が保存先・スナップショットに
+書き出すときは、読み込みのたびに再生しなくてよいよう戦闘の状態をそのまま pickle する。
+
+使い方（保存済みのリプレイをまとめて再生して検証）:
+    python replay.py battle_logs
+"""
+
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+import codec
+from battle_log import REPLAY_FILE
+from character import Character
+from party import Party
+
+REPLAY_VERSION = 1
+
+ACTION_TYPES = ('attack', 'spell', 'defend')
+SPELL_NAMES = tuple(Character.SPELLS)
+
+# 記録する呼び出しの種類
+PLAYER_ACTION = 0
+PLAYER_TURN = 1
+AUTO_RESOLVE = 2
+
+
+class ReplayError(ValueError):
+    """リプレイを読めない、または再生結果が記録と一致しない"""
+
+
+def new_seed(rng=random) -> int:
+    """戦闘のシード（グローバルの random から引くので、random.seed() したシミュレーションは再現できる）"""
+    return rng.getrandbits(63)
+
+
+def _encode_action(action_type: str, target_index, spell_name) -> list:
+    return [ACTION_TYPES.index(action_type), target_index,
+            None if spell_name is None else SPELL_NAMES.index(spell_name)]
+
+
+def _decode_action(data: list) -> tuple:
+    action_type, target_index, spell = data
+    return ACTION_TYPES[action_type], target_index, None if spell is None else SPELL_NAMES[spell]
+
+
+def _array_header(count: int) -> bytes:
+    """msgpack の配列の先頭（要素数）"""
+    if count < 16:
+        return bytes([0x90 | count])
+    if count < 0x10000:
+        return b'\xdc' + count.to_bytes(2, 'big')
+    return b'\xdd' + count.to_bytes(4, 'big')
+
+
+def outcome(battle) -> list:
+    """照合に使う戦闘の結果（ターン・次に行動するメンバー・ログの件数・全員のHP/MP/防御力）"""
+    members = battle.player_party.members + battle.enemy_party.members
+    return [battle.turn, battle.current_character_index, battle.log.count,
+            [[member.hp, member.mp, member.defense] for member in members]]
+
+
+class BattleReplay:
+    """1つの戦闘の記録（シード・開始時の状態・行動の列）
+
+    行動はエンコード済みのバイト列に追記していく。進行中の戦闘を pickle するときに行動の数に
+    比例するオブジェクトを作らないため（バイト列のコピーだけになる）。
+    """
+
+    __slots__ = ('battle_id', 'seed', 'start', 'players', 'enemies', '_actions', '_count', 'outcome')
+
+    # encode() の項目数（バージョンを除く）
+    FIELDS = 7
+
+    def __init__(self, battle_id: str, seed: int, start: list, players: list, enemies: list,
+                 actions: list = None, outcome: list = None):
+        self.battle_id = battle_id
+        self.seed = seed
+        self.start = start  # [ターン, 次に行動するメンバー, 戦闘ログのイベント数]
+        self.players = players
+        self.enemies = enemies
+        self._actions = bytearray()
+        self._count = 0
+        for action in actions or ():
+            self._append(action)
+        self.outcome = outcome
+
+    @classmethod
+    def record(cls, battle) -> 'BattleReplay':
+        """battle の現在の状態を開始時の状態として記録を始める"""
+        start = [battle.turn, battle.current_character_index, battle.log.count]
+        return cls(battle.log.battle_id, battle.seed, start,
+                   codec.encode_party(battle.player_party.members), codec.encode_party(battle.enemy_party.members))
+
+    def _append(self, action: list):
+        self._actions += codec.packb(action)
+        self._count += 1
+
+    @property
+    def actions(self) -> list:
+        """記録した行動の列"""
+        return codec.unpackb(_array_header(self._count) + bytes(self._actions))
+
+    def record_action(self, action_type: str, target_index, spell_name):
+        self._append([PLAYER_ACTION, _encode_action(action_type, target_index, spell_name)])
+
+    def record_turn(self, actions: list):
+        self._append([PLAYER_TURN, [_encode_action(action['action_type'], action.get('target_index'),
+                                                   action.get('spell_name')) for action in actions]])
+
+    def record_auto(self, policy, max_turns: int):
+        self._append([AUTO_RESOLVE, policy.use_spells, policy.heal_threshold, max_turns])
+
+    def finish(self, battle):
+        """終了した戦闘の結果を記録する（verify で照合する）"""
+        self.outcome = outcome(battle)
+
+    def encode(self) -> bytes:
+        return codec.packb([REPLAY_VERSION, self.battle_id, self.seed, self.start, self.players,
+                            self.enemies, self.actions, self.outcome])
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'BattleReplay':
+        try:
+            version, *fields = codec.unpackb(data)
+        except (codec.CodecError, TypeError, ValueError, IndexError) as e:
+            raise ReplayError(f"Malformed replay: {e}") from e
+        if version != REPLAY_VERSION:
+            raise ReplayError(f"Unsupported replay version: {version}")
+        if len(fields) != cls.FIELDS:
+            raise ReplayError("Malformed replay")
+        try:
+            return cls(*fields)
+        except TypeError as e:
+            raise ReplayError(f"Malformed replay: {e}") from e
+
+    def replay(self):
+        """記録した行動を最初から再生した Battle を返す（記録は引き継ぐ。ログのイベントは保存済みとして捨てる）"""
+        from battle import AutoPolicy, Battle
+
+        player_party, enemy_party = Party(), Party()
+        player_party.members.extend(codec.decode_party(self.players))
+        enemy_party.members.extend(codec.decode_party(self.enemies))
+        battle = Battle(player_party, enemy_party, seed=self.seed, battle_id=self.battle_id, record=False)
+        battle.turn, battle.current_character_index, battle.log.count = self.start
+
+        for kind, *args in self.actions:
+            if kind == PLAYER_ACTION:
+                action_type, target_index, spell_name = _decode_action(args[0])
+                result = battle.player_action(action_type, target_index, spell_name=spell_name)
+            elif kind == PLAYER_TURN:
+                result = battle.player_turn([dict(zip(('action_type', 'target_index', 'spell_name'),
+                                                      _decode_action(action))) for action in args[0]])
+            else:
+                use_spells, heal_threshold, max_turns = args
+                battle.auto_resolve(AutoPolicy(heal_threshold, use_spells), max_turns)
+                continue  # auto_resolve は途中で失敗しても記録する
+            if not result['success']:
+                raise ReplayError(f"Replay diverged: {result['message']}")
+
+        battle.log.drain()
+        battle.replay = self
+        return battle
+
+    def verify(self) -> bool:
+        """再生した結果が記録した結果と一致するか（結果の無い進行中の戦闘は再生できればTrue）"""
+        battle = self.replay()
+        return self.outcome is None or outcome(battle) == self.outcome
+
+
+def verify_replays(paths) -> tuple:
+    """リプレイのファイルをまとめて再生・照合し、(検証した数, [(パス, 理由), ...]) を返す"""
+    checked, failures = 0, []
+    for path in paths:
+        checked += 1
+        try:
+            with open(path, 'rb') as f:
+                replay = BattleReplay.decode(f.read())
+            if not replay.verify():
+                failures.append((path, '結果が一致しません'))
+        except (OSError, ReplayError, codec.CodecError) as e:
+            failures.append((path, str(e)))
+    return checked, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='保存済みの戦闘のリプレイをまとめて再生して検証')
+    parser.add_argument('directory', nargs='?',
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'battle_logs'),
+                        help='戦闘ログのディレクトリ（FINANCIAL_RPG_BATTLE_LOG_DIR）')
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.directory, '*', '*', REPLAY_FILE)))
+    start = time.perf_counter()
+    checked, failures = verify_replays(paths)
+    elapsed = time.perf_counter() - start
+    print(f"{checked}件のリプレイを検証: 不一致 {len(failures)}件（{elapsed:.2f}秒）")
+    for path, reason in failures[:20]:
+        print(f"  {path}: {reason}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本番用の複数プロセスサーバー（プリフォーク）
+
+マスタープロセスがカタログ（item, monster）を読み込んでからワーカーを fork する。
+ワーカーはそれぞれ SO_REUSEPORT で同じポートに待ち受け、カーネルが接続を振り分ける
+（SO_REUSEPORT が無い環境ではマスターが作ったソケットを共有する）。
+
+    python server.py --workers 4 --port 5000
+
+シグナル:
+    SIGHUP           新しいワーカーを起動してから古いワーカーを終了する（app.py などの再読み込み）
+    SIGTERM, SIGINT  処理中のリクエストを待って全ワーカーを終了する
+
+ワーカーが2つ以上の場合、ゲーム状態と戦闘はワーカー間で共有できるSQLiteに保存する
+（FINANCIAL_RPG_STATE_STORE が memory なら sqlite に切り替える）。
+世界の経済は各ワーカーが同じ起点時刻（FINANCIAL_RPG_ECONOMY_EPOCH）とシードから計算するので共有不要。
+
+プロセスごとの状態の制限（ワーカーが2つ以上の場合）:
+    - サーバープッシュ（/api/events）の購読者はワーカーごとで、戦闘を処理したワーカーと
+      接続を受けたワーカーが違うとイベントが届かない。そのため無効にする
+      （FINANCIAL_RPG_EVENTS=1 を指定した場合は起動しない。使うなら --workers 1）
+    - 差分レスポンスの「最後に送った状態」もワーカーごとなので、別のワーカーに振り分けられた
+      リクエストは状態全体を返す（state_resync）。正しさは変わらないが差分の効果は下がる
+
+SIGHUP で再読み込みされるのは preload() で読み込んでいないモジュール（app.py など）だけ。
+preload() のモジュール（item, monster, battle, codec, economy）はマスターに読み込み済みなので、
+変更を反映するにはマスターごと再起動する。
+"""
+
+import argparse
+import gc
+import os
+import random
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+
+REUSE_PORT = hasattr(socket, 'SO_REUSEPORT') and sys.platform.startswith('linux')
+
+
+def preload():
+    """fork 前にカタログと依存パッケージを読み込み、コピーオンライトで共有する
+
+    ここで読み込んだモジュールは SIGHUP では再読み込みされない（マスターの再起動が必要）。
+    """
+    import flask  # noqa: F401
+    import werkzeug.serving  # noqa: F401
+    import item  # noqa: F401
+    import monster  # noqa: F401
+    import battle  # noqa: F401
+    import codec  # noqa: F401
+    import economy  # noqa: F401
+    # 以後の GC で共有ページに書き込まないよう、読み込み済みのオブジェクトを GC 対象外にする
+    gc.freeze()
+
+
+def _listen_socket(host: str, port: int, reuse_port: bool, backlog: int = 1024):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    if backlog:
+        sock.listen(backlog)
+    return sock
+
+
+class _RequestCounter:
+    """処理したリクエスト数を数え、max_requests に達したら on_limit を呼ぶWSGIミドルウェア"""
+
+    def __init__(self, app, max_requests: int, on_limit):
+        self.app = app
+        self.max_requests = max_requests
+        self.on_limit = on_limit
+        self.handled = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.handled += 1
+            limit_reached = self.max_requests and self.handled == self.max_requests
+        if limit_reached:
+            self.on_limit()
+        return self.app(environ, start_response)
+
+
+def _worker_server_class():
+    """ワーカー用のサーバークラス（werkzeug は fork 前に読み込むのでここで定義する）"""
+    from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+
+    class WorkerRequestHandler(WSGIRequestHandler):
+        timeout = 5  # keep-alive のアイドル接続を閉じるまでの秒数（終了を待たせないため）
+
+    class WorkerServer(ThreadedWSGIServer):
+        """処理中の接続数を数えるサーバー（終了時に処理中の接続を待つため）"""
+
+        def __init__(self, host, port, app, fd):
+            super().__init__(host, port, app, WorkerRequestHandler, fd=fd)
+            self.connections = 0
+            self._connections_lock = threading.Lock()
+
+        def process_request(self, request, client_address):
+            with self._connections_lock:
+                self.connections += 1
+            super().process_request(request, client_address)
+
+        def shutdown_request(self, request):
+            try:
+                super().shutdown_request(request)
+            finally:
+                with self._connections_lock:
+                    self.connections -= 1
+
+    return WorkerServer
+
+
+def run_worker(listen_sock, host: str, port: int, max_requests: int, graceful_timeout: float, ready_fd: int):
+    """ワーカープロセスの本体（終了コードを返す）"""
+    import app as app_module
+
+    if listen_sock is None:
+        listen_sock = _listen_socket(host, port, reuse_port=True)
+
+    server = None
+    stopping = threading.Event()
+
+    def stop():
+        # serve_forever を実行中のスレッドからは shutdown できないので別スレッドで止める
+        if not stopping.is_set():
+            stopping.set()
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+    counter = _RequestCounter(app_module.app, max_requests, stop)
+    server = _worker_server_class()(host, port, counter, fd=listen_sock.fileno())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C はマスターが受けて SIGTERM を送る
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    os.write(ready_fd, b'.')
+    os.close(ready_fd)
+
+    server.serve_forever()  # 終了時に server.socket（listen_sock の複製）は閉じられる
+
+    # SO_REUSEPORT ではソケットを閉じると受付待ちの接続が切断されるので、残りを処理してから閉じる
+    listen_sock.setblocking(False)
+    while True:
+        try:
+            request, client_address = listen_sock.accept()
+        except OSError:
+            break
+        request.setblocking(True)
+        server.process_request(request, client_address)
+    listen_sock.close()
+
+    # SSEの接続を閉じて処理中のリクエストを待つ
+    app_module.event_bus.close_all()
+    deadline = time.monotonic() + graceful_timeout
+    while server.connections and time.monotonic() < deadline:
+        time.sleep(0.05)
+    app_module.battle_registry.snapshot()
+    return 0
+
+
+class Arbiter:
+    """ワーカープロセスの起動・監視・入れ替えを行うマスター"""
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 5000, workers: int = 2,
+                 max_requests: int = 0, max_requests_jitter: int = 0, graceful_timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.num_workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.workers = {}  # pid: 世代
+        self.generation = 0
+        self._reload = False
+        self._stop = False
+        self._ready_r, self._ready_w = os.pipe()
+        os.set_blocking(self._ready_r, False)
+        # SO_REUSEPORT ではマスターは bind だけしてポートを確保する（listen しないので接続は来ない）
+        self.sock = _listen_socket(host, port, REUSE_PORT, backlog=0 if REUSE_PORT else 1024)
+
+    def spawn(self):
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            # 全ワーカーが同時に入れ替わらないようにずらす
+            max_requests += random.randint(0, self.max_requests_jitter)
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = self.generation
+            return pid
+
+        code = 1
+        try:
+            os.close(self._ready_r)
+            random.seed()  # 親プロセスと乱数列を共有しない
+            if REUSE_PORT:
+                self.sock.close()
+            code = run_worker(None if REUSE_PORT else self.sock, self.host, self.port,
+                              max_requests, self.graceful_timeout, self._ready_w)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+        finally:
+            os._exit(code)
+
+    def wait_ready(self, count: int, timeout: float = 30.0) -> int:
+        """起動したワーカーが待ち受けを始めるのを待ち、準備できた数を返す"""
+        ready = 0
+        deadline = time.monotonic() + timeout
+        while ready < count:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select([self._ready_r], [], [], remaining)
+            if readable:
+                ready += len(os.read(self._ready_r, count - ready))
+        return ready
+
+    def _drain_ready(self):
+        """補充で起動したワーカーの準備通知を読み捨てる"""
+        try:
+            while os.read(self._ready_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def reap(self):
+        """終了したワーカーを回収"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.workers.pop(pid, None)
+
+    def kill_workers(self, pids, sig=signal.SIGTERM):
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                self.workers.pop(pid, None)
+
+    def reload(self):
+        """新しい世代のワーカーを起動し、待ち受けを始めてから古い世代を終了する"""
+        old = [pid for pid, generation in self.workers.items() if generation == self.generation]
+        self._drain_ready()
+        self.generation += 1
+        new = [self.spawn() for _ in range(self.num_workers)]
+        if self.wait_ready(self.num_workers) < self.num_workers:
+            # 新しいワーカーが起動できなければ（app.py の構文エラーなど）古い世代で続ける
+            print("[server] reload failed: keeping the previous workers", file=sys.stderr, flush=True)
+            self.kill_workers(new, signal.SIGKILL)
+            self.generation -= 1
+            return
+        self.kill_workers(old)
+        print(f"[server] reload: generation {self.generation}", flush=True)
+
+    def run(self):
+        signal.signal(signal.SIGHUP, lambda signum, frame: setattr(self, '_reload', True))
+        signal.signal(signal.SIGTERM, lambda signum, frame: setattr(self, '_stop', True))
+        signal.signal(signal.SIGINT, lambda signum, frame: setattr(self, '_stop', True))
+
+        for _ in range(self.num_workers):
+            self.spawn()
+        self.wait_ready(self.num_workers)
+        print(f"[server] pid {os.getpid()}: {self.num_workers} workers on http://{self.host}:{self.port}"
+              f" ({'SO_REUSEPORT' if REUSE_PORT else 'shared socket'})", flush=True)
+
+        while not self._stop:
+            self.reap()
+            if self._reload:
+                self._reload = False
+                self.reload()
+            # 終了したワーカー（リクエスト数による入れ替え・異常終了）を補充
+            current = sum(1 for generation in self.workers.values() if generation == self.generation)
+            for _ in range(self.num_workers - current):
+                self.spawn()
+            time.sleep(0.1)
+
+        self.stop()
+
+    def stop(self):
+        self.kill_workers(list(self.workers))
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        self.kill_workers(list(self.workers), signal.SIGKILL)
+        self.reap()
+        self.sock.close()
+
+
+def configure_shared_stores(workers: int):
+    """複数ワーカーではプロセス内のストアを共有できないので、SQLiteに切り替える"""
+    if workers < 2:
+        return
+    if os.environ.get('FINANCIAL_RPG_STATE_STORE', 'memory') == 'memory':
+        os.environ['FINANCIAL_RPG_STATE_STORE'] = 'sqlite'
+    if os.environ.get('FINANCIAL_RPG_BATTLE_STORE', 'memory') == 'memory':
+        os.environ['FINANCIAL_RPG_BATTLE_STORE'] = 'sqlite'
+    if os.environ.get('FINANCIAL_RPG_BATTLE_SNAPSHOT'):
+        raise SystemExit('[server] FINANCIAL_RPG_BATTLE_SNAPSHOT requires --workers 1: '
+                         'battles are kept in the shared SQLite store instead')
+
+
+def configure_events(workers: int):
+    """サーバープッシュの購読はワーカーごとなので、複数ワーカーでは無効にする（明示的に有効なら起動しない）"""
+    if workers < 2:
+        return
+    if os.environ.get('FINANCIAL_RPG_EVENTS') == '1':
+        raise SystemExit('[server] FINANCIAL_RPG_EVENTS=1 (Server-Sent Events) requires --workers 1: '
+                         'subscribers are per worker and would miss events published by other workers')
+    os.environ['FINANCIAL_RPG_EVENTS'] = '0'
+
+
+def serve(host: str = '0.0.0.0', port: int = 5000, workers: int = None, max_requests: int = 0,
+          max_requests_jitter: int = 0, graceful_timeout: float = 30.0):
+    """プリフォークのサーバーを起動（SIGTERM / SIGINT まで戻らない）"""
+    workers = workers or os.cpu_count() or 1
+    configure_events(workers)
+    configure_shared_stores(workers)
+    # 世界の経済の起点時刻をすべてのワーカー（再起動・リロード後も）で揃える
+    os.environ.setdefault('FINANCIAL_RPG_ECONOMY_EPOCH', repr(time.time()))
+    if not hasattr(os, 'fork'):
+        # fork の無い環境（Windows）ではスレッド方式の単一プロセスで動かす
+        from werkzeug.serving import run_simple
+        import app as app_module
+        run_simple(host, port, app_module.app, threaded=True)
+        return
+
+    preload()
+    arbiter = Arbiter(host, port, workers, max_requests, max_requests_jitter, graceful_timeout)
+    arbiter.run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='金融知識学習RPG 本番用サーバー（プリフォーク）',
+        epilog='ワーカーが2つ以上の場合、サーバープッシュ（/api/events）は無効になり、差分レスポンスは'
+               '別のワーカーに振り分けられると状態全体を返す（どちらもワーカーごとの状態のため）。'
+               'SIGHUP では item, monster, battle, codec, economy は再読み込みされない（再起動が必要）。')
+    parser.add_argument('--host', default=os.environ.get('FINANCIAL_RPG_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('FINANCIAL_RPG_PORT', 5000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('FINANCIAL_RPG_WORKERS', 0)),
+                        help='ワーカープロセス数（0ならCPU数。2以上ではサーバープッシュを無効にする）')
+    parser.add_argument('--max-requests', type=int, default=int(os.environ.get('FINANCIAL_RPG_MAX_REQUESTS', 0)),
+                        help='この数のリクエストを処理したワーカーを入れ替える（0なら無制限）')
+    parser.add_argument('--max-requests-jitter', type=int,
+                        default=int(os.environ.get('FINANCIAL_RPG_MAX_REQUESTS_JITTER', 0)),
+                        help='max-requests に加える乱数の上限')
+    parser.add_argument('--graceful-timeout', type=float,
+                        default=float(os.environ.get('FINANCIAL_RPG_GRACEFUL_TIMEOUT', 30)),
+                        help='終了時に処理中のリクエストを待つ秒数')
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers, args.max_requests, args.max_requests_jitter, args.graceful_timeout)
+
+
+if __name__ == '__main__':
+    main()
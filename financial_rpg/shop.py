@@ -163,15 +163,15 @@ class Shop:
         if not self.player.inventory_weapons:
             print("  （なし）")
         else:
-            for i, weapon in enumerate(self.player.inventory_weapons, 1):
-                print(f"{i}. {weapon.name} - 攻撃力+{weapon.attack_bonus}")
+            for i, (weapon, count, equipped) in enumerate(self.player.inventory_weapons.items(), 1):
+                print(f"{i}. {weapon.name} ×{count}（装備中{equipped}） - 攻撃力+{weapon.attack_bonus}")
         
         print("\n【所持防具】")
         if not self.player.inventory_armors:
             print("  （なし）")
         else:
-            for i, armor in enumerate(self.player.inventory_armors, 1):
-                print(f"{i}. {armor.name} - 防御力+{armor.defense_bonus}")
+            for i, (armor, count, equipped) in enumerate(self.player.inventory_armors.items(), 1):
+                print(f"{i}. {armor.name} ×{count}（装備中{equipped}） - 防御力+{armor.defense_bonus}")
         
         input("\nEnterキーで戻る...")
     
@@ -197,31 +197,37 @@ class Shop:
             print(f"武器: {character.equipped_weapon.name if character.equipped_weapon else 'なし'}")
             print(f"防具: {character.equipped_armor.name if character.equipped_armor else 'なし'}")
             
-            if self.player.inventory_weapons:
+            weapons = list(self.player.inventory_weapons)
+            if weapons:
                 print("\n装備可能な武器:")
-                for i, weapon in enumerate(self.player.inventory_weapons, 1):
-                    print(f"{i}. {weapon.name}")
+                for i, weapon in enumerate(weapons, 1):
+                    print(f"{i}. {weapon.name}（残り{self.player.inventory_weapons.available(weapon.name)}個）")
                 weapon_choice = input("装備する武器の番号（Enterでスキップ）: ").strip()
                 if weapon_choice:
                     try:
                         idx = int(weapon_choice) - 1
-                        if 0 <= idx < len(self.player.inventory_weapons):
-                            self.player.equip_weapon_to_character(character, self.player.inventory_weapons[idx].name)
-                            print(f"{self.player.inventory_weapons[idx].name}を装備しました！")
+                        if 0 <= idx < len(weapons):
+                            if self.player.equip_weapon_to_character(character, weapons[idx].name):
+                                print(f"{weapons[idx].name}を装備しました！")
+                            else:
+                                print(f"{weapons[idx].name}はすべて装備中です。")
                     except ValueError:
                         pass
             
-            if self.player.inventory_armors:
+            armors = list(self.player.inventory_armors)
+            if armors:
                 print("\n装備可能な防具:")
-                for i, armor in enumerate(self.player.inventory_armors, 1):
-                    print(f"{i}. {armor.name}")
+                for i, armor in enumerate(armors, 1):
+                    print(f"{i}. {armor.name}（残り{self.player.inventory_armors.available(armor.name)}個）")
                 armor_choice = input("装備する防具の番号（Enterでスキップ）: ").strip()
                 if armor_choice:
                     try:
                         idx = int(armor_choice) - 1
-                        if 0 <= idx < len(self.player.inventory_armors):
-                            self.player.equip_armor_to_character(character, self.player.inventory_armors[idx].name)
-                            print(f"{self.player.inventory_armors[idx].name}を装備しました！")
+                        if 0 <= idx < len(armors):
+                            if self.player.equip_armor_to_character(character, armors[idx].name):
+                                print(f"{armors[idx].name}を装備しました！")
+                            else:
+                                print(f"{armors[idx].name}はすべて装備中です。")
                     except ValueError:
                         pass
         except ValueError:
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+戦闘バランス調整用のバッチシミュレーター
+
+プレイヤーレベル × モンスターテンプレートの組み合わせごとに、
+シード付きの戦闘を大量に実行して勝率・平均ターン数・報酬を集計する。
+
+使い方:
+    python simulate.py --levels 1-20 --battles 10000 --workers 8 --output results.csv
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from battle import Battle
+from character import Character, CharacterType
+from monster import MONSTER_TEMPLATES, create_monster
+from party import Party
+
+# 集計結果の列（CSVのヘッダーもこの順）
+RESULT_COLUMNS = [
+    'player_level', 'template', 'tier', 'base_level', 'battles', 'wins',
+    'win_rate', 'avg_turns', 'avg_gold', 'avg_f_tickets', 'recruit_rate'
+]
+
+# モンスターの強さの区分（base_level の範囲）
+TIERS = [
+    ('初級', 1, 5),
+    ('中級', 6, 10),
+    ('上級', 11, 15),
+    ('最上級', 16, 20),
+]
+
+
+def get_tier(base_level: int) -> str:
+    """base_level から区分名を返す"""
+    for name, low, high in TIERS:
+        if low <= base_level <= high:
+            return name
+    return TIERS[-1][0]
+
+
+def create_player_party(level: int, party_size: int = 1) -> Party:
+    """指定レベルの人間キャラクターだけのパーティを作成"""
+    party = Party()
+    for i in range(party_size):
+        # Player.create_main_character と同じ初期ステータス
+        character = Character(f'冒険者{i + 1}', CharacterType.HUMAN, 100, 20, 15, 10)
+        for _ in range(level - 1):
+            character.level_up()
+        party.add_member(character)
+    return party
+
+
+def _chunk_seed(seed: int, level: int, template_name: str, chunk_index: int) -> int:
+    """スケジューリングに依存しないチャンクごとのシード"""
+    key = f'{seed}:{level}:{template_name}:{chunk_index}'.encode('utf-8')
+    return zlib.crc32(key)
+
+
+def run_chunk(level: int, template_name: str, num_battles: int, seed: int,
+              num_enemies: int = 1, party_size: int = 1, engine: str = 'object') -> dict:
+    """1チャンク分の戦闘を実行して集計する（ワーカープロセスで実行）"""
+    start = time.perf_counter()
+    if engine == 'vector':
+        return _run_chunk_vector(level, template_name, num_battles, seed, num_enemies, party_size, start)
+    random.seed(seed)
+
+    wins = 0
+    total_turns = 0
+    total_gold = 0
+    total_f_tickets = 0
+    recruits = 0
+    for _ in range(num_battles):
+        player_party = create_player_party(level, party_size)
+        enemy_party = Party()
+        for _ in range(num_enemies):
+            enemy_party.add_member(create_monster(template_name, level))
+        result = Battle(player_party, enemy_party).execute_battle(silent=True)
+
+        total_turns += result['turns']
+        if result['victory']:
+            wins += 1
+            total_gold += result['rewards']['gold']
+            total_f_tickets += result['rewards']['f_tickets']
+            recruits += len(result['recruited_monsters'])
+
+    return {
+        'level': level,
+        'template': template_name,
+        'battles': num_battles,
+        'wins': wins,
+        'turns': total_turns,
+        'gold': total_gold,
+        'f_tickets': total_f_tickets,
+        'recruits': recruits,
+        'pid': os.getpid(),
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def _run_chunk_vector(level, template_name, num_battles, seed, num_enemies, party_size, start):
+    """run_chunk のNumPy版（vector_battle.VectorBattle で一括実行）"""
+    from vector_battle import VectorBattle
+    result = VectorBattle.from_template(num_battles, level, template_name,
+                                        num_enemies, party_size).run(seed=seed)
+    return {
+        'level': level,
+        'template': template_name,
+        'battles': num_battles,
+        'wins': int(result['victory'].sum()),
+        'turns': int(result['turns'].sum()),
+        'gold': int(result['gold'].sum()),
+        'f_tickets': int(result['f_tickets'].sum()),
+        'recruits': int(result['recruited'].sum()),
+        'pid': os.getpid(),
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def _summarize(level: int, template_name: str, totals: dict) -> dict:
+    """チャンクの合計値から1行分の集計結果を作成"""
+    template = MONSTER_TEMPLATES[template_name]
+    battles = totals['battles']
+    return {
+        'player_level': level,
+        'template': template_name,
+        'tier': get_tier(template['base_level']),
+        'base_level': template['base_level'],
+        'battles': battles,
+        'wins': totals['wins'],
+        'win_rate': round(totals['wins'] / battles, 6),
+        'avg_turns': round(totals['turns'] / battles, 4),
+        'avg_gold': round(totals['gold'] / battles, 4),
+        'avg_f_tickets': round(totals['f_tickets'] / battles, 4),
+        'recruit_rate': round(totals['recruits'] / battles, 6),
+    }
+
+
+class SimulationReport:
+    """シミュレーション結果"""
+
+    def __init__(self, rows, worker_stats, elapsed):
+        self.rows = rows
+        self.worker_stats = worker_stats  # pid: {'battles', 'busy_seconds', 'battles_per_second'}
+        self.elapsed = elapsed
+
+    @property
+    def total_battles(self) -> int:
+        return sum(row['battles'] for row in self.rows)
+
+    @property
+    def battles_per_second(self) -> float:
+        return self.total_battles / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def simulate(levels, templates=None, battles_per_cell: int = 1000, workers: int = None,
+             seed: int = 0, chunk_size: int = 500, num_enemies: int = 1,
+             party_size: int = 1, output: str = None, engine: str = 'object') -> SimulationReport:
+    """レベル × テンプレートの全組み合わせをプロセスプールで並列にシミュレーション
+
+    output を指定すると、各組み合わせの集計が完了し次第CSVに1行ずつ書き出す。
+    engine='vector' ではNumPy版エンジン（vector_battle）を使う。
+    """
+    templates = list(templates or MONSTER_TEMPLATES.keys())
+    workers = workers or os.cpu_count() or 1
+
+    # 組み合わせごとに chunk_size 単位でタスクを分割
+    tasks = []
+    for level in levels:
+        for template_name in templates:
+            remaining = battles_per_cell
+            chunk_index = 0
+            while remaining > 0:
+                n = min(chunk_size, remaining)
+                tasks.append((level, template_name, n,
+                              _chunk_seed(seed, level, template_name, chunk_index)))
+                remaining -= n
+                chunk_index += 1
+
+    pending = {}  # (level, template): 未完了のチャンク数
+    for level, template_name, _, _ in tasks:
+        pending[(level, template_name)] = pending.get((level, template_name), 0) + 1
+
+    totals = {}
+    rows = []
+    worker_stats = {}
+    start = time.perf_counter()
+
+    csv_file = open(output, 'w', newline='', encoding='utf-8') if output else None
+    try:
+        writer = None
+        if csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=RESULT_COLUMNS)
+            writer.writeheader()
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(run_chunk, level, template_name, n, chunk_seed,
+                                num_enemies, party_size, engine)
+                for level, template_name, n, chunk_seed in tasks
+            ]
+            for future in as_completed(futures):
+                chunk = future.result()
+                key = (chunk['level'], chunk['template'])
+
+                cell = totals.setdefault(key, {'battles': 0, 'wins': 0, 'turns': 0,
+                                               'gold': 0, 'f_tickets': 0, 'recruits': 0})
+                for field in cell:
+                    cell[field] += chunk[field]
+
+                stats = worker_stats.setdefault(chunk['pid'], {'battles': 0, 'busy_seconds': 0.0})
+                stats['battles'] += chunk['battles']
+                stats['busy_seconds'] += chunk['elapsed']
+
+                pending[key] -= 1
+                if pending[key] == 0:
+                    row = _summarize(key[0], key[1], totals.pop(key))
+                    rows.append(row)
+                    if writer:
+                        writer.writerow(row)
+                        csv_file.flush()
+    finally:
+        if csv_file:
+            csv_file.close()
+
+    for stats in worker_stats.values():
+        busy = stats['busy_seconds']
+        stats['battles_per_second'] = stats['battles'] / busy if busy > 0 else 0.0
+
+    rows.sort(key=lambda row: (row['player_level'], row['base_level'], row['template']))
+    return SimulationReport(rows, worker_stats, time.perf_counter() - start)
+
+
+def parse_levels(values) -> list:
+    """'1-5' や '10' の指定をレベルのリストに展開"""
+    levels = []
+    for value in values:
+        if '-' in value:
+            low, high = value.split('-', 1)
+            levels.extend(range(int(low), int(high) + 1))
+        else:
+            levels.append(int(value))
+    return levels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='戦闘バランスのモンテカルロシミュレーション')
+    parser.add_argument('--levels', nargs='+', default=['1-20'], help='プレイヤーレベル（例: 1-20 25）')
+    parser.add_argument('--tiers', nargs='+', choices=[name for name, _, _ in TIERS],
+                        help='対象とするモンスターの区分（省略時は全テンプレート）')
+    parser.add_argument('--templates', nargs='+', help='対象とするテンプレート名')
+    parser.add_argument('--battles', type=int, default=1000, help='組み合わせごとの戦闘数')
+    parser.add_argument('--workers', type=int, default=None, help='ワーカープロセス数（省略時はCPU数）')
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--enemies', type=int, default=1, help='1戦闘あたりの敵の数')
+    parser.add_argument('--party-size', type=int, default=1, help='プレイヤー側の人数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engine', choices=['object', 'vector'], default='object',
+                        help='vector: NumPyで一括実行（チャンクサイズを大きくすると速い）')
+    parser.add_argument('--output', help='集計結果のCSV出力先')
+    args = parser.parse_args(argv)
+
+    templates = args.templates or list(MONSTER_TEMPLATES.keys())
+    unknown = [name for name in templates if name not in MONSTER_TEMPLATES]
+    if unknown:
+        parser.error(f"Unknown monster: {', '.join(unknown)}")
+    if args.tiers:
+        templates = [name for name in templates
+                     if get_tier(MONSTER_TEMPLATES[name]['base_level']) in args.tiers]
+
+    report = simulate(
+        parse_levels(args.levels), templates,
+        battles_per_cell=args.battles, workers=args.workers, seed=args.seed,
+        chunk_size=args.chunk_size, num_enemies=args.enemies,
+        party_size=args.party_size, output=args.output, engine=args.engine
+    )
+
+    if not args.output:
+        writer = csv.DictWriter(sys.stdout, fieldnames=RESULT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(report.rows)
+
+    print(f"\n総戦闘数: {report.total_battles}  経過時間: {report.elapsed:.2f}秒  "
+          f"スループット: {report.battles_per_second:,.0f} 戦闘/秒", file=sys.stderr)
+    for pid, stats in sorted(report.worker_stats.items()):
+        print(f"  worker {pid}: {stats['battles']:>10,} 戦闘  "
+              f"{stats['battles_per_second']:>10,.0f} 戦闘/秒", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+モンスター出現テーブル（Walkerのエイリアス法によるO(1)サンプリング）
+"""
+
+import random
+import threading
+
+import monster
+
+
+class AliasTable:
+    """重み付きの離散分布から O(1) で抽選するエイリアステーブル（Vose法）"""
+
+    def __init__(self, keys, weights):
+        n = len(keys)
+        if n == 0:
+            raise ValueError("AliasTable requires at least one key")
+        total = float(sum(weights))
+        if total <= 0:
+            # 重みがすべて0の場合は一様分布
+            weights = [1.0] * n
+            total = float(n)
+
+        self.keys = list(keys)
+        self.probabilities = [w / total for w in weights]
+        self._prob = [0.0] * n
+        self._alias = list(range(n))
+
+        scaled = [p * n for p in self.probabilities]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # 丸め誤差で残ったものは確率1
+        for i in large + small:
+            self._prob[i] = 1.0
+
+    def sample(self, rng=random):
+        """1件抽選（乱数は1回だけ消費）"""
+        u = rng.random() * len(self._prob)
+        i = int(u)
+        if u - i < self._prob[i]:
+            return self.keys[i]
+        return self.keys[self._alias[i]]
+
+
+class SpawnTable:
+    """プレイヤーレベルごとのエイリアステーブルを遅延生成してキャッシュする
+
+    MONSTER_TEMPLATES が monster.add_monster_template などで変更されると
+    次回の抽選時にキャッシュを破棄して作り直す。
+    """
+
+    def __init__(self):
+        self._tables = {}
+        self._version = None
+        self._max_level_key = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """キャッシュを破棄"""
+        with self._lock:
+            self._tables = {}
+            self._version = None
+
+    def _level_key(self, player_level: int) -> int:
+        # 最高レベルのテンプレート+6以上は重みがすべて同じになるので同じテーブルを使う
+        return min(max(player_level, 0), self._max_level_key)
+
+    def get_table(self, player_level: int) -> AliasTable:
+        """指定レベルのエイリアステーブルを取得"""
+        version = monster.get_templates_version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._tables = {}
+                    base_levels = [t.get('base_level', 1) for t in monster.MONSTER_TEMPLATES.values()]
+                    self._max_level_key = max(base_levels, default=1) + 6
+                    self._version = version
+
+        key = self._level_key(player_level)
+        table = self._tables.get(key)
+        if table is None:
+            names = list(monster.MONSTER_TEMPLATES.keys())
+            weights = [monster.get_spawn_weight(monster.MONSTER_TEMPLATES[name].get('base_level', 1), key)
+                       for name in names]
+            table = AliasTable(names, weights)
+            self._tables[key] = table
+        return table
+
+    def sample(self, player_level: int, rng=random) -> str:
+        """テンプレート名を1件抽選"""
+        return self.get_table(player_level).sample(rng)
+
+    def sample_many(self, player_level: int, count: int, rng=random) -> list:
+        """テンプレート名を count 件抽選"""
+        table = self.get_table(player_level)
+        return [table.sample(rng) for _ in range(count)]
+
+    def get_probabilities(self, player_level: int) -> dict:
+        """テンプレート名ごとの出現確率"""
+        table = self.get_table(player_level)
+        return dict(zip(table.keys, table.probabilities))
+
+
+# アプリ全体で共有する出現テーブル
+spawn_table = SpawnTable()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+サーバーサイドのゲーム状態ストア
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class GameState:
+    """セッションごとのゲーム状態（ストアに保持する単位）"""
+
+    def __init__(self, player, f_ticket_system, current_area: int = 1, story_progress: int = 0,
+                 economy_tick: int = None):
+        self.player = player
+        self.f_ticket_system = f_ticket_system
+        self.current_area = current_area
+        self.story_progress = story_progress
+        # 最後に見た世界の経済のティック（経済そのものは economy.WorldEconomy が持つ）
+        self.economy_tick = economy_tick
+
+    def as_tuple(self):
+        """(player, f_ticket_system, current_area, story_progress) を返す"""
+        return self.player, self.f_ticket_system, self.current_area, self.story_progress
+
+
+class StateStore:
+    """状態ストアの基本クラス（セッションIDをキーとする）"""
+
+    def get(self, sid: str):
+        """状態を取得（存在しなければNone）"""
+        raise NotImplementedError
+
+    def set(self, sid: str, state):
+        """状態を保存"""
+        raise NotImplementedError
+
+    def delete(self, sid: str):
+        """状態を削除"""
+        raise NotImplementedError
+
+    def __contains__(self, sid: str) -> bool:
+        return self.get(sid) is not None
+
+
+class CookieStateStore(StateStore):
+    """従来方式：Flaskの署名付きCookieセッションに状態を丸ごと保存"""
+
+    def __init__(self, encode, decode, key: str = 'game_state'):
+        self.encode = encode
+        self.decode = decode
+        self.key = key
+
+    def get(self, sid: str):
+        from flask import session
+        if self.key not in session:
+            return None
+        return self.decode(session[self.key])
+
+    def set(self, sid: str, state):
+        from flask import session
+        session[self.key] = self.encode(state)
+
+    def delete(self, sid: str):
+        from flask import session
+        session.pop(self.key, None)
+
+    def __contains__(self, sid: str) -> bool:
+        from flask import session
+        return self.key in session
+
+
+class MemoryStateStore(StateStore):
+    """プロセス内LRUストア（最終アクセスからのTTLで失効）
+
+    生きたオブジェクトをそのまま保持するため、リクエストごとの
+    シリアライズ・デシリアライズが不要になる。
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # sid: (state, 有効期限)
+        self._lock = threading.Lock()
+
+    def get(self, sid: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            state, expires_at = entry
+            if expires_at <= now:
+                del self._entries[sid]
+                return None
+            self._entries[sid] = (state, now + self.ttl)
+            self._entries.move_to_end(sid)
+            return state
+
+    def set(self, sid: str, state):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[sid] = (state, now + self.ttl)
+            self._entries.move_to_end(sid)
+            self._evict(now)
+
+    def delete(self, sid: str):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def items(self):
+        """期限内のエントリを (sid, state) のリストで返す"""
+        now = time.monotonic()
+        with self._lock:
+            return [(sid, state) for sid, (state, expires_at) in self._entries.items() if expires_at > now]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, now: float):
+        """期限切れと容量超過のエントリを削除（先頭ほど古い）"""
+        while self._entries:
+            sid, (_, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[sid]
+
+
+class SessionLocks:
+    """セッションごとのロック（固定数のロックにsidのハッシュで割り当てる）
+
+    MemoryStateStore は同じ生きたオブジェクトを全リクエストに渡すため、同じ
+    セッションのリクエストは読み込みから保存までこのロックで直列にする。
+    ロックの数は固定なので、セッション数が増えてもメモリは増えない
+    （別のセッションが同じロックを共有して待つことはある）。
+    """
+
+    def __init__(self, stripes: int = 256):
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    def get(self, sid: str):
+        return self._locks[hash(sid) % len(self._locks)]
+
+
+class SQLiteStateStore(StateStore):
+    """SQLiteによる永続ストア（再起動後もセッションを維持）
+
+    max_entries を指定すると、保存のたびに期限切れと最も古い更新を超えた分を削除する
+    （同じファイルを使う全プロセスでの上限）。
+    """
+
+    def __init__(self, path: str, encode, decode, ttl: float = 7 * 24 * 3600.0, max_entries: int = None):
+        self.path = path
+        self.encode = encode
+        self.decode = decode
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        for attempt in range(50):
+            try:
+                self._conn.execute('PRAGMA journal_mode=WAL')
+                break
+            except sqlite3.OperationalError:
+                # 複数のワーカーが同時に開くと切り替え中のロックで失敗することがある
+                if attempt == 49:
+                    raise
+                time.sleep(0.1)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            'sid TEXT PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)')
+        self._conn.commit()
+
+    def get(self, sid: str):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data, updated_at FROM sessions WHERE sid = ?', (sid,)
+            ).fetchone()
+        if row is None:
+            return None
+        data, updated_at = row
+        if updated_at + self.ttl <= time.time():
+            self.delete(sid)
+            return None
+        return self.decode(data)
+
+    def set(self, sid: str, state):
+        data = self.encode(state)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sessions (sid, data, updated_at) VALUES (?, ?, ?)',
+                (sid, data, now)
+            )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    'DELETE FROM sessions WHERE updated_at <= ? OR sid IN '
+                    '(SELECT sid FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+                    (now - self.ttl, self.max_entries)
+                )
+            self._conn.commit()
+
+    def delete(self, sid: str):
+        with self._lock:
+            self._conn.execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """期限切れのセッションを削除し、削除件数を返す"""
+        with self._lock:
+            cursor = self._conn.execute(
+                'DELETE FROM sessions WHERE updated_at <= ?', (time.time() - self.ttl,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM sessions WHERE updated_at > ?', (time.time() - self.ttl,)
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
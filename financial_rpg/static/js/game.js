@@ -2,6 +2,17 @@
 let gameState = null;
 let currentPanel = null;
 
+// 差分レスポンス（サーバーから最後に受け取った状態とその版）
+const USE_STATE_DELTA = true;
+let stateVersion = null;
+let stateDoc = {};
+
+// 状態の取り直しに使うAPI
+const STATE_RESYNC_ENDPOINTS = {
+    game_state: '/api/status',
+    battle_state: '/api/battle/state'
+};
+
 // API呼び出し
 async function apiCall(endpoint, method = 'GET', data = null) {
     const options = {
@@ -11,6 +22,10 @@ async function apiCall(endpoint, method = 'GET', data = null) {
         }
     };
     
+    if (USE_STATE_DELTA) {
+        options.headers['X-State-Version'] = stateVersion === null ? '' : String(stateVersion);
+    }
+    
     if (data) {
         options.body = JSON.stringify(data);
     }
@@ -18,13 +33,73 @@ async function apiCall(endpoint, method = 'GET', data = null) {
     try {
         const response = await fetch(endpoint, options);
         const result = await response.json();
-        return result;
+        return await applyStateResponse(result);
     } catch (error) {
         showMessage('エラーが発生しました: ' + error.message, 'error');
         return { success: false, message: error.message };
     }
 }
 
+// パッチを状態に適用（delta.py の apply_patch と同じ処理）
+function applyStatePatch(doc, ops) {
+    for (const op of ops) {
+        const path = op[1];
+        let parent = doc;
+        for (let i = 0; i < path.length - 1; i++) {
+            parent = parent[path[i]];
+        }
+        const key = path[path.length - 1];
+        if (op[0] === 's') {
+            parent[key] = op[2];
+        } else if (op[0] === 'd') {
+            delete parent[key];
+        } else if (op[0] === 'w') {
+            parent[key].splice(0, op[2]);
+            parent[key].push(...op[3]);
+        }
+    }
+}
+
+// 差分・再同期レスポンスを通常のレスポンスと同じ形（result.battle_state など）に戻す
+async function applyStateResponse(result) {
+    if (result.state_version === undefined) {
+        return result;
+    }
+    
+    if (result.state_resync) {
+        // サーバーは再同期で送った状態だけを保持し直すので、手元の他の状態も捨てる
+        stateDoc = {};
+        for (const view of Object.keys(STATE_RESYNC_ENDPOINTS)) {
+            if (result[view] !== undefined) {
+                stateDoc[view] = JSON.parse(JSON.stringify(result[view]));
+            }
+        }
+        stateVersion = result.state_version;
+        return result;
+    }
+    
+    if (result.state_base_version !== stateVersion) {
+        // 途中のレスポンスを取りこぼした場合は全体を取り直す
+        stateVersion = null;
+        stateDoc = {};
+        for (const view of result.state_views) {
+            const full = await apiCall(STATE_RESYNC_ENDPOINTS[view]);
+            // 戦闘が終わっていれば /api/battle/state は失敗する（その状態は含めずに返す）
+            if (full.success && full[view] !== undefined) {
+                result[view] = full[view];
+            }
+        }
+        return result;
+    }
+    
+    applyStatePatch(stateDoc, result.state_patch);
+    stateVersion = result.state_version;
+    for (const view of result.state_views) {
+        result[view] = JSON.parse(JSON.stringify(stateDoc[view]));
+    }
+    return result;
+}
+
 // ゲーム開始
 async function startGame() {
     const name = document.getElementById('player-name').value || '冒険者';
@@ -36,6 +111,7 @@ async function startGame() {
         document.getElementById('start-screen').classList.add('hidden');
         document.getElementById('game-screen').classList.remove('hidden');
         updateStatus();
+        connectEvents();
         showMessage('ゲームを開始しました！', 'success');
     } else {
         showMessage(result.message, 'error');
@@ -68,6 +144,38 @@ async function updateStatus() {
     }
 }
 
+// サーバープッシュ（/api/events）
+let eventSource = null;
+
+function connectEvents() {
+    if (!window.EventSource) {
+        return;
+    }
+    if (eventSource) {
+        eventSource.close();
+    }
+    eventSource = new EventSource('/api/events');
+    
+    // 敵の行動結果
+    eventSource.addEventListener('enemy_turn', (event) => {
+        const data = JSON.parse(event.data);
+        data.actions.forEach(action => showMessage(action.message, 'error'));
+    });
+    
+    // 経済状況の変化
+    eventSource.addEventListener('economy', (event) => {
+        const data = JSON.parse(event.data);
+        document.getElementById('economy-condition').textContent = data.condition;
+        document.getElementById('f-ticket-value').textContent = data.f_ticket_value;
+        showMessage(`経済状況が「${data.condition}」に変化しました`, 'success');
+    });
+    
+    // 配信が追いつかずイベントが捨てられた場合は状態を取り直す
+    eventSource.addEventListener('resync', () => {
+        updateStatus();
+    });
+}
+
 // モーダル制御
 function openBattleModal() {
     document.getElementById('battle-modal').classList.remove('hidden');
@@ -140,6 +248,7 @@ async function showAdventure() {
         gameState = result.game_state;
         updateStatus();
         currentBattleState = result.battle_state;
+        pendingTurnActions = [];
         renderBattleScreen(result.battle_state);
     } else {
         showMessage(result.message, 'error');
@@ -174,25 +283,74 @@ function renderBattleScreen(battleState) {
     }
 }
 
+// 戦闘コマンドをまとめて送る（パーティ全員分のコマンドを1リクエストで実行）
+const USE_BATCHED_TURN = true;
+let pendingTurnActions = [];
+
 // 戦闘アクションを実行
 async function battleAction(actionType, targetIndex = null, itemName = null, spellName = null) {
     closeSpellMenu();
     closeItemMenu();
     
+    if (USE_BATCHED_TURN && actionType !== 'item') {
+        queueTurnAction({ action_type: actionType, target_index: targetIndex, spell_name: spellName });
+        return;
+    }
+    
     const result = await apiCall('/api/battle/action', 'POST', {
         action_type: actionType,
         target_index: targetIndex,
         item_name: itemName,
         spell_name: spellName
     });
+    handleBattleResponse(result);
+}
+
+// コマンドを積み、まだ行動していない全員分がそろったら /api/battle/turn で実行
+async function queueTurnAction(action) {
+    const alivePlayers = currentBattleState.player_party.filter(p => p.is_alive);
+    const actors = alivePlayers.slice(currentBattleState.current_character_index % alivePlayers.length);
+    pendingTurnActions.push(action);
+    
+    if (pendingTurnActions.length < actors.length) {
+        // 次のキャラクターのコマンド入力へ
+        document.getElementById('player-name-display').textContent = actors[pendingTurnActions.length].name;
+        return;
+    }
     
+    const actions = pendingTurnActions;
+    pendingTurnActions = [];
+    const result = await apiCall('/api/battle/turn', 'POST', { actions });
+    if (!result.success && result.battle_state === undefined) {
+        // 検証エラーの場合は何も実行されていないので、コマンド入力をやり直す
+        showMessage(result.message || 'アクションに失敗しました', 'error');
+        renderBattleScreen(currentBattleState);
+        return;
+    }
+    handleBattleResponse(result);
+}
+
+// 戦闘の残りをサーバー側で自動で進める（HPが減ったら回復、それ以外は最も強い攻撃魔法）
+async function battleAuto() {
+    closeSpellMenu();
+    closeItemMenu();
+    pendingTurnActions = [];
+    
+    const result = await apiCall('/api/battle/auto', 'POST', { policy: 'smart', heal_threshold: 0.3 });
+    handleBattleResponse(result);
+}
+
+// 戦闘アクションのレスポンスを反映
+function handleBattleResponse(result) {
     if (result.success) {
         if (result.result && result.result.message) {
             showMessage(result.result.message, 'success');
         }
         
-        currentBattleState = result.battle_state;
-        renderBattleScreen(result.battle_state);
+        if (result.battle_state !== undefined) {
+            currentBattleState = result.battle_state;
+            renderBattleScreen(result.battle_state);
+        }
         
         // 戦闘が終了した場合
         if (result.battle_result) {
@@ -313,6 +471,7 @@ async function showShop() {
     shopContent.innerHTML = '<div style="text-align: center; padding: 50px;">商品を読み込んでいます...</div>';
     
     const itemsResult = await apiCall('/api/shop/items');
+    const recommendResult = await apiCall('/api/shop/recommend');
     await updateStatus();
     
     if (!itemsResult.success) {
@@ -330,6 +489,20 @@ async function showShop() {
     html += `<p>F券: ${gameState.player.f_tickets}枚 (1枚 = ${fTicketValue}G相当)</p>`;
     html += `</div>`;
     
+    // 今の所持金・F券で買える最も強い装備
+    if (recommendResult.success) {
+        const recommendations = [['weapon', '⚔️', 'attack_bonus', '攻撃力'], ['armor', '🛡️', 'defense_bonus', '防御力']]
+            .filter(([type]) => recommendResult[type] && recommendResult[type].best)
+            .map(([type, emoji, stat, label]) => {
+                const best = recommendResult[type].best;
+                const payment = best.use_f_tickets ? `🎫 ${best.price_f_tickets}枚` : `💰 ${best.price_gold}G`;
+                return `<p>${emoji} ${best.name}（${label}+${best[stat]}、${payment}）</p>`;
+            });
+        if (recommendations.length > 0) {
+            html += `<div style="text-align: center; margin-bottom: 20px;"><strong>おすすめ</strong>${recommendations.join('')}</div>`;
+        }
+    }
+    
     // 武器
     html += '<h3 style="margin-top: 30px; color: #667eea;">⚔️ 武器</h3>';
     html += '<div class="shop-items">';
@@ -407,7 +580,7 @@ async function showShop() {
     if (gameState.player.inventory_weapons.length > 0) {
         html += '<div><strong>⚔️ 武器:</strong>';
         gameState.player.inventory_weapons.forEach(weapon => {
-            html += `<div>⚔️ ${weapon.name} (攻撃力+${weapon.attack_bonus})</div>`;
+            html += `<div>⚔️ ${weapon.name} × ${weapon.count} (攻撃力+${weapon.attack_bonus}${weapon.equipped ? `, 装備中${weapon.equipped}` : ''})</div>`;
         });
         html += '</div>';
     }
@@ -415,7 +588,7 @@ async function showShop() {
     if (gameState.player.inventory_armors.length > 0) {
         html += '<div><strong>🛡️ 防具:</strong>';
         gameState.player.inventory_armors.forEach(armor => {
-            html += `<div>🛡️ ${armor.name} (防御力+${armor.defense_bonus})</div>`;
+            html += `<div>🛡️ ${armor.name} × ${armor.count} (防御力+${armor.defense_bonus}${armor.equipped ? `, 装備中${armor.equipped}` : ''})</div>`;
         });
         html += '</div>';
     }
@@ -583,7 +756,7 @@ async function showParty() {
             html += '<select id="equip-weapon" style="padding: 10px; margin: 10px 0; width: 100%;">';
             html += '<option value="">武器を選択</option>';
             gameState.player.inventory_weapons.forEach(weapon => {
-                html += `<option value="${weapon.name}">${weapon.name}</option>`;
+                html += `<option value="${weapon.name}">${weapon.name}（残り${weapon.count - weapon.equipped}個）</option>`;
             });
             html += '</select>';
         }
@@ -592,7 +765,7 @@ async function showParty() {
             html += '<select id="equip-armor" style="padding: 10px; margin: 10px 0; width: 100%;">';
             html += '<option value="">防具を選択</option>';
             gameState.player.inventory_armors.forEach(armor => {
-                html += `<option value="${armor.name}">${armor.name}</option>`;
+                html += `<option value="${armor.name}">${armor.name}（残り${armor.count - armor.equipped}個）</option>`;
             });
             html += '</select>';
         }
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Webアプリケーションの回帰テスト（python -m pytest）
+"""
+
+import os
+import random
+import threading
+
+os.environ.setdefault('FINANCIAL_RPG_BATTLE_LOG_DIR', '')  # テストでは戦闘ログを保存しない
+
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def client():
+    app_module.state_store = app_module.create_state_store('memory')
+    return app_module.app.test_client()
+
+
+def hero(client):
+    return client.get('/api/status').get_json()['game_state']['player']['party'][0]
+
+
+def test_defeat_restores_defense(client):
+    """防御だけで負けても、戦闘後の防御力は基本値と装備の合計に戻る"""
+    random.seed(0)
+    client.post('/api/start', json={'name': 'テスト'})
+    before = hero(client)
+    client.post('/api/adventure')
+    for _ in range(10000):
+        data = client.post('/api/battle/action', json={'action_type': 'defend'}).get_json()
+        if data['battle_result']:
+            break
+    assert data['battle_result']['victory'] is False
+    after = hero(client)
+    assert after['hp'] == 0
+    assert after['defense'] == before['defense']
+    assert after['attack'] == before['attack']
+
+
+def test_recruit_release_returns_equipment(client):
+    """仲間を入れ替えて手放したモンスターの装備は所持品に戻り、他のメンバーに装備できる"""
+    client.post('/api/start', json={'name': 'テスト'})
+    client.post('/api/recruit_monster', json={'monster_name': 'インフレゴブリン'})
+    client.post('/api/shop/buy', json={'type': 'weapon', 'name': '木の剣'})
+    assert client.post('/api/equip', json={'character_name': 'インフレゴブリン', 'type': 'weapon',
+                                           'name': '木の剣'}).get_json()['success']
+
+    data = client.post('/api/recruit_monster', json={'monster_name': 'デフレスライム',
+                                                     'release_name': 'インフレゴブリン'}).get_json()
+    assert data['success']
+    weapons = data['game_state']['player']['inventory_weapons']
+    assert [(w['name'], w['count'], w['equipped']) for w in weapons] == [('木の剣', 1, 0)]
+    assert client.post('/api/equip', json={'character_name': 'テスト', 'type': 'weapon',
+                                           'name': '木の剣'}).get_json()['success']
+
+
+def test_recruit_cannot_release_main_character(client):
+    client.post('/api/start', json={'name': 'テスト'})
+    data = client.post('/api/recruit_monster', json={'monster_name': 'デフレスライム',
+                                                     'release_name': 'テスト'}).get_json()
+    assert [member['name'] for member in data['game_state']['player']['party']] == ['テスト', 'デフレスライム']
+
+
+def test_legacy_state_does_not_mint_equipment():
+    """古い形式で所持数より多く装備していた場合は、余った分を外して復元する"""
+    player = app_module.Player()
+    player.create_main_character('テスト')
+    data = app_module.serialize_game_state(player, app_module.FTicketSystem(), 1, 0)
+    member = data['player']['party'][0]
+    data['player']['party'].append(dict(member, name='コピー'))
+    data['player']['inventory_weapons'] = [{'name': '木の剣'}]
+    for char_data in data['player']['party']:
+        char_data['equipped_weapon'] = '木の剣'
+
+    restored, *_ = app_module.deserialize_game_state(data)
+    assert restored.inventory_weapons.count('木の剣') == 1
+    assert restored.inventory_weapons.equipped_count('木の剣') == 1
+    equipped = [char.equipped_weapon for char in restored.party.members]
+    assert equipped.count(None) == 1
+
+
+def test_unknown_battle_action_is_rejected(client):
+    """不明な行動は実行も記録もせずに success: false を返す"""
+    client.post('/api/start', json={'name': 'テスト'})
+    client.post('/api/adventure')
+    before = client.get('/api/battle/state').get_json()['battle_state']
+    for body in ({'action_type': 'run'}, {'action_type': 'spell', 'spell_name': '存在しない魔法'},
+                 {'action_type': 'attack', 'target_index': 'x'}):
+        response = client.post('/api/battle/action', json=body)
+        assert response.status_code == 200
+        assert response.get_json()['success'] is False
+    assert client.get('/api/battle/state').get_json()['battle_state'] == before
+
+
+def test_legacy_state_rejects_unknown_template_id():
+    player = app_module.Player()
+    player.create_main_character('テスト')
+    player.party.add_member(app_module.create_monster('インフレゴブリン'))
+    data = app_module.serialize_game_state(player, app_module.FTicketSystem(), 1, 0)
+    data['player']['party'][1]['template_id'] = 99999
+    with pytest.raises(ValueError):
+        app_module.deserialize_game_state(data)
+
+
+def test_same_session_requests_are_serialized(client, monkeypatch):
+    """同じセッションのリクエストは、先のリクエストが終わるまで状態を読み込まない"""
+    client.post('/api/start', json={'name': 'テスト'})
+    other = app_module.app.test_client()
+    other.set_cookie('session', client.get_cookie('session').value)
+
+    entered, release = threading.Event(), threading.Event()
+    current = app_module.world_economy.current
+
+    def blocking_current():
+        if not entered.is_set():
+            entered.set()
+            release.wait(5)
+        return current()
+
+    monkeypatch.setattr(app_module.world_economy, 'current', blocking_current)
+    first = threading.Thread(target=client.get, args=('/api/status',))
+    first.start()
+    assert entered.wait(5)
+
+    done = []
+    second = threading.Thread(target=lambda: done.append(other.get('/api/status').status_code))
+    second.start()
+    second.join(0.2)
+    assert done == []  # 先のリクエストがロックを持っている
+
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert done == [200]
+
+
+def test_rejected_battle_turn_changes_nothing(client):
+    """/api/battle/turn は1つでも不正な行動があれば誰も行動させない"""
+    client.post('/api/start', json={'name': 'テスト'})
+    client.post('/api/recruit_monster', json={'monster_name': 'インフレゴブリン'})
+    client.post('/api/adventure')
+    before = client.get('/api/battle/state').get_json()['battle_state']
+    status = client.get('/api/status').get_json()['game_state']
+    for actions in ([{'action_type': 'attack'}, {'action_type': 'run'}], [{'action_type': 'attack'}], None):
+        data = client.post('/api/battle/turn', json={'actions': actions}).get_json()
+        assert data['success'] is False
+    assert client.get('/api/battle/state').get_json()['battle_state'] == before
+    assert client.get('/api/status').get_json()['game_state'] == status
+
+
+@pytest.mark.parametrize('kind', ['memory', 'sqlite'])
+@pytest.mark.parametrize('policy', ['smart', 'attack'])
+def test_auto_battle_applies_rewards(client, monkeypatch, tmp_path, kind, policy):
+    """/api/battle/auto で勝つと、通常の戦闘と同じく報酬・経験値・進行度が保存される"""
+    monkeypatch.setenv('FINANCIAL_RPG_STATE_DB', str(tmp_path / 'state.db'))
+    app_module.state_store = app_module.create_state_store(kind)
+    random.seed(0)
+    client.post('/api/start', json={'name': 'テスト'})
+    for name in ('インフレゴブリン', 'デフレスライム', 'コインスライム'):
+        client.post('/api/recruit_monster', json={'monster_name': name})
+
+    victories = 0
+    for _ in range(20):
+        client.post('/api/adventure')
+        before = client.get('/api/status').get_json()['game_state']
+        data = client.post('/api/battle/auto', json={'policy': policy}).get_json()
+        assert data['success'] is True
+        result = data['battle_result']
+        after = data['game_state']
+        assert client.get('/api/status').get_json()['game_state'] == after
+        assert client.get('/api/battle/state').get_json()['success'] is False  # 戦闘は終わっている
+        if not result['victory']:
+            assert after['player']['gold'] == before['player']['gold']
+            client.post('/api/start', json={'name': 'テスト'})
+            continue
+        victories += 1
+        assert after['player']['gold'] - before['player']['gold'] == result['rewards']['gold']
+        assert after['player']['f_tickets'] - before['player']['f_tickets'] == result['rewards']['f_tickets']
+        assert after['story_progress'] == before['story_progress'] + 1
+        hero_before, hero_after = before['player']['party'][0], after['player']['party'][0]
+        assert (hero_after['level'], hero_after['experience']) > (hero_before['level'], hero_before['experience'])
+    assert victories > 0
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+戦闘の保存・リプレイのテスト（python -m pytest）
+"""
+
+import pickle
+import random
+import threading
+import time
+
+import pytest
+
+from battle import AutoPolicy, Battle, _restore_battle
+from battle_registry import BattleRegistry
+from monster import create_monster, get_random_monsters
+from party import Party
+from player import Player
+from replay import outcome
+from state_store import SQLiteStateStore
+
+
+def new_battle(seed: int, recruits=()) -> Battle:
+    rng = random.Random(seed)
+    player = Player()
+    player.create_main_character('テスト')
+    for name in recruits:
+        player.party.add_member(create_monster(name, 3))
+    enemy_party = Party()
+    for monster in get_random_monsters(3, 2, rng):
+        enemy_party.add_member(monster)
+    return Battle(player.party, enemy_party, seed=seed, record=True)
+
+
+def play(battle: Battle, turns: int):
+    policy = AutoPolicy()
+    for _ in range(turns):
+        alive_enemies = battle.enemy_party.get_alive_members()
+        if battle.player_party.is_all_dead() or not alive_enemies:
+            break
+        battle.player_turn([policy.choose(actor, alive_enemies) for actor in battle.player_party.get_alive_members()])
+
+
+def test_pickle_keeps_state_without_replaying():
+    """進行中の戦闘の pickle は状態をそのまま保存し、読み込んだ後も同じ乱数で続く"""
+    battle = new_battle(1)
+    play(battle, 2)
+    restored = pickle.loads(pickle.dumps(battle))
+    assert outcome(restored) == outcome(battle)
+    assert len(restored.replay.actions) == len(battle.replay.actions)
+    play(battle, 100)
+    play(restored, 100)
+    assert outcome(restored) == outcome(battle)
+
+
+def test_restore_replay_format_pickle():
+    """以前の形式（リプレイ）で保存された戦闘も読み込める"""
+    battle = new_battle(2)
+    play(battle, 2)
+    restored = _restore_battle(battle.replay.encode())
+    assert outcome(restored) == outcome(battle)
+
+
+def test_sqlite_battle_store_keeps_max_entries(tmp_path):
+    store = SQLiteStateStore(str(tmp_path / 'battles.db'), pickle.dumps, pickle.loads, max_entries=2)
+    registry = BattleRegistry(store=store)
+    for sid in ('a', 'b', 'c'):
+        registry.start(sid, new_battle(0))
+    assert len(registry) == 2
+    assert registry.get('a') is None
+    assert registry.get('c') is not None
+
+
+def test_custom_store_rejects_snapshot(tmp_path):
+    store = SQLiteStateStore(str(tmp_path / 'battles.db'), pickle.dumps, pickle.loads)
+    with pytest.raises(ValueError):
+        BattleRegistry(store=store, snapshot_path=str(tmp_path / 'snapshot.pickle'))
+
+
+def test_snapshot_waits_for_the_session_lock(tmp_path):
+    """スナップショットは行動中（セッションのロックを持っている間）の戦闘を保存しない"""
+    path = str(tmp_path / 'snapshot.pickle')
+    registry = BattleRegistry(snapshot_path=path)
+    battle = new_battle(1)
+    registry.start('a', battle)
+
+    with registry.locks.get('a'):
+        writer = threading.Thread(target=registry.snapshot)
+        writer.start()
+        writer.join(0.2)
+        assert writer.is_alive()
+        play(battle, 2)
+    writer.join(5)
+
+    restored = BattleRegistry(snapshot_path=path)
+    assert restored.restore() == 1
+    assert outcome(restored.get('a')) == outcome(battle)
+
+
+def test_maybe_snapshot_runs_in_background(tmp_path):
+    """定期保存は呼び出し元（セッションのロックを持つリクエスト）を待たせない"""
+    path = tmp_path / 'snapshot.pickle'
+    registry = BattleRegistry(snapshot_path=str(path), snapshot_interval=0)
+    registry.start('a', new_battle(1))
+    registry.start('b', new_battle(2))
+
+    with registry.locks.get('b'):
+        registry.maybe_snapshot()  # 'b' のロックを待つのは保存用のスレッドだけ
+        assert not path.exists()
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert BattleRegistry(snapshot_path=str(path)).restore() == 2
+
+
+def test_unknown_action_is_not_recorded():
+    battle = new_battle(0)
+    for action in (('run',), ('spell', None, None, '存在しない魔法'), ('attack', 99)):
+        assert battle.player_action(*action)['success'] is False
+    assert battle.current_character_index == 0
+    assert battle.replay.actions == []
+
+
+@pytest.mark.parametrize('actions', [
+    [{'action_type': 'attack'}] * 2,                                            # 人数が足りない
+    [{'action_type': 'attack'}] * 4,
+    'attack',
+    [{'action_type': 'attack'}, {'action_type': 'attack'}, {'action_type': 'run'}],
+    [{'action_type': 'attack'}, {'action_type': 'defend'}, {'action_type': 'attack', 'target_index': 9}],
+    [{'action_type': 'attack'}, {'action_type': 'attack', 'target_index': True}, {'action_type': 'defend'}],
+    [{'action_type': 'defend'}, {'action_type': 'defend'}, {'action_type': 'spell', 'spell_name': '存在しない魔法'}],
+    [{'action_type': 'attack'}, {'action_type': 'attack'}, None],
+])
+def test_rejected_turn_changes_nothing(actions):
+    """player_turn は全員の行動を検証してから実行する（最後の行動だけが不正でも何も起きない）"""
+    battle = new_battle(3, recruits=('インフレゴブリン', 'デフレスライム'))
+    play(battle, 1)
+    assert len(battle.player_party.get_alive_members()) == 3 and not battle.enemy_party.is_all_dead()
+    before = pickle.dumps(battle)
+    log_count = battle.log.count
+    result = battle.player_turn(actions)
+    assert result['success'] is False
+    assert battle.log.count == log_count
+    assert pickle.dumps(battle) == before  # HP・MP・乱数・行動順・リプレイも変わらない
+
+
+def test_rejected_spell_for_missing_mp_changes_nothing():
+    battle = new_battle(3, recruits=('インフレゴブリン',))
+    hero = battle.player_party.members[0]
+    spell_name, spell = next(iter(hero.SPELLS.items()))
+    hero.mp = spell['mp_cost'] - 1
+    before = pickle.dumps(battle)
+    result = battle.player_turn([{'action_type': 'spell', 'spell_name': spell_name}, {'action_type': 'attack'}])
+    assert result == {'success': False, 'message': '1番目の行動（テスト）: MPが足りません', 'index': 0}
+    assert pickle.dumps(battle) == before
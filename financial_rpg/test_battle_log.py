@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+戦闘ログの保存・ページ読み出しのテスト（python -m pytest）
+"""
+
+import os
+import time
+
+import pytest
+
+from battle_log import BattleEvent, BattleLog, BattleLogStore
+
+
+def write_battle(store: BattleLogStore, sid: str, chunks) -> BattleLog:
+    """chunks 件ずつ追記した戦闘（1回の追記がリクエスト1回分）"""
+    log = BattleLog()
+    for size in chunks:
+        for _ in range(size):
+            log.append(BattleEvent('attack', turn=log.count, actor='テスト', target='スライム', damage=log.count))
+        store.append(sid, log.battle_id, log.drain())
+    return log
+
+
+@pytest.mark.parametrize('page', [1, 3, 7, 8, 100])
+def test_read_pages_across_segments(tmp_path, page):
+    """セグメントの境界をまたいでも、ページ単位で書き込んだ順にすべて読める"""
+    store = BattleLogStore(str(tmp_path), segment_events=7)
+    log = write_battle(store, 'sid', [3, 10, 1, 7, 12])
+    total = store.count('sid', log.battle_id)
+    assert total == log.count == 33
+
+    offset, seqs = 0, []
+    while offset < total:
+        events = store.read('sid', log.battle_id, offset, page)
+        assert 0 < len(events) <= page
+        seqs.extend(event.seq for event in events)
+        offset += len(events)
+    assert seqs == list(range(total))
+    assert [event.damage for event in store.read('sid', log.battle_id, 0, total)] == seqs
+
+
+@pytest.mark.parametrize('offset', [6, 7, 14, 32])
+def test_read_from_segment_boundary(tmp_path, offset):
+    store = BattleLogStore(str(tmp_path), segment_events=7)
+    log = write_battle(store, 'sid', [33])
+    assert [event.seq for event in store.read('sid', log.battle_id, offset, 3)] == \
+        list(range(offset, min(offset + 3, 33)))
+
+
+def test_count_and_read_edges(tmp_path):
+    store = BattleLogStore(str(tmp_path), segment_events=7)
+    log = write_battle(store, 'sid', [14])  # 最後のセグメントがちょうど埋まる
+    assert store.count('sid', log.battle_id) == 14
+    assert store.read('sid', log.battle_id, 14, 10) == []
+    assert store.count('other', log.battle_id) is None
+    assert store.read('sid', '../../etc', 0, 10) is None
+    assert store.count('sid', '0' * 16) is None
+
+
+def test_keep_battles_per_session(tmp_path):
+    store = BattleLogStore(str(tmp_path), keep_battles=2)
+    logs = []
+    for _ in range(3):
+        logs.append(write_battle(store, 'sid', [1]))
+        time.sleep(0.01)  # 更新時刻で新しい順に並べる
+    assert [battle['battle_id'] for battle in store.battles('sid')] == [logs[2].battle_id, logs[1].battle_id]
+
+
+def test_purge_expired_removes_idle_sessions(tmp_path):
+    """最後の追記から max_age 秒たったセッションはディレクトリごと削除する"""
+    store = BattleLogStore(str(tmp_path), max_age=3600)
+    old = write_battle(store, 'old', [2])
+    new = write_battle(store, 'new', [2])
+    stale = time.time() - 7200
+    os.utime(store._session_dir('old'), (stale, stale))
+
+    assert store.purge_expired() == 1
+    assert store.count('old', old.battle_id) is None
+    assert not os.path.exists(store._session_dir('old'))
+    assert store.count('new', new.battle_id) == 2
+
+
+def test_append_keeps_session_fresh(tmp_path):
+    """同じ戦闘への追記でもセッションの最終追記時刻を更新する"""
+    store = BattleLogStore(str(tmp_path), max_age=3600)
+    log = write_battle(store, 'sid', [1])
+    stale = time.time() - 7200
+    os.utime(store._session_dir('sid'), (stale, stale))
+    log.append(BattleEvent('defend', actor='テスト'))
+    store.append('sid', log.battle_id, log.drain())
+    assert store.purge_expired() == 0
+    assert store.count('sid', log.battle_id) == 2
+
+
+def test_new_battle_purges_other_sessions(tmp_path):
+    store = BattleLogStore(str(tmp_path), max_age=3600, purge_interval=600)
+    write_battle(store, 'old', [1])
+    stale = time.time() - 7200
+    os.utime(store._session_dir('old'), (stale, stale))
+    write_battle(store, 'new', [1])  # 前回の確認から purge_interval 秒たっていない
+    assert os.path.exists(store._session_dir('old'))
+
+    store.purge_interval = 0
+    write_battle(store, 'new', [1])
+    assert not os.path.exists(store._session_dir('old'))
+
+
+def test_no_max_age_keeps_everything(tmp_path):
+    store = BattleLogStore(str(tmp_path))
+    log = write_battle(store, 'sid', [1])
+    stale = time.time() - 10 ** 8
+    os.utime(store._session_dir('sid'), (stale, stale))
+    assert store.purge_expired() == 0
+    assert store.count('sid', log.battle_id) == 1
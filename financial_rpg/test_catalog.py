@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ショップカタログのキャッシュのテスト（python -m pytest）
+
+キャッシュしたレスポンスが、毎回 build_catalog() をエンコードする場合と同じ内容になるか。
+"""
+
+import gzip
+import json
+import os
+
+os.environ.setdefault('FINANCIAL_RPG_BATTLE_LOG_DIR', '')  # テストでは戦闘ログを保存しない
+
+import pytest
+
+import app as app_module
+from catalog import CATALOG_TYPES, CatalogCache, CatalogRequestError, build_catalog
+from item import ARMORS, CONSUMABLES, WEAPONS
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def expected(types=CATALOG_TYPES, fields=None) -> dict:
+    catalog = build_catalog()
+    document = {'success': True}
+    for catalog_type in types:
+        items = catalog[catalog_type]
+        if fields is not None:
+            items = [{f: item[f] for f in fields if f in item} for item in items]
+        document[catalog_type] = items
+    return document
+
+
+def test_catalog_lists_every_item():
+    catalog = build_catalog()
+    assert [w['name'] for w in catalog['weapons']] == list(WEAPONS)
+    assert [a['name'] for a in catalog['armors']] == list(ARMORS)
+    assert [c['name'] for c in catalog['consumables']] == list(CONSUMABLES)
+    assert catalog['weapons'][0]['attack_bonus'] == next(iter(WEAPONS.values())).attack_bonus
+
+
+def test_shop_items_match_uncached_catalog(client):
+    """非圧縮・gzip・304 のいずれも、変更前の実装（build_catalog の jsonify）と同じ内容"""
+    plain = client.get('/api/shop/items')
+    assert plain.get_json() == expected()
+
+    compressed = client.get('/api/shop/items', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(compressed.data)) == expected()
+
+    for response, headers in ((plain, {}), (compressed, {'Accept-Encoding': 'gzip'})):
+        revalidated = client.get('/api/shop/items', headers={**headers, 'If-None-Match': response.headers['ETag']})
+        assert revalidated.status_code == 304
+        assert revalidated.data == b''
+
+
+@pytest.mark.parametrize('query, types, fields', [
+    ('type=weapons', ('weapons',), None),
+    ('type=consumables,weapons', ('weapons', 'consumables'), None),
+    ('fields=name,price_gold', CATALOG_TYPES, ('name', 'price_gold')),
+    ('type=armors&fields=defense_bonus,name', ('armors',), ('defense_bonus', 'name')),
+    ('type=weapons,armors&fields=hp_restore', ('weapons', 'armors'), ('hp_restore',)),
+])
+def test_filtered_shop_items_match_uncached_catalog(client, query, types, fields):
+    assert client.get(f'/api/shop/items?{query}').get_json() == expected(types, fields)
+
+
+def test_equivalent_queries_share_a_cache_entry():
+    cache = CatalogCache()
+    assert cache.parse('armors,weapons,armors', 'price_gold, name') == cache.parse('weapons,armors', 'name,price_gold')
+    key = cache.parse('weapons', 'name')
+    assert cache.get(*key) is cache.get(*key)
+
+
+@pytest.mark.parametrize('query', ['type=shields', 'type=,', 'fields=secret', 'fields=name,__class__'])
+def test_bad_queries_are_rejected(client, query):
+    response = client.get(f'/api/shop/items?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+    with pytest.raises(CatalogRequestError):
+        params = dict(part.split('=', 1) for part in query.split('&'))
+        CatalogCache().parse(params.get('type'), params.get('fields'))
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ゲーム状態のコーデックの往復テスト（python -m pytest）
+"""
+
+import random
+
+import pytest
+
+import codec
+from character import Character
+from item import WEAPONS, ARMORS, CONSUMABLES, WEAPON_IDS
+from monster import MONSTER_TEMPLATES, Monster, create_monster
+from player import Player
+from state_store import GameState
+
+CASES = range(300)
+
+
+def random_game_state(rng):
+    """ランダムなゲーム状態"""
+    player = Player()
+    player.gold = rng.randrange(0, 10 ** rng.randrange(1, 12))
+    player.f_tickets = rng.randrange(0, 10 ** rng.randrange(1, 7))
+    player.create_main_character(rng.choice(['冒険者', 'A', 'とても長い名前の冒険者' * 3]))
+    for _ in range(rng.randrange(4)):
+        if rng.random() < 0.8:
+            name = rng.choice(list(MONSTER_TEMPLATES))
+            base_level = MONSTER_TEMPLATES[name]['base_level']
+            member = create_monster(name, rng.randrange(base_level, base_level + 10))
+        else:
+            member = Monster('謎の生き物', rng.randrange(1, 500), rng.randrange(0, 50), rng.randrange(1, 80),
+                             rng.randrange(0, 60), rng.randrange(0, 1000), rng.randrange(0, 10),
+                             rng.random(), rng.randrange(1, 20))
+        player.party.add_member(member)
+    weapon_names, armor_names = list(WEAPONS), list(ARMORS)
+    for _ in range(rng.randrange(20)):
+        player.buy_weapon(rng.choice(weapon_names))
+    for _ in range(rng.randrange(20)):
+        player.buy_armor(rng.choice(armor_names))
+    for name in rng.sample(list(CONSUMABLES), rng.randrange(6)):
+        player.buy_consumable(name, quantity=rng.randrange(1, 99))
+
+    for member in player.party.members:
+        for _ in range(rng.randrange(5)):
+            member.level_up()
+        member.add_experience(rng.randrange(0, member.level * 100))
+        if player.inventory_weapons and rng.random() < 0.7:
+            player.equip_weapon_to_character(member, rng.choice(list(player.inventory_weapons)).name)
+        if player.inventory_armors and rng.random() < 0.7:
+            player.equip_armor_to_character(member, rng.choice(list(player.inventory_armors)).name)
+        if rng.random() < 0.3:
+            member.defend()
+        member.hp = rng.randrange(0, member.max_hp + 1)
+        member.mp = rng.randrange(0, member.max_mp + 1)
+
+    economy_tick = rng.choice([None, 0, rng.randrange(10 ** rng.randrange(1, 10))])
+    return GameState(player, None, rng.randrange(1, 100), rng.randrange(0, 1000), economy_tick)
+
+
+def state_signature(state):
+    """ゲーム状態の比較用タプル（所持品は個数・装備中の数まで比較）"""
+    player = state.player
+
+    def character(char):
+        values = tuple(getattr(char, name) for name in Character.__slots__
+                       if name not in ('equipped_weapon', 'equipped_armor'))
+        values += tuple(item.name if item is not None else None
+                        for item in (char.equipped_weapon, char.equipped_armor))
+        if isinstance(char, Monster):
+            values += (type(char), char.template_id, char.prototype.level, char.emoji, char.gold_reward,
+                       char.f_ticket_reward, char.recruitment_rate, char.base_level)
+        return values
+
+    return (
+        player.gold, player.f_tickets,
+        tuple((w.name, count, equipped) for w, count, equipped in player.inventory_weapons.items()),
+        tuple((a.name, count, equipped) for a, count, equipped in player.inventory_armors.items()),
+        tuple(player.inventory_consumables.items()),
+        tuple(character(m) for m in player.party.members),
+        player.party.members.index(player.main_character) if player.main_character else None,
+        state.economy_tick, state.current_area, state.story_progress,
+    )
+
+
+@pytest.mark.parametrize('fmt', ['json', 'binary'])
+def test_round_trip(fmt):
+    for seed in CASES:
+        state = random_game_state(random.Random(seed))
+        decoded = codec.decode_state(codec.encode_state(state, fmt))
+        assert state_signature(decoded) == state_signature(state), f'seed={seed}'
+
+
+def test_pure_msgpack_round_trip():
+    """純Python実装のmsgpackが自身と（あれば）msgpackパッケージで往復できること"""
+    for seed in CASES:
+        payload = codec._encode_player(random_game_state(random.Random(seed)).player)
+        out = bytearray()
+        codec._pack(payload, out)
+        assert codec._unpack(bytes(out), 0)[0] == payload, f'seed={seed}'
+        if codec.msgpack is not None:
+            assert codec.msgpack.unpackb(bytes(out), raw=False) == payload, f'seed={seed}'
+
+
+# 保存データに残るIDなので、変わったら既存のデータの装備が入れ替わる
+PINNED_CATALOG_IDS = [
+    (codec.WEAPON_CATALOG, '木の剣', 0),
+    (codec.WEAPON_CATALOG, '鉄の剣', 4),
+    (codec.ARMOR_CATALOG, '究極の金融の鎧', len(ARMORS) - 1),
+    (codec.CONSUMABLE_CATALOG, '薬草', 0),
+    (codec.CONSUMABLE_CATALOG, 'グローバル金融の薬', len(CONSUMABLES) - 1),
+]
+
+
+@pytest.mark.parametrize('catalog, name, item_id', PINNED_CATALOG_IDS)
+def test_catalog_ids_are_pinned(catalog, name, item_id):
+    assert catalog.ids[name] == item_id
+    assert catalog.get(item_id).name == name
+
+
+def test_catalog_ids_do_not_depend_on_order():
+    reordered = dict(reversed(list(WEAPONS.items())))
+    assert codec._Catalog(reordered, WEAPON_IDS).ids == codec.WEAPON_CATALOG.ids
+    with pytest.raises(ValueError):
+        codec._Catalog(dict(WEAPONS, 新しい剣=WEAPONS['木の剣']), WEAPON_IDS)  # IDの無い品
+    with pytest.raises(codec.CodecError):
+        codec.WEAPON_CATALOG.get(len(WEAPON_IDS))
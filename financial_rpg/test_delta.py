@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+差分レスポンスのテスト（python -m pytest）
+"""
+
+from delta import DeltaTracker, apply_patch
+
+
+def test_patch_follows_changes():
+    tracker = DeltaTracker()
+    first = tracker.respond('s', None, {'game_state': {'gold': 1, 'log': ['a']}})
+    assert first['state_resync']
+    document = {'game_state': first['game_state']}
+    second = tracker.respond('s', first['state_version'], {'game_state': {'gold': 2, 'log': ['a', 'b']}})
+    assert second['state_base_version'] == first['state_version']
+    apply_patch(document, second['state_patch'])
+    assert document == {'game_state': {'gold': 2, 'log': ['a', 'b']}}
+
+
+def test_resync_forgets_other_views():
+    tracker = DeltaTracker()
+    first = tracker.respond('s', None, {'game_state': {'gold': 1}, 'battle_state': {'turn': 1}})
+    tracker.respond('s', first['state_version'], {'battle_state': {'turn': 2}})  # クライアントが取りこぼした
+
+    # 版が合わないので game_state だけを再同期する。クライアントは battle_state を捨てる
+    resync = tracker.respond('s', first['state_version'], {'game_state': {'gold': 1}})
+    assert resync['state_resync']
+    document = {'game_state': resync['game_state']}
+
+    # サーバーも古い battle_state を基準にせず、全体を送る
+    patch = tracker.respond('s', resync['state_version'], {'battle_state': {'turn': 3}})
+    assert patch['state_patch'] == [['s', ['battle_state'], {'turn': 3}]]
+    apply_patch(document, patch['state_patch'])
+    assert document == {'game_state': {'gold': 1}, 'battle_state': {'turn': 3}}
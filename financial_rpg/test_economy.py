@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+経済状況のマルコフ連鎖モデルと世界の経済のテスト（python -m pytest）
+"""
+
+import os
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from economy import STATES, EconomyModel, WorldEconomy
+from f_ticket import EconomyCondition, FTicketSystem
+
+# 既定の行列とは別の、対称でない行列
+SKEWED = [
+    [5, 1, 0, 0, 0],
+    [2, 3, 1, 0, 0],
+    [0, 1, 2, 3, 0],
+    [0, 0, 1, 1, 4],
+    [1, 0, 0, 2, 1],
+]
+
+
+@pytest.fixture(params=['default', 'skewed'])
+def model(request):
+    return EconomyModel() if request.param == 'default' else EconomyModel(SKEWED)
+
+
+def test_stationary_distribution_is_fixed_point(model):
+    """π P = π, Σπ = 1"""
+    pi = model.stationary_distribution()
+    assert np.allclose(pi @ model.matrix, pi)
+    assert pi.sum() == pytest.approx(1.0)
+    assert (pi >= 0).all()
+
+
+@pytest.mark.parametrize('condition', STATES)
+def test_forecast_rows_are_distributions(model, condition):
+    distributions = model.forecast(condition, 30)
+    assert distributions.shape == (31, len(STATES))
+    assert np.allclose(distributions.sum(axis=1), 1.0)
+    assert distributions[0, model.index[condition]] == 1.0
+    assert np.allclose(distributions[30], np.linalg.matrix_power(model.matrix, 30)[model.index[condition]])
+
+
+def test_forecast_converges_to_stationary(model):
+    assert np.allclose(model.forecast(EconomyCondition.BOOM, 500)[-1], model.stationary_distribution(), atol=1e-6)
+
+
+@pytest.mark.parametrize('matrix', [
+    np.ones((4, 4)),                                  # 形が違う
+    np.ones(5),
+    [[-1, 2, 0, 0, 0]] + [[1, 0, 0, 0, 0]] * 4,       # 負の確率
+    [[np.nan, 1, 0, 0, 0]] + [[1, 0, 0, 0, 0]] * 4,   # 有限でない
+    [[np.inf, 1, 0, 0, 0]] + [[1, 0, 0, 0, 0]] * 4,
+    [[0, 0, 0, 0, 0]] + [[1, 0, 0, 0, 0]] * 4,        # 遷移先が無い
+])
+def test_set_matrix_rejects_bad_matrices(matrix):
+    model = EconomyModel()
+    before, version = model.matrix, model.version
+    with pytest.raises(ValueError):
+        model.set_matrix(matrix)
+    assert model.matrix is before
+    assert model.version == version
+
+
+def test_set_matrix_normalizes_rows_and_bumps_version():
+    model = EconomyModel()
+    model.set_matrix(SKEWED)
+    assert model.version == 2
+    assert np.allclose(model.matrix.sum(axis=1), 1.0)
+    assert model.matrix[0, 0] == pytest.approx(5 / 6)
+    with pytest.raises(ValueError):
+        model.matrix[0, 0] = 1.0  # 読み取り専用
+
+
+@pytest.mark.parametrize('condition', [EconomyCondition.STABLE, EconomyCondition.DEPRESSION])
+def test_simulated_values_match_expected_values(model, condition):
+    """一括生成した経路の平均価値が、行列から求めた期待価値と標準誤差の6倍以内で一致する"""
+    steps, paths = 20, 20000
+    base_value = FTicketSystem().base_value
+    values = np.floor(model.multipliers * base_value)
+    expected = model.forecast(condition, steps) @ values
+
+    states = model.simulate(condition, steps, paths, seed=0)
+    assert states.shape == (paths, steps + 1)
+    assert (states[:, 0] == model.index[condition]).all()
+    simulated = model.simulated_values(states, base_value).mean(axis=0)
+
+    variance = model.forecast(condition, steps) @ values ** 2 - expected ** 2
+    tolerance = 6 * np.sqrt(variance.max() / paths) + 1e-9
+    assert np.abs(simulated - expected).max() <= tolerance
+
+
+def test_simulate_follows_matrix(model):
+    """1ステップの遷移の頻度が遷移行列の行に一致する"""
+    paths = 50000
+    for condition in STATES:
+        states = model.simulate(condition, 1, paths, seed=1)
+        frequencies = np.bincount(states[:, 1], minlength=len(STATES)) / paths
+        assert np.abs(frequencies - model.matrix[model.index[condition]]).max() < 0.02
+
+
+def test_next_condition_uses_cumulative_rows():
+    model = EconomyModel(SKEWED)
+    row = np.cumsum(model.matrix[0])
+    assert model.next_condition(STATES[0], 0.0) == STATES[0]
+    assert model.next_condition(STATES[0], row[0]) == STATES[1]
+    assert model.next_condition(STATES[0], 0.999999) == STATES[1]
+
+
+def world_at(times, seed=7, epoch=1000.0, interval=60.0):
+    """注入した時計で times の各時刻に current() を呼んだ結果"""
+    now = [epoch]
+    world = WorldEconomy(interval=interval, seed=seed, epoch=epoch, clock=lambda: now[0])
+    results = []
+    for now[0] in times:
+        snapshot = world.current()
+        results.append((snapshot.tick, snapshot.current_condition, snapshot.changed_tick,
+                        snapshot.condition_history))
+    return results
+
+
+def test_world_economy_is_deterministic():
+    """同じシード・起点時刻なら、読む時刻の間隔によらず同じスナップショットになる"""
+    every_tick = world_at([1000.0 + 60 * t for t in range(500)])
+    jumps = world_at([1000.0, 1000.0 + 60 * 123.5, 1000.0 + 60 * 499])
+    assert jumps == [every_tick[0], every_tick[123], every_tick[499]]
+    assert world_at([1000.0 + 60 * 499]) == every_tick[-1:]
+    assert world_at([1000.0 + 60 * 499], seed=8) != every_tick[-1:]
+    assert len({condition for _, condition, _, _ in every_tick}) > 1
+    assert all(len(history) <= FTicketSystem.HISTORY_LENGTH for *_, history in every_tick)
+
+
+def test_world_economy_matches_across_processes():
+    """ティックの乱数は hash() に依存しないので、別のプロセスでも同じ経済になる"""
+    times = [1000.0 + 60 * t for t in (0, 1, 17, 250, 1000)]
+    script = (
+        "import test_economy\n"
+        f"print([(t, c.value, ch) for t, c, ch, _ in test_economy.world_at({times!r})])\n"
+    )
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=dict(os.environ, PYTHONHASHSEED='12345')).stdout
+    assert output.strip() == repr([(t, c.value, ch) for t, c, ch, _ in world_at(times)])
+
+
+def test_world_economy_before_epoch_stays_at_tick_zero():
+    assert world_at([0.0, 999.0])[-1][0] == 0
+
+
+def test_start_notifies_when_requests_already_caught_up():
+    """リクエストの current() が先に追いついていても、スレッドは状況の変化を通知する"""
+    now = [1000.0]
+    world = WorldEconomy(interval=0.2, seed=7, epoch=1000.0, clock=lambda: now[0])
+    notified, changed = [], threading.Event()
+
+    def on_change(snapshot):
+        notified.append(snapshot)
+        changed.set()
+
+    world.start(on_change)
+    try:
+        now[0] = 1000.0 + 0.2 * 50
+        caught_up = world.current()  # スレッドより先にリクエストが50ティック進める
+        assert caught_up.changed_tick > 0
+        assert changed.wait(5)
+        assert notified[0] is caught_up
+    finally:
+        world.stop()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+装備の検索インデックスのテスト（python -m pytest）
+
+best_affordable・recommend の結果を、全品を走査する素朴な実装と比べる。
+"""
+
+import random
+
+import pytest
+
+from item import ARMORS, WEAPONS, Weapon
+from item_index import ARMOR_INDEX, CURRENCIES, WEAPON_INDEX, ItemIndex, recommend
+
+
+def random_weapons(seed: int, count: int, attack_range: int, price_range: int) -> list:
+    """性能・価格の重複が多いカタログ（範囲を狭くすると同点が増える）"""
+    rng = random.Random(seed)
+    return [Weapon(f"武器{i}", rng.randint(1, attack_range), rng.randint(1, price_range) * 10,
+                   rng.randint(1, price_range), '') for i in range(count)]
+
+
+def linear_best(items, stat: str, currency: str, budget: int):
+    """予算内で最も性能が高く、同じ性能なら最も安い品の (性能, 価格)"""
+    affordable = [item for item in items if getattr(item, currency) <= budget]
+    if not affordable:
+        return None
+    best = max(affordable, key=lambda item: (getattr(item, stat), -getattr(item, currency)))
+    return getattr(best, stat), getattr(best, currency)
+
+
+def key(item, stat: str, currency: str):
+    return None if item is None else (getattr(item, stat), getattr(item, currency))
+
+
+@pytest.mark.parametrize('seed, count, attack_range, price_range', [
+    (0, 1, 10, 10),
+    (1, 50, 5, 5),       # 同じ性能・同じ価格の品が多い
+    (2, 300, 20, 100),
+    (3, 1000, 1000, 1000),
+])
+def test_best_affordable_matches_linear_scan(seed, count, attack_range, price_range):
+    weapons = random_weapons(seed, count, attack_range, price_range)
+    index = ItemIndex(weapons, 'attack_bonus')
+    for currency in CURRENCIES:
+        prices = sorted({getattr(w, currency) for w in weapons})
+        budgets = [0, prices[-1] * 2] + prices + [price - 1 for price in prices]
+        for budget in budgets:
+            assert key(index.best_affordable(currency, budget), 'attack_bonus', currency) == \
+                linear_best(weapons, 'attack_bonus', currency, budget), (currency, budget)
+
+
+@pytest.mark.parametrize('index, items', [(WEAPON_INDEX, WEAPONS), (ARMOR_INDEX, ARMORS)])
+def test_catalog_indexes_match_linear_scan(index, items):
+    for currency in CURRENCIES:
+        for item in items.values():
+            for budget in (getattr(item, currency) - 1, getattr(item, currency)):
+                assert key(index.best_affordable(currency, budget), index.stat, currency) == \
+                    linear_best(items.values(), index.stat, currency, budget)
+
+
+def linear_recommend(items, stat: str, gold: int, f_tickets: int, f_ticket_value: int):
+    """全品・全支払い方法から (性能, ゴールド換算の費用, F券払いか) が最良のもの（同点ならゴールド払い）"""
+    best = None
+    for use_f_tickets in (False, True):
+        for item in items:
+            if use_f_tickets:
+                if item.price_f_tickets > f_tickets:
+                    continue
+                cost = item.price_f_tickets * f_ticket_value
+            else:
+                if item.price_gold > gold:
+                    continue
+                cost = item.price_gold
+            option = (getattr(item, stat), -cost)
+            if best is None or option > best[:2]:
+                best = option + (use_f_tickets,)
+    return None if best is None else (best[0], -best[1], best[2])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_recommend_matches_linear_scan(seed):
+    """F券払いは現在の価値でゴールドに換算して比べる（同じ性能・同じ費用ならゴールド払い）"""
+    weapons = random_weapons(seed, 60, 8, 20)
+    index = ItemIndex(weapons, 'attack_bonus')
+    rng = random.Random(seed)
+    for _ in range(300):
+        gold, f_tickets, value = rng.randint(0, 250), rng.randint(0, 25), rng.randint(1, 15)
+        result = recommend(index, gold, f_tickets, value)
+        best = result['best']
+        found = None if best is None else (
+            best['attack_bonus'],
+            best['f_tickets_in_gold'] if best['use_f_tickets'] else best['price_gold'],
+            best['use_f_tickets'])
+        assert found == linear_recommend(weapons, 'attack_bonus', gold, f_tickets, value), (gold, f_tickets, value)
+        assert (None if result['gold'] is None else (result['gold']['attack_bonus'], result['gold']['price_gold'])) == \
+            linear_best(weapons, 'attack_bonus', 'price_gold', gold)
+
+
+def test_recommend_converts_f_tickets_at_current_value():
+    cheap = Weapon('安い剣', 10, 1000, 5, '')
+    index = ItemIndex([cheap], 'attack_bonus')
+    assert recommend(index, 1000, 5, 100)['best']['use_f_tickets'] is True    # 5枚 = 500G
+    assert recommend(index, 1000, 5, 300)['best']['use_f_tickets'] is False   # 5枚 = 1500G
+    assert recommend(index, 1000, 5, 200)['best']['use_f_tickets'] is False   # 同額ならゴールド払い
+    assert recommend(index, 0, 0, 100) == {'gold': None, 'f_tickets': None, 'best': None}
+
+
+def test_between_and_sorted_by():
+    weapons = random_weapons(4, 100, 50, 50)
+    index = ItemIndex(weapons, 'attack_bonus')
+    assert [w.price_gold for w in index.sorted_by('price_gold')] == sorted(w.price_gold for w in weapons)
+    found = index.between('attack_bonus', 10, 20)
+    assert sorted(map(id, found)) == sorted(id(w) for w in weapons if 10 <= w.attack_bonus <= 20)
+    assert len(index.between('price_gold')) == len(index) == 100
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+負荷試験ツールのテスト（python -m pytest）
+"""
+
+import asyncio
+import os
+
+os.environ.setdefault('FINANCIAL_RPG_BATTLE_LOG_DIR', '')  # テストでは戦闘ログを保存しない
+
+import pytest
+
+import loadgen
+from loadgen import HTTPClient, LoadStats, _display_width, run_load
+
+
+def test_report_columns_line_up():
+    """見出しと各行（全角の「合計」を含む）の列の位置が揃う"""
+    stats = LoadStats()
+    for endpoint, latency in (('/api/start', 0.001), ('/api/battle/action', 0.0123), ('/api/shop/buy', 1.5)):
+        stats.record(endpoint, latency, False, endpoint == '/api/shop/buy')
+    lines = stats.report(2.0).splitlines()
+    assert len(lines) == 5
+    assert len({_display_width(line) for line in lines}) == 1
+    # 各列の右端（最初の列は左端）が同じ位置にある
+    ends = [[_display_width(line[:i + 1]) for i, c in enumerate(line) if c != ' ' and
+             (i + 1 == len(line) or line[i + 1] == ' ')] for line in lines]
+    assert all(row[1:] == ends[0][1:] for row in ends)
+
+
+@pytest.mark.parametrize('users', [0, -1])
+def test_run_load_rejects_no_users(users):
+    with pytest.raises(ValueError):
+        asyncio.run(run_load(lambda: None, users, 1.0))
+
+
+@pytest.mark.parametrize('users', ['0', '-3'])
+def test_main_rejects_no_users(monkeypatch, users):
+    monkeypatch.setattr('sys.argv', ['loadgen.py', '--in-process', '--users', users])
+    with pytest.raises(SystemExit) as exc_info:
+        loadgen.main()
+    assert exc_info.value.code == 2
+
+
+@pytest.mark.parametrize('prefix, expected', [('', '/api/status'), ('/', '/api/status'),
+                                              ('/game', '/game/api/status'), ('/game/', '/game/api/status')])
+def test_http_client_keeps_url_path_prefix(prefix, expected):
+    """--url のパス部分の下にリクエストを送る"""
+    received = []
+
+    async def handle(reader, writer):
+        received.append((await reader.readline()).decode('latin-1').split(' ')[1])
+        while await reader.readline() not in (b'\r\n', b''):
+            pass
+        body = b'{"success": true}'
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\nConnection: close\r\n\r\n' % len(body) + body)
+        await writer.drain()
+        writer.close()
+
+    async def scenario():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        client = HTTPClient('127.0.0.1', port, timeout=5, prefix=prefix)
+        try:
+            return await client.request('GET', '/api/status')
+        finally:
+            client.close()
+            server.close()
+            await server.wait_closed()
+
+    assert asyncio.run(scenario()) == (200, {'success': True})
+    assert received == [expected]
+
+
+def test_in_process_run():
+    import app as app_module
+    app_module.state_store = app_module.create_state_store('memory')
+    stats, _ = asyncio.run(run_load(lambda: loadgen.TestClientTransport(app_module.app), 2, 30.0,
+                                    journeys=1, seed=0))
+    total = stats.total()
+    assert total.latencies and total.errors == 0
+    assert stats.journeys == 2
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+メトリクスと /metrics の出力形式のテスト（python -m pytest）
+"""
+
+import os
+import re
+
+os.environ.setdefault('FINANCIAL_RPG_BATTLE_LOG_DIR', '')  # テストでは戦闘ログを保存しない
+
+import pytest
+
+import app as app_module
+from metrics import METHODS, PHASE_DURATION, REQUEST_DURATION, Metrics, MetricsMiddleware
+
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\]|\\.)*",?)*\})? \S+$')
+
+
+def exposition_errors(text: str) -> list:
+    """Prometheus のテキスト形式として不正な行・ヒストグラムを返す"""
+    errors = [line for line in text.splitlines() if line and not line.startswith('#') and not SAMPLE.match(line)]
+    # バケットは累積で単調増加、+Inf は _count と一致
+    buckets = {}
+    for line in text.splitlines():
+        if '_bucket{' in line:
+            series = re.sub(r',?le="[^"]*"', '', line.rsplit(' ', 1)[0]).replace('_bucket', '').replace('{}', '')
+            buckets.setdefault(series, []).append(int(line.rsplit(' ', 1)[1]))
+        elif '_count' in line and not line.startswith('#'):
+            series, count = line.rsplit(' ', 1)
+            values = buckets.get(series.replace('_count', ''), [])
+            if not values or values != sorted(values) or values[-1] != int(count):
+                errors.append(line)
+    return errors
+
+
+def label_values(text: str, metric: str, label: str) -> set:
+    return set(re.findall(rf'^{metric}_count{{.*?{label}="([^"]*)"', text, re.MULTILINE))
+
+
+def test_unknown_methods_are_labeled_other():
+    """クライアントが送ったメソッドをそのままラベルにしない（系列が無制限に増えない）"""
+    metrics = Metrics()
+    for method in ('GET', 'POST', 'BREW', 'get', 'X' * 1000, 'A"B\n'):
+        metrics.end(metrics.begin(), method, '200')
+    text = metrics.render()
+    assert label_values(text, REQUEST_DURATION, 'method') == {'GET', 'POST', 'other'}
+    assert exposition_errors(text) == []
+
+
+def test_middleware_normalizes_request_method():
+    metrics = Metrics()
+
+    def wsgi_app(environ, start_response):
+        start_response('405 METHOD NOT ALLOWED', [])
+        return [b'']
+
+    middleware = MetricsMiddleware(wsgi_app, metrics)
+    middleware({'REQUEST_METHOD': 'PROPFIND'}, lambda status, headers, exc_info=None: None)
+    assert label_values(metrics.render(), REQUEST_DURATION, 'method') == {'other'}
+
+
+def test_nested_phases_exclude_inner_time():
+    metrics = Metrics()
+    record = metrics.begin()
+    metrics.set_route('/test')
+    with metrics.phase('outer'):
+        with metrics.phase('inner'):
+            pass
+    metrics.end(record, 'GET', '200')
+    text = metrics.render()
+    assert label_values(text, PHASE_DURATION, 'phase') == {'outer', 'inner', 'other'}
+    phases = dict(re.findall(rf'^{PHASE_DURATION}_sum{{.*?phase="([^"]*)"}} (\S+)$', text, re.MULTILINE))
+    request_sum = float(re.search(rf'^{REQUEST_DURATION}_sum\S* (\S+)$', text, re.MULTILINE).group(1))
+    assert sum(map(float, phases.values())) == pytest.approx(request_sum)
+
+
+@pytest.fixture
+def client():
+    app_module.state_store = app_module.create_state_store('memory')
+    return app_module.app.test_client()
+
+
+def test_metrics_endpoint_exposition(client):
+    """冒険・戦闘・購入と不正なメソッドのリクエストの後の /metrics が正しい形式になる"""
+    if not app_module.METRICS.enabled:
+        pytest.skip('FINANCIAL_RPG_METRICS=0')
+    client.post('/api/start', json={'name': 'テスト'})
+    client.post('/api/recruit_monster', json={'monster_name': 'インフレゴブリン'})
+    client.post('/api/adventure')
+    for _ in range(50):
+        data = client.post('/api/battle/action', json={'action_type': 'attack'}).get_json()
+        if data.get('battle_result') or not data.get('battle_state'):
+            break
+    client.post('/api/shop/buy', json={'type': 'weapon', 'name': '木の剣'})
+    client.open('/api/status', method='BREW')
+    client.get('/存在しないページ')
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert exposition_errors(text) == []
+    methods = label_values(text, REQUEST_DURATION, 'method')
+    assert 'other' in methods and methods <= METHODS | {'other'}
+    assert {'/api/adventure', '/api/battle/action', 'unmatched'} <= label_values(text, REQUEST_DURATION, 'route')
+    assert 'game_logic' in label_values(text, PHASE_DURATION, 'phase')
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+モンスターテンプレートのIDのテスト（python -m pytest）
+"""
+
+import pytest
+
+import codec
+import monster
+from monster import MONSTER_TEMPLATES, create_monster, get_template_info
+
+# 保存データに残るIDなので、変わったら既存のデータが別のモンスターになる
+PINNED_IDS = {
+    'インフレゴブリン': 0,
+    'デフレスライム': 1,
+    'コインスライム': 2,
+    '金利コボルト': 5,
+}
+
+
+def new_template(template_id: int, name: str = 'テストスライム') -> dict:
+    return {'id': template_id, 'name': name, 'max_hp': 10, 'max_mp': 0, 'attack': 1, 'defense': 1,
+            'gold_reward': 1, 'f_ticket_reward': 0, 'recruitment_rate': 0.1, 'base_level': 1}
+
+
+@pytest.fixture
+def templates():
+    """テストで追加・削除したテンプレートを元に戻す"""
+    saved, retired = dict(MONSTER_TEMPLATES), set(monster.RETIRED_TEMPLATE_IDS)
+    yield
+    MONSTER_TEMPLATES.clear()
+    MONSTER_TEMPLATES.update(saved)
+    monster.RETIRED_TEMPLATE_IDS.clear()
+    monster.RETIRED_TEMPLATE_IDS.update(retired)
+    monster._clear_template_caches()
+
+
+def test_ids_are_pinned():
+    for name, template_id in PINNED_IDS.items():
+        assert create_monster(name).template_id == template_id
+    ids = [template['id'] for template in MONSTER_TEMPLATES.values()]
+    assert len(set(ids)) == len(ids)
+
+
+def test_removing_a_template_keeps_other_ids(templates):
+    monster.remove_monster_template('デフレスライム')
+    assert create_monster('コインスライム').template_id == 2
+    assert get_template_info(1) is None
+    with pytest.raises(ValueError):
+        monster.add_monster_template(new_template(1))
+
+
+def test_add_rejects_duplicate_or_missing_id(templates):
+    with pytest.raises(ValueError):
+        monster.add_monster_template(new_template(0))
+    with pytest.raises(ValueError):
+        monster.add_monster_template({key: value for key, value in new_template(0).items() if key != 'id'})
+    monster.add_monster_template(new_template(1000))
+    assert create_monster('テストスライム').template_id == 1000
+
+
+def test_unknown_template_id_is_rejected():
+    data = codec.encode_party([create_monster('インフレゴブリン')])
+    data[0][0][0] = 99999
+    with pytest.raises(codec.CodecError):
+        codec.decode_party(data)
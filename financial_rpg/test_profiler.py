@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+リクエストのプロファイラーのテスト（python -m pytest）
+"""
+
+import cProfile
+import os
+import pstats
+import time
+
+import pytest
+
+from profiler import PROFILE_KINDS, RequestProfiler, collapsed_stacks
+
+
+def busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def leaf():
+    busy(0.002)
+
+
+def branch(depth: int):
+    """再帰と、複数の呼び出し元から呼ばれる関数を含む処理"""
+    leaf()
+    if depth:
+        branch(depth - 1)
+    sorted(range(2000), key=lambda x: -x)
+
+
+def workload():
+    for _ in range(3):
+        branch(3)
+        leaf()
+
+
+def profile_workload() -> pstats.Stats:
+    profile = cProfile.Profile()
+    profile.enable()
+    workload()
+    profile.disable()
+    return pstats.Stats(profile)
+
+
+@pytest.fixture
+def saved(tmp_path):
+    """threshold 0 で1件保存したプロファイラーと、そのプロファイルのID"""
+    profiler = RequestProfiler(str(tmp_path), sample_rate=1.0, threshold=0.0)
+    profile = profiler.start()
+    workload()
+    profile_id = profiler.finish(profile, 0.1, {'route': '/test', 'method': 'GET'})
+    assert profile_id is not None
+    return profiler, profile_id
+
+
+def test_path_returns_saved_files(saved):
+    profiler, profile_id = saved
+    for kind in PROFILE_KINDS:
+        path = profiler.path(profile_id, kind)
+        assert path == os.path.join(profiler.directory, f'{profile_id}.{kind}')
+        assert os.path.isfile(path)
+    assert [profile['id'] for profile in profiler.profiles()] == [profile_id]
+
+
+@pytest.mark.parametrize('kind', ['json', 'PSTATS', '', '../pstats', 'pstats/', 'collapsed\n'])
+def test_path_rejects_other_kinds(saved, kind):
+    profiler, profile_id = saved
+    assert profiler.path(profile_id, kind) is None
+
+
+@pytest.mark.parametrize('transform', [
+    lambda i: '../' + i,
+    lambda i: i + '/..',
+    lambda i: '/etc/passwd',
+    lambda i: '..',
+    lambda i: i + '\n',
+    lambda i: i[:-1],
+    lambda i: i.replace('-', '/'),
+    lambda i: os.path.join('..', os.path.basename(os.getcwd()), i),
+    lambda i: '',
+    lambda i: None,
+])
+def test_path_rejects_traversal_and_malformed_ids(saved, transform):
+    profiler, profile_id = saved
+    assert profiler.path(transform(profile_id), 'pstats') is None
+
+
+def test_path_of_missing_profile(tmp_path):
+    assert RequestProfiler(str(tmp_path)).path('20260101-000000-1-abcdef', 'pstats') is None
+
+
+def test_collapsed_stacks_total_matches_pstats():
+    """折りたたみスタックの合計は pstats の合計時間とほぼ一致する（再帰はスタックに重ねない）"""
+    stats = profile_workload()
+    lines = collapsed_stacks(stats)
+    assert lines
+    total = 0
+    for line in lines:
+        stack, microseconds = line.rsplit(' ', 1)
+        frames = stack.split(';')
+        assert int(microseconds) >= 1
+        assert len(frames) == len(set(frames))
+        total += int(microseconds)
+    assert total / 1e6 == pytest.approx(stats.total_tt, rel=0.02)
+    assert any('leaf (test_profiler.py' in line.split(';')[-1] for line in lines)
+
+
+def test_saved_collapsed_matches_saved_pstats(saved):
+    profiler, profile_id = saved
+    total = pstats.Stats(profiler.path(profile_id, 'pstats')).total_tt
+    with open(profiler.path(profile_id, 'collapsed'), encoding='utf-8') as f:
+        collapsed = sum(int(line.rsplit(' ', 1)[1]) for line in f) / 1e6
+    assert collapsed == pytest.approx(total, rel=0.02)
+
+
+def test_keep_limits_saved_profiles(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), sample_rate=1.0, threshold=0.0, keep=2)
+    for _ in range(4):
+        profiler.finish(profiler.start(), 0.1, {})
+    assert len(profiler.profiles()) == 2
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.pstats')]) == 2
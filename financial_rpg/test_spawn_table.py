@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+モンスター出現テーブルの分布のテスト（python -m pytest）
+"""
+
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from monster import MONSTER_TEMPLATES
+from spawn_table import spawn_table
+
+SAMPLES = 100000
+ALPHA = 0.001
+
+
+def linear_weights(player_level):
+    """従来の get_random_monster と同じ重み計算（全テンプレートを毎回走査）"""
+    level_weights = {}
+    for template_name, template in MONSTER_TEMPLATES.items():
+        base_level = template.get('base_level', 1)
+        level_diff = abs(base_level - player_level)
+        if level_diff == 0:
+            weight = 10.0
+        elif level_diff == 1:
+            weight = 7.0
+        elif level_diff == 2:
+            weight = 4.0
+        elif level_diff == 3:
+            weight = 2.0
+        elif level_diff <= 5:
+            weight = 0.5
+        else:
+            weight = 0.1
+        if player_level <= 3 and base_level <= 3:
+            weight *= 2.0
+        elif player_level <= 5 and base_level <= 5:
+            weight *= 1.5
+        elif player_level <= 10 and base_level <= 10:
+            weight *= 1.2
+        level_weights[template_name] = weight
+    return level_weights
+
+
+def chi_square_p_value(chi2, df):
+    """カイ二乗分布の上側確率（Wilson-Hilferty近似）"""
+    z = ((chi2 / df) ** (1 / 3) - (1 - 2 / (9 * df))) / math.sqrt(2 / (9 * df))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+@pytest.mark.parametrize('level', [1, 3, 5, 8, 12, 20, 30])
+def test_matches_linear_weights(level):
+    """エイリアステーブルの抽選が従来の重みの分布に従う（カイ二乗適合度検定）"""
+    weights = linear_weights(level)
+    total = sum(weights.values())
+    counts = Counter(spawn_table.sample_many(level, SAMPLES, rng=random.Random(level)))
+    chi2 = sum((counts.get(name, 0) - SAMPLES * w / total) ** 2 / (SAMPLES * w / total)
+               for name, w in weights.items())
+    assert chi_square_p_value(chi2, len(weights) - 1) >= ALPHA
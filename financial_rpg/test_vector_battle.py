@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NumPy版戦闘エンジンと Battle.execute_battle の同値性のテスト（python -m pytest）
+"""
+
+import pytest
+
+from vector_battle import compare_with_object_engine
+
+# (レベル, テンプレート, 敵の数, パーティ人数)。勝率が0%/100%に張り付かない拮抗した組み合わせを含める
+CASES = [
+    (1, 'インフレゴブリン', 1, 1),
+    (1, 'インフレゴブリン', 3, 1),
+    (2, '金利コボルト', 2, 1),
+    (3, '債権スライム', 3, 2),
+    (5, '経済成長率ゴブリン', 2, 2),
+    (8, 'ETFオーク', 3, 3),
+]
+
+
+@pytest.mark.parametrize('level, template_name, num_enemies, party_size', CASES)
+def test_matches_object_engine(level, template_name, num_enemies, party_size):
+    """勝率・平均ターン数の差が4標準誤差以内"""
+    result = compare_with_object_engine(2000, level, template_name, num_enemies, party_size, seed=1)
+    assert result['victory']['ok'], result['victory']
+    assert result['turns']['ok'], result['turns']
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NumPyによるベクトル化戦闘エンジン（大量シミュレーション用）
+
+N個の戦闘をstruct-of-arrays（HP・攻撃力・防御力の配列）として保持し、
+全戦闘を1ターンずつまとめて進める。行動順・ターゲット選択・ダメージ計算は
+Battle.execute_battle と同じ規則に従うため、統計的に同じ結果になる。
+"""
+
+import numpy as np
+
+from battle import Battle
+from monster import create_monster
+from party import Party
+
+
+class VectorBattle:
+    """N個の自動戦闘をまとめて実行するエンジン
+
+    各配列の形は プレイヤー側が (N, P)、敵側が (N, E)。
+    空きスロットはHP0（倒れている扱い）で埋める。
+    """
+
+    def __init__(self, player_hp, player_damage, player_defense,
+                 enemy_hp, enemy_damage, enemy_defense,
+                 enemy_gold=None, enemy_f_tickets=None, enemy_recruitment_rate=None):
+        self.player_hp = np.array(player_hp, dtype=np.int64)
+        self.player_damage = np.array(player_damage, dtype=np.int64)
+        self.player_defense = np.array(player_defense, dtype=np.int64)
+        self.enemy_hp = np.array(enemy_hp, dtype=np.int64)
+        self.enemy_damage = np.array(enemy_damage, dtype=np.int64)
+        self.enemy_defense = np.array(enemy_defense, dtype=np.int64)
+
+        shape = self.enemy_hp.shape
+        self.enemy_exists = self.enemy_hp > 0
+        self.enemy_gold = np.zeros(shape, np.int64) if enemy_gold is None else np.array(enemy_gold, np.int64)
+        self.enemy_f_tickets = (np.zeros(shape, np.int64) if enemy_f_tickets is None
+                                else np.array(enemy_f_tickets, np.int64))
+        self.enemy_recruitment_rate = (np.zeros(shape) if enemy_recruitment_rate is None
+                                       else np.array(enemy_recruitment_rate, dtype=np.float64))
+
+        self.num_battles = self.player_hp.shape[0]
+        self.turns = np.zeros(self.num_battles, dtype=np.int64)
+        self.finished = np.zeros(self.num_battles, dtype=bool)
+
+    @classmethod
+    def from_parties(cls, player_parties, enemy_parties):
+        """Partyのリストから配列を作成（Battleと同じ初期状態）"""
+        num_players = max(len(p.members) for p in player_parties)
+        num_enemies = max(len(p.members) for p in enemy_parties)
+        n = len(player_parties)
+
+        arrays = {name: np.zeros((n, num_players), np.int64) for name in ('php', 'pdmg', 'pdef')}
+        arrays.update({name: np.zeros((n, num_enemies), np.int64)
+                       for name in ('ehp', 'edmg', 'edef', 'egold', 'eft')})
+        rate = np.zeros((n, num_enemies))
+
+        for b, (player_party, enemy_party) in enumerate(zip(player_parties, enemy_parties)):
+            for j, member in enumerate(player_party.members):
+                arrays['php'][b, j] = member.hp
+                arrays['pdmg'][b, j] = member.calculate_damage()
+                arrays['pdef'][b, j] = member.defense
+            for i, enemy in enumerate(enemy_party.members):
+                arrays['ehp'][b, i] = enemy.hp
+                arrays['edmg'][b, i] = enemy.calculate_damage()
+                arrays['edef'][b, i] = enemy.defense
+                arrays['egold'][b, i] = enemy.gold_reward
+                arrays['eft'][b, i] = enemy.f_ticket_reward
+                rate[b, i] = enemy.recruitment_rate
+
+        return cls(arrays['php'], arrays['pdmg'], arrays['pdef'],
+                   arrays['ehp'], arrays['edmg'], arrays['edef'],
+                   arrays['egold'], arrays['eft'], rate)
+
+    @classmethod
+    def from_template(cls, num_battles: int, level: int, template_name: str,
+                      num_enemies: int = 1, party_size: int = 1):
+        """同じ構成の戦闘をN個作成（simulate.py と同じ構成）"""
+        from simulate import create_player_party
+        player_party = create_player_party(level, party_size)
+        enemy_party = Party()
+        for _ in range(num_enemies):
+            enemy_party.add_member(create_monster(template_name, level))
+        one = cls.from_parties([player_party], [enemy_party])
+
+        def tile(array):
+            return np.repeat(array, num_battles, axis=0)
+
+        return cls(tile(one.player_hp), tile(one.player_damage), tile(one.player_defense),
+                   tile(one.enemy_hp), tile(one.enemy_damage), tile(one.enemy_defense),
+                   tile(one.enemy_gold), tile(one.enemy_f_tickets), tile(one.enemy_recruitment_rate))
+
+    @staticmethod
+    def _pick_targets(alive, rng):
+        """各戦闘で生存しているスロットから一様に1つ選ぶ（random.choice相当）"""
+        counts = alive.sum(axis=1)
+        picks = (rng.random(alive.shape[0]) * counts).astype(np.int64)
+        return np.argmax(np.cumsum(alive, axis=1) > picks[:, None], axis=1)
+
+    def step(self, rng):
+        """未終了の全戦闘を1ターン進める"""
+        rows = np.arange(self.num_battles)
+        active = ~self.finished
+        self.turns[active] += 1
+
+        # プレイヤー側のターン（ターン開始時の生存者が前から順に行動）
+        acting_players = self.player_hp > 0
+        for j in range(self.player_hp.shape[1]):
+            enemy_alive = self.enemy_hp > 0
+            acting = active & acting_players[:, j] & enemy_alive.any(axis=1)
+            if not acting.any():
+                continue
+            targets = self._pick_targets(enemy_alive, rng)
+            damage = np.maximum(1, self.player_damage[:, j] - self.enemy_defense[rows, targets])
+            new_hp = np.maximum(0, self.enemy_hp[rows, targets] - damage)
+            self.enemy_hp[rows, targets] = np.where(acting, new_hp, self.enemy_hp[rows, targets])
+
+        victory = active & ~(self.enemy_hp > 0).any(axis=1)
+        self.finished |= victory
+        active &= ~victory
+
+        # 敵側のターン（ターゲットはターン開始時の生存者から選ぶ）
+        player_alive = self.player_hp > 0
+        for i in range(self.enemy_hp.shape[1]):
+            acting = active & (self.enemy_hp[:, i] > 0)
+            if not acting.any():
+                continue
+            targets = self._pick_targets(player_alive, rng)
+            damage = np.maximum(1, self.enemy_damage[:, i] - self.player_defense[rows, targets])
+            new_hp = np.maximum(0, self.player_hp[rows, targets] - damage)
+            self.player_hp[rows, targets] = np.where(acting, new_hp, self.player_hp[rows, targets])
+
+        defeat = active & ~(self.player_hp > 0).any(axis=1)
+        self.finished |= defeat
+
+    def run(self, rng=None, seed: int = None, max_turns: int = 100000) -> dict:
+        """全戦闘が終わるまで進め、結果を配列で返す"""
+        if rng is None:
+            rng = np.random.default_rng(seed)
+        while not self.finished.all():
+            if self.turns.max(initial=0) >= max_turns:
+                raise RuntimeError(f"Battle did not finish within {max_turns} turns")
+            self.step(rng)
+
+        victory = ~(self.enemy_hp > 0).any(axis=1)
+        recruited = (rng.random(self.enemy_hp.shape) < self.enemy_recruitment_rate) & self.enemy_exists
+        return {
+            'victory': victory,
+            'turns': self.turns.copy(),
+            'gold': np.where(victory, self.enemy_gold.sum(axis=1), 0),
+            'f_tickets': np.where(victory, self.enemy_f_tickets.sum(axis=1), 0),
+            'recruited': np.where(victory, recruited.sum(axis=1), 0),
+        }
+
+
+def run_object_engine(num_battles: int, level: int, template_name: str,
+                      num_enemies: int = 1, party_size: int = 1, seed: int = None) -> dict:
+    """比較用：Battle.execute_battle で同じ構成の戦闘を実行して配列で返す"""
+    import random
+    from simulate import create_player_party
+
+    if seed is not None:
+        random.seed(seed)
+    victory = np.zeros(num_battles, dtype=bool)
+    turns = np.zeros(num_battles, dtype=np.int64)
+    for b in range(num_battles):
+        enemy_party = Party()
+        for _ in range(num_enemies):
+            enemy_party.add_member(create_monster(template_name, level))
+        result = Battle(create_player_party(level, party_size), enemy_party).execute_battle(silent=True)
+        victory[b] = result['victory']
+        turns[b] = result['turns']
+    return {'victory': victory, 'turns': turns}
+
+
+def compare_with_object_engine(num_battles: int, level: int, template_name: str,
+                               num_enemies: int = 1, party_size: int = 1,
+                               seed: int = 0, z: float = 4.0) -> dict:
+    """両エンジンの勝率・平均ターン数を比較し、差が z 標準誤差以内かを判定"""
+    vector = VectorBattle.from_template(num_battles, level, template_name,
+                                        num_enemies, party_size).run(seed=seed)
+    objects = run_object_engine(num_battles, level, template_name,
+                                num_enemies, party_size, seed=seed)
+
+    result = {'level': level, 'template': template_name, 'num_enemies': num_enemies,
+              'party_size': party_size, 'equivalent': True}
+    for field in ('victory', 'turns'):
+        a = vector[field].astype(np.float64)
+        b = objects[field].astype(np.float64)
+        diff = a.mean() - b.mean()
+        stderr = np.sqrt(a.var(ddof=1) / len(a) + b.var(ddof=1) / len(b))
+        ok = abs(diff) <= z * stderr if stderr > 0 else diff == 0
+        result[field] = {'vector': a.mean(), 'object': b.mean(), 'diff': diff, 'stderr': stderr, 'ok': bool(ok)}
+        result['equivalent'] &= bool(ok)
+    return result